@@ -0,0 +1,232 @@
+"""ASGI serving mode (SERVER_MODE=asgi): the Flask app under uvicorn.
+
+Under Waitress every request holds one of a fixed number of threads for its
+whole life, so a few slow analytics calls leave dashboard polls queueing for
+a thread. Here connections live on the event loop, and the requests that
+can be answered without running a view never take a thread:
+
+- Fast path: GET requests for @conditional_response / @cached_response views
+  are answered on the loop when they can be - a 304 from the data version, or
+  a fresh entry from the shared ResponseCache. Auth and the route's
+  Flask-Limiter limits are checked the way the view's decorators would; data
+  version refreshes and Redis lookups run on an AsyncDatabase executor, never
+  on a request thread.
+- Fast-path bodies are compressed like the Flask after_request hook would.
+- Everything else (cache misses, writes, streaming) runs the unchanged Flask
+  app through a2wsgi's WSGI bridge on a bounded thread pool
+  (ASGI_WSGI_THREADS). Idle and slow clients don't hold those threads while
+  they send or read, but a slow view still holds one for as long as it runs,
+  as under Waitress: this mode keeps cached and 304 traffic away from slow
+  views, it doesn't make the views themselves async.
+
+    SERVER_MODE=asgi python main.py                  # scheduler + uvicorn
+    uvicorn asgi:create_app --factory --port 8080    # API only (like gunicorn main:app)
+"""
+
+import os
+import asyncio
+import logging
+import functools
+from typing import Optional, Tuple, List
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from flask_limiter.errors import RateLimitExceeded
+from flask_limiter.util import get_qualified_name
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags, parse_date, http_date, quote_etag
+from werkzeug.utils import get_content_type
+
+from database import get_db, AsyncDatabase
+from middleware.auth import auth_manager
+from middleware.cache import request_cache_key
+from middleware.conditional import evaluate_conditional
+from middleware.compression import compressible
+
+logger = logging.getLogger(__name__)
+
+# (status, headers, body)
+FastResponse = Tuple[int, List[Tuple[str, str]], bytes]
+
+
+class AsyncFastPath:
+    """ASGI app: answers 304s and cache hits on the loop, bridges the rest to Flask"""
+
+    def __init__(self, flask_app, limiter=None, wsgi_threads: int = None, db_workers: int = None):
+        self.flask_app = flask_app
+        self.limiter = limiter
+        self.wsgi_threads = wsgi_threads or int(os.getenv('ASGI_WSGI_THREADS', 16))
+        self.wsgi = WSGIMiddleware(flask_app, workers=self.wsgi_threads)
+        self.adb = AsyncDatabase(get_db(), max_workers=db_workers or int(os.getenv('ASGI_DB_WORKERS', 4)))
+        self.url_adapter = flask_app.url_map.bind('localhost')
+
+        # Fast-path hits spend the route's own Flask-Limiter budget
+        self.remote_limit_storage = bool(os.getenv('REDIS_URL'))
+
+        self.stats = {'not_modified': 0, 'cache_hits': 0, 'bridged': 0, 'errors': 0}
+        flask_app.extensions['asgi_fast_path'] = self
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            try:
+                fast = await self._fast_response(scope)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"ASGI fast path failed for {scope['path']}, using Flask: {e}")
+                fast = None
+            if fast:
+                status, headers, body = fast
+                headers.append(('Content-Length', str(len(body))))
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+                })
+                await send({'type': 'http.response.body', 'body': body})
+                return
+
+        self.stats['bridged'] += 1
+        await self.wsgi(scope, receive, send)
+
+    async def _fast_response(self, scope) -> Optional[FastResponse]:
+        """A response that needs no request thread, or None to run the Flask view"""
+        try:
+            endpoint, view_args = self.url_adapter.match(scope['path'], method='GET')
+        except HTTPException:
+            return None
+        view = self.flask_app.view_functions.get(endpoint)
+        conditional = getattr(view, 'conditional', False)
+        cached = getattr(view, 'response_cached', False)
+        if not (conditional or cached):
+            return None
+
+        headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        # Failures fall through so Flask renders the usual 401/403/429
+        if not self._authorized(getattr(view, 'auth_level', None), headers, args):
+            return None
+        if not await self._within_rate_limit(scope, view, headers, query_string):
+            return None
+
+        data_version = self.flask_app.extensions.get('data_version')
+        version = None
+        if data_version:
+            version = data_version.peek() or await self.adb.run(data_version.get)
+
+        response_headers = []
+        if conditional and version:
+            not_modified, etag, last_modified = evaluate_conditional(
+                version, f"{scope['path']}?{query_string}",
+                parse_etags(headers.get('If-None-Match')), parse_date(headers.get('If-Modified-Since'))
+            )
+            response_headers = [
+                ('ETag', quote_etag(etag, weak=True)),
+                ('Last-Modified', http_date(last_modified)),
+                ('Cache-Control', 'no-cache'),
+            ]
+            if not_modified:
+                data_version.stats['not_modified'] += 1
+                self.stats['not_modified'] += 1
+                return 304, response_headers, b''
+
+        cache = self.flask_app.extensions.get('response_cache')
+        if cached and cache:
+            key = request_cache_key(endpoint, view_args, args.items(multi=True), version)
+            entry = await self.adb.run(cache.lookup, key) if cache.redis else cache.lookup(key)
+            if entry:
+                fresh_until, body, status, mimetype = entry
+                if response_headers:
+                    data_version.stats['full_responses'] += 1
+                self.stats['cache_hits'] += 1
+                response_headers += [
+                    ('Content-Type', get_content_type(mimetype, 'utf-8')),
+                    ('X-Cache', 'HIT'),
+                ]
+                body, encoding_headers = await self._compress(view, headers, mimetype, body, (key, fresh_until))
+                return status, response_headers + encoding_headers, body
+        return None
+
+    async def _compress(self, view, headers, mimetype: str, body: bytes,
+                        memo_key) -> Tuple[bytes, List[Tuple[str, str]]]:
+        """Same decision as the Flask after_request hook (see middleware.compression).
+
+        memo_key identifies the cache entry: its first hit per encoding is
+        compressed on a worker thread, later hits reuse that copy.
+        """
+        compressor = self.flask_app.extensions.get('response_compressor')
+        if compressor is None or not compressible(mimetype) or not getattr(view, 'compress', True):
+            return body, []
+        encoding = compressor.negotiate(headers.get('Accept-Encoding'))
+        if encoding is None or len(body) < compressor.min_bytes:
+            return body, [('Vary', 'Accept-Encoding')]
+        compressed = compressor.memoized(memo_key, encoding)
+        if compressed is None:
+            compressed = await asyncio.to_thread(compressor.compress, body, encoding, memo_key)
+        return compressed, [('Vary', 'Accept-Encoding'), ('Content-Encoding', encoding)]
+
+    @staticmethod
+    def _authorized(auth_level: Optional[str], headers, args) -> bool:
+        """Same checks as require_api_key / require_admin_key (optional_auth always passes)"""
+        if auth_level not in ('api_key', 'admin'):
+            return True
+        api_key = auth_manager.extract_api_key(headers, args)
+        if not api_key:
+            return False
+        if auth_level == 'admin':
+            return auth_manager.verify_admin_key(api_key)
+        return auth_manager.get_user_role(api_key) is not None
+
+    async def _within_rate_limit(self, scope, view, headers, query_string: str) -> bool:
+        if self.limiter is None or not self.limiter.enabled:
+            return True
+        check = functools.partial(self._check_route_limits, scope, view, headers, query_string)
+        return await self.adb.run(check) if self.remote_limit_storage else check()
+
+    def _check_route_limits(self, scope, view, headers, query_string: str) -> bool:
+        """Flask-Limiter's own checks for the route, in a request context built from the scope.
+
+        Runs the limiter's before_request hook (default and application limits)
+        and, for @limiter.limit views, the check its decorator makes, so a
+        fast-path hit is keyed (middleware.rate_limit.get_rate_limit_key) and
+        counted exactly like the Flask view would be.
+        """
+        client = (scope.get('client') or ('unknown',))[0]
+        with self.flask_app.test_request_context(
+            scope['path'], query_string=query_string, headers=list(headers.items()),
+            environ_base={'REMOTE_ADDR': client},
+        ):
+            try:
+                self.limiter._check_request_limit()
+                if getattr(view, '__wrapper-limiter-instance', None) == self.limiter:  # a weakproxy
+                    self.limiter._check_request_limit(in_middleware=False, callable_name=get_qualified_name(view))
+            except RateLimitExceeded:
+                return False
+        return True
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                logger.info(f"✅ ASGI fast path ready ({self.wsgi_threads} WSGI bridge threads, "
+                            f"{self.adb.max_workers} async DB workers)")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.adb.close(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app, limiter=None) -> AsyncFastPath:
+    """Wrap the Flask app for an ASGI server"""
+    return AsyncFastPath(flask_app, limiter)
+
+
+def create_app() -> AsyncFastPath:
+    """uvicorn --factory entry point"""
+    from main import app, limiter
+    return create_asgi_app(app, limiter)
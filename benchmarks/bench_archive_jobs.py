@@ -0,0 +1,82 @@
+"""Benchmark: per-row Database.archive_jobs vs set-based Database.archive_jobs_bulk.
+
+For each board size the script ingests a fresh board (all inserts) and then a
+refresh where 10% of the postings were replaced (updates + inserts + closes),
+once through each path, and checks both paths report identical counts.
+"""
+
+import random
+import argparse
+
+from common import get_bench_db, timed, print_table
+
+LOCATIONS = ['San Francisco, CA', 'New York, NY', 'Remote', 'London, UK', 'Austin, TX', 'Berlin, Germany']
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'Product', 'Operations']
+
+
+def make_jobs(prefix: str, start: int, count: int):
+    return [
+        {
+            'id': f'{prefix}-{i}',
+            'title': random.choice(['Senior Python Engineer', 'Account Executive', 'Data Scientist', 'Product Manager']),
+            'location': random.choice(LOCATIONS),
+            'department': random.choice(DEPARTMENTS),
+            'work_type': None,
+            'url': f'https://example.com/jobs/{prefix}-{i}',
+            'posted_date': '2025-01-15T00:00:00Z',
+            'salary_min': random.choice([None, 90000, 120000]),
+            'salary_max': random.choice([None, 150000, 180000]),
+            'salary_currency': 'USD',
+            'metadata': {'description': 'Hybrid role with flexible hours'},
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def reset_company(db, name: str) -> int:
+    company_id = db.add_company(name, 'greenhouse', f'https://boards.example.com/{name}')
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM job_archive WHERE company_id = %s", (company_id,))
+            cur.execute("DELETE FROM intelligence_events WHERE company_id = %s", (company_id,))
+        conn.commit()
+    return company_id
+
+
+def run(sizes):
+    db = get_bench_db()
+    rows = []
+    for size in sizes:
+        initial = make_jobs('job', 0, size)
+        churn = size // 10
+        refresh = initial[churn:] + make_jobs('job', size, churn)
+        
+        timings, counts = {}, {}
+        for mode in ('per-row', 'bulk'):
+            company_id = reset_company(db, f'bench-archive-{mode}-{size}')
+            ingest = (lambda jobs: db.archive_jobs(company_id, jobs)) if mode == 'per-row' \
+                else (lambda jobs: db.archive_jobs_bulk({company_id: jobs}))
+            with timed(timings, (mode, 'initial')):
+                counts[(mode, 'initial')] = ingest(initial)
+            with timed(timings, (mode, 'refresh')):
+                counts[(mode, 'refresh')] = ingest(refresh)
+        
+        for phase in ('initial', 'refresh'):
+            row_time = timings[('per-row', phase)]
+            bulk_time = timings[('bulk', phase)]
+            assert counts[('per-row', phase)] == counts[('bulk', phase)], \
+                f"count mismatch: {counts[('per-row', phase)]} vs {counts[('bulk', phase)]}"
+            rows.append((
+                size, phase, counts[('bulk', phase)],
+                f'{row_time * 1000:.1f}', f'{bulk_time * 1000:.1f}', f'{row_time / bulk_time:.1f}x'
+            ))
+    
+    print_table(['jobs/company', 'phase', '(new, updated, closed)', 'per-row ms', 'bulk ms', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+    random.seed(7)
+    run(args.sizes)
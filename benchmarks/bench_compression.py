@@ -0,0 +1,47 @@
+"""Benchmark: gzip / brotli levels on a /api/jobs-sized payload.
+
+Serializes synthetic jobs the way /api/jobs does (orjson, 500-row chunks) and
+compresses the stream with ResponseCompressor at each level, reporting the
+compression ratio and CPU cost per MB. Use it to pick COMPRESSION_GZIP_LEVEL /
+COMPRESSION_BROTLI_LEVEL; /api/admin/metrics reports the same numbers from
+live traffic. No database is needed.
+"""
+
+import argparse
+
+from common import print_table
+
+from flask import Flask
+
+from bench_json import COLUMNS, make_rows, chunked
+from middleware.json_provider import OrjsonProvider, json_encoder, encode_rows
+from middleware.compression import ResponseCompressor, BROTLI_AVAILABLE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--chunk', type=int, default=500)
+    args = parser.parse_args()
+
+    app = Flask('bench')
+    app.json = OrjsonProvider(app)
+    dumpb = json_encoder(app)
+    chunks = [encode_rows(dumpb, COLUMNS, chunk) for chunk in chunked(make_rows(args.rows), args.chunk)]
+    size = sum(len(chunk) for chunk in chunks)
+    print(f"{args.rows:,} rows, {size / 1e6:.1f} MB of JSON in {len(chunks)} chunks\n")
+
+    settings = [('gzip', level) for level in (1, 4, 6, 9)]
+    if BROTLI_AVAILABLE:
+        settings += [('br', level) for level in (1, 4, 6, 9)]
+    rows = []
+    for encoding, level in settings:
+        compressor = ResponseCompressor(gzip_level=level, brotli_level=level)
+        out = sum(len(part) for part in compressor.compress_stream(iter(chunks), encoding))
+        stats = compressor.metrics()['encodings'][encoding]
+        rows.append([encoding, level, f"{out / 1e6:.2f}", f"{stats['ratio']:.3f}", f"{stats['cpu_ms_per_mb']:.1f}"])
+    print_table(['encoding', 'level', 'out MB', 'ratio', 'cpu ms/MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark: buffered vs streaming /api/jobs at 100k rows.
+
+Tops the scratch database up to --rows active jobs (synthetic boards named
+bench-stream-*), then requests the same page through:
+
+  buffered   - the previous handler: fetchall() -> list of dicts -> jsonify
+  streaming  - GET /api/jobs (server-side cursor, chunked JSON)
+  ndjson     - GET /api/jobs?format=ndjson
+
+and reports time-to-first-byte, total time, body size and the peak Python
+heap (tracemalloc, measured in a separate pass so it doesn't skew timings).
+"""
+
+import time
+import argparse
+import tracemalloc
+
+from common import get_bench_db, print_table
+from bench_archive_jobs import make_jobs
+
+import database
+
+
+def ensure_rows(db, rows: int):
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM job_archive WHERE status = 'active'")
+            active = cur.fetchone()[0]
+    board = 0
+    while active < rows:
+        name = f'bench-stream-{board}'
+        company_id = db.add_company(name, 'greenhouse', f'https://boards.example.com/{name}')
+        size = min(5000, rows - active)
+        new, _, _ = db.archive_jobs_bulk({company_id: make_jobs(name, 0, size)})
+        active += new
+        board += 1
+    return active
+
+
+def buffered_response(app, db, limit):
+    """The pre-streaming implementation of get_jobs_api"""
+    with app.test_request_context():
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT j.title, j.location, j.department, j.work_type, j.job_url,
+                           j.first_seen, j.last_seen, c.company_name, c.ats_type
+                    FROM job_archive j
+                    JOIN companies c ON j.company_id = c.id
+                    WHERE j.status = 'active'
+                    ORDER BY j.last_seen DESC
+                    LIMIT %s
+                """, (limit,))
+                columns = [desc[0] for desc in cur.description]
+                jobs = [dict(zip(columns, row)) for row in cur.fetchall()]
+                cur.execute("SELECT COUNT(DISTINCT company_id) FROM job_archive WHERE status = 'active'")
+                total_companies = cur.fetchone()[0]
+        response = app.json.response({
+            'jobs': jobs, 'total_jobs': len(jobs), 'total_companies': total_companies, 'limit_applied': limit
+        })
+        yield response.get_data()
+
+
+def streamed_response(client, query):
+    response = client.get(f'/api/jobs?{query}', buffered=False)
+    try:
+        for chunk in response.response:
+            yield chunk if isinstance(chunk, bytes) else chunk.encode()
+    finally:
+        response.close()
+
+
+def measure(make_body):
+    start = time.perf_counter()
+    ttfb = None
+    size = 0
+    for chunk in make_body():
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        size += len(chunk)
+    return ttfb, time.perf_counter() - start, size
+
+
+def peak_heap(make_body):
+    tracemalloc.start()
+    for _ in make_body():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    db = get_bench_db()
+    active = ensure_rows(db, args.rows)
+    print(f"{active:,} active jobs in the scratch database; requesting {args.rows:,}\n")
+
+    # main.py serves from get_db(); point it at the scratch database before importing
+    database._db_instance = db
+    import main
+    client = main.app.test_client()
+
+    paths = {
+        'buffered': lambda: buffered_response(main.app, db, args.rows),
+        'streaming': lambda: streamed_response(client, f'limit={args.rows}'),
+        'ndjson': lambda: streamed_response(client, f'limit={args.rows}&format=ndjson'),
+    }
+    rows = []
+    for name, make_body in paths.items():
+        measure(make_body)  # warm up caches and the connection pool
+        ttfb, total, size = measure(make_body)
+        peak = peak_heap(make_body)
+        rows.append([name, f"{ttfb * 1000:.0f}", f"{total:.2f}", f"{size / 1e6:.1f}", f"{peak / 1e6:.1f}"])
+    print_table(['path', 'ttfb ms', 'total s', 'body MB', 'peak heap MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
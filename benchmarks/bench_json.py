@@ -0,0 +1,135 @@
+"""Benchmark: stdlib vs orjson serialization of a 50k-row /api/jobs payload.
+
+Builds synthetic rows shaped like Database.iter_active_job_rows (tuples in
+ACTIVE_JOB_COLUMNS order, with date/datetime values) and times:
+
+  stdlib      - Flask's default provider: dict per row, jsonify the list
+  orjson      - OrjsonProvider: dict per row, jsonify the list
+  orjson-rows - OrjsonProvider: format=json chunks via encode_rows
+  tuples      - OrjsonProvider: format=rows chunks via encode_tuples
+
+It also checks that both providers produce the same jobs once parsed
+(datetimes compared as instants). No database is needed.
+"""
+
+import random
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from common import timed, print_table
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from database import ACTIVE_JOB_COLUMNS
+from middleware.json_provider import OrjsonProvider, json_encoder, encode_rows, encode_tuples
+
+COLUMNS = tuple(ACTIVE_JOB_COLUMNS)
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    rows = []
+    for i in range(count):
+        first_seen = now - timedelta(minutes=rng.randint(0, 200_000), microseconds=rng.randint(0, 999_999))
+        salary = rng.choice([None, rng.randrange(60_000, 250_000, 1000)])
+        rows.append((
+            count - i,
+            f"{rng.choice(['Senior', 'Staff', 'Junior'])} {rng.choice(['Software', 'Data', 'Sales'])} Engineer",
+            rng.choice(['Remote', 'New York, NY', 'London, UK', None]),
+            rng.choice(['Engineering', 'Sales', None]),
+            rng.choice(['remote', 'hybrid', 'onsite', None]),
+            f"https://boards.example.com/acme/jobs/{i}",
+            rng.choice([None, first_seen.date()]),
+            salary,
+            salary + 20_000 if salary else None,
+            first_seen,
+            first_seen + timedelta(days=rng.randint(0, 30)),
+            f"Company {rng.randint(1, 5000)}",
+            rng.choice(['greenhouse', 'lever', 'ashby']),
+        ))
+    return rows
+
+
+def chunked(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def normalize(job):
+    """Parse timestamps from either provider so equal instants compare equal"""
+    out = dict(job)
+    for key in ('first_seen', 'last_seen'):
+        value = out[key]
+        out[key] = parsedate_to_datetime(value) if value.endswith('GMT') else datetime.fromisoformat(value)
+        out[key] = out[key].astimezone(timezone.utc).replace(microsecond=0)
+    if out['posted_date']:
+        value = out['posted_date']
+        out['posted_date'] = (parsedate_to_datetime(value) if value.endswith('GMT') else date.fromisoformat(value)).isoformat()[:10]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--chunk', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    stdlib_app, fast_app = Flask('stdlib'), Flask('orjson')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app.json = OrjsonProvider(fast_app)
+    dumpb = json_encoder(fast_app)
+
+    def jsonify_dicts(app):
+        with app.app_context():
+            return app.json.response({'jobs': [dict(zip(COLUMNS, row)) for row in rows]}).get_data()
+
+    def stream_objects():
+        return b'{"jobs":[' + b','.join(encode_rows(dumpb, COLUMNS, chunk) for chunk in chunked(rows, args.chunk)) + b']}'
+
+    def stream_tuples():
+        return (b'{"columns":' + dumpb(COLUMNS) + b',"rows":[' +
+                b','.join(encode_tuples(dumpb, chunk) for chunk in chunked(rows, args.chunk)) + b']}')
+
+    paths = {
+        'stdlib': lambda: jsonify_dicts(stdlib_app),
+        'orjson': lambda: jsonify_dicts(fast_app),
+        'orjson-rows': stream_objects,
+        'tuples': stream_tuples,
+    }
+    results, sizes, bodies = {}, {}, {}
+    for name, run in paths.items():
+        best = None
+        for _ in range(args.repeat):
+            timing = {}
+            with timed(timing, name):
+                bodies[name] = run()
+            best = min(best or timing[name], timing[name])
+        results[name] = best
+        sizes[name] = len(bodies[name])
+
+    baseline = results['stdlib']
+    print(f"{args.rows:,} rows, chunks of {args.chunk}, best of {args.repeat}\n")
+    print_table(
+        ['path', 'seconds', 'rows/s', 'speedup', 'body MB'],
+        [[name, f"{secs:.3f}", f"{args.rows / secs:,.0f}", f"{baseline / secs:.1f}x", f"{sizes[name] / 1e6:.1f}"]
+         for name, secs in results.items()]
+    )
+
+    print()
+    stdlib_jobs = stdlib_app.json.loads(bodies['stdlib'])['jobs']
+    for name in ('orjson', 'orjson-rows'):
+        jobs = fast_app.json.loads(bodies[name])['jobs']
+        same = all(normalize(a) == normalize(b) for a, b in zip(stdlib_jobs, jobs)) and len(jobs) == len(stdlib_jobs)
+        print(f"{name}: {'same jobs as stdlib' if same else 'MISMATCH with stdlib'}")
+    tuples = fast_app.json.loads(bodies['tuples'])
+    same = [dict(zip(tuples['columns'], row)) for row in tuples['rows']] == fast_app.json.loads(bodies['orjson'])['jobs']
+    print(f"tuples: {'same jobs as orjson' if same else 'MISMATCH with orjson'}")
+
+
+if __name__ == '__main__':
+    main()
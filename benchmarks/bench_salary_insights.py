@@ -0,0 +1,191 @@
+"""Benchmark: seven-query salary insights vs the single-statement version.
+
+Tops the scratch database up to --rows job_archive rows (synthetic company
+bench-salary, ~40% of them with a salary range and a few with only a
+minimum), then times:
+
+  legacy    - the previous endpoint: seven separate scans of job_archive
+  single    - Database.compute_salary_insights() (one pass over the salaried rows)
+  filtered  - compute_salary_insights(currency='USD', department='Engineering')
+  rollup    - Database.get_salary_insights() as the endpoint serves it unfiltered
+              (reads the precomputed 'salary_insights' rollup)
+
+Each path is run --repeat times after a warm-up; the median is reported.
+The overview and percentiles of legacy and single are checked for parity.
+"""
+
+import time
+import argparse
+import statistics
+
+from psycopg2.extras import RealDictCursor
+
+from common import get_bench_db, print_table
+
+LEGACY_QUERIES = {
+    'overview': """
+        SELECT
+            COUNT(*) as jobs_with_salary,
+            MIN(salary_min) as min_salary,
+            MAX(salary_max) as max_salary,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as median_salary,
+            (SELECT COUNT(*) FROM job_archive WHERE status = 'active') as total_jobs
+        FROM job_archive
+        WHERE status = 'active' AND salary_min IS NOT NULL AND salary_max IS NOT NULL
+    """,
+    'by_role': """
+        SELECT title as role, AVG((salary_min + salary_max) / 2) as avg_salary, COUNT(*) as count
+        FROM job_archive
+        WHERE status = 'active' AND salary_min IS NOT NULL
+        GROUP BY title HAVING COUNT(*) >= 1
+        ORDER BY avg_salary DESC LIMIT 20
+    """,
+    'by_location': """
+        SELECT location, AVG((salary_min + salary_max) / 2) as avg_salary, COUNT(*) as count
+        FROM job_archive
+        WHERE status = 'active' AND salary_min IS NOT NULL AND location IS NOT NULL
+        GROUP BY location HAVING COUNT(*) >= 1
+        ORDER BY avg_salary DESC LIMIT 15
+    """,
+    'by_company': """
+        SELECT c.company_name as company, AVG((j.salary_min + j.salary_max) / 2) as avg_salary, COUNT(*) as count
+        FROM job_archive j JOIN companies c ON j.company_id = c.id
+        WHERE j.status = 'active' AND j.salary_min IS NOT NULL
+        GROUP BY c.company_name HAVING COUNT(*) >= 1
+        ORDER BY avg_salary DESC LIMIT 15
+    """,
+    'distribution': """
+        SELECT
+            CASE
+                WHEN (salary_min + salary_max) / 2 < 75000 THEN '<$75k'
+                WHEN (salary_min + salary_max) / 2 < 100000 THEN '$75k-$100k'
+                WHEN (salary_min + salary_max) / 2 < 150000 THEN '$100k-$150k'
+                WHEN (salary_min + salary_max) / 2 < 200000 THEN '$150k-$200k'
+                WHEN (salary_min + salary_max) / 2 < 250000 THEN '$200k-$250k'
+                ELSE '$250k+'
+            END as range,
+            COUNT(*) as count
+        FROM job_archive
+        WHERE status = 'active' AND salary_min IS NOT NULL
+        GROUP BY range
+        ORDER BY MIN((salary_min + salary_max) / 2)
+    """,
+    'detailed': """
+        SELECT j.title as role, c.company_name as company, j.location, j.salary_min, j.salary_max,
+               COALESCE(j.salary_currency, 'USD') as currency, COUNT(*) as count
+        FROM job_archive j JOIN companies c ON j.company_id = c.id
+        WHERE j.status = 'active' AND j.salary_min IS NOT NULL
+        GROUP BY j.title, c.company_name, j.location, j.salary_min, j.salary_max, j.salary_currency
+        ORDER BY j.salary_max DESC LIMIT 100
+    """,
+    'percentiles': """
+        SELECT
+            PERCENTILE_CONT(0.10) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p10,
+            PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p25,
+            PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p50,
+            PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p75,
+            PERCENTILE_CONT(0.90) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p90
+        FROM job_archive
+        WHERE status = 'active' AND salary_min IS NOT NULL
+    """,
+}
+
+
+def ensure_rows(db, rows: int) -> int:
+    """Top job_archive up to `rows` with generate_series (much faster than the ingest path)"""
+    company_id = db.add_company('bench-salary', 'greenhouse', 'https://boards.example.com/bench-salary')
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM job_archive")
+            existing = cur.fetchone()[0]
+            missing = rows - existing
+            if missing > 0:
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM job_archive")
+                offset = cur.fetchone()[0]
+                cur.execute("""
+                    INSERT INTO job_archive
+                        (company_id, job_id, title, location, department, work_type, job_url,
+                         salary_min, salary_max, salary_currency, status)
+                    SELECT %s, 'bench-salary-' || (g + %s),
+                           (ARRAY['Software Engineer', 'Senior Software Engineer', 'Data Scientist',
+                                  'Product Manager', 'Account Executive', 'Designer',
+                                  'Staff Engineer', 'Support Specialist'])[1 + g %% 8] || ' ' || (g %% 500),
+                           (ARRAY['New York, NY', 'San Francisco, CA', 'Remote', 'London, UK',
+                                  'Austin, TX', 'Berlin, Germany', 'Toronto, Canada'])[1 + g %% 7],
+                           (ARRAY['Engineering', 'Sales', 'Product', 'Design', 'Support'])[1 + g %% 5],
+                           (ARRAY['remote', 'hybrid', 'onsite'])[1 + g %% 3],
+                           'https://example.com/jobs/bench-salary-' || (g + %s),
+                           CASE WHEN g %% 5 < 2 THEN 60000 + (g::bigint * 7919) %% 140000 END,
+                           CASE WHEN g %% 5 < 2 AND g %% 50 <> 0 THEN 90000 + (g::bigint * 7919) %% 160000 END,
+                           (ARRAY['USD', 'USD', 'USD', 'EUR', 'GBP', NULL])[1 + g %% 6],
+                           CASE WHEN g %% 10 = 0 THEN 'closed' ELSE 'active' END
+                    FROM generate_series(1, %s) AS g
+                """, (company_id, offset, offset, missing))
+                cur.execute("ANALYZE job_archive")
+        conn.commit()
+    return max(existing, rows)
+
+
+def legacy_insights(db):
+    results = {}
+    with db.get_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            for name, sql in LEGACY_QUERIES.items():
+                cur.execute(sql)
+                rows = [dict(row) for row in cur.fetchall()]
+                results[name] = rows[0] if name in ('overview', 'percentiles') else rows
+    return results
+
+
+def median_seconds(fn, repeat: int):
+    fn()  # warm up caches and the connection pool
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def close(a, b):
+    if a is None or b is None:
+        return a is b
+    return abs(float(a) - float(b)) < 0.01
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db = get_bench_db()
+    total = ensure_rows(db, args.rows)
+    print(f"{total:,} job_archive rows in the scratch database\n")
+
+    legacy = legacy_insights(db)
+    single = db.compute_salary_insights()
+    parity = all(close(legacy['overview'][k], single['overview'][k]) for k in legacy['overview'])
+    parity &= all(close(legacy['percentiles'][k], single['percentiles'][k]) for k in legacy['percentiles'])
+    print(f"Parity (overview + percentiles): {'OK' if parity else 'MISMATCH'}")
+    if not parity:
+        print(f"  legacy: {legacy['overview']} {legacy['percentiles']}")
+        print(f"  single: {single['overview']} {single['percentiles']}")
+    print()
+
+    paths = {
+        'legacy': lambda: legacy_insights(db),
+        'single': lambda: db.compute_salary_insights(),
+        'filtered': lambda: db.compute_salary_insights(currency='USD', department='Engineering'),
+        'rollup': lambda: db.get_salary_insights(),
+    }
+    db.refresh_analytics_rollups()
+    timings = {name: median_seconds(fn, args.repeat) for name, fn in paths.items()}
+    print_table(
+        ['path', 'median s', 'speedup'],
+        [[name, f"{seconds:.3f}", f"{timings['legacy'] / seconds:.1f}x"] for name, seconds in timings.items()]
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: ORDER BY RANDOM() seed selection vs indexed bucket sampling.
+
+Grows seed_companies in the scratch database with synthetic seeds, up to 1M
+rows. At each size it times the legacy CASE-priority + ORDER BY RANDOM() query,
+the legacy V7 tier/times_tested/RANDOM() query, and Database.get_seeds. Run
+with --cleanup to delete the synthetic seeds afterwards.
+"""
+
+import time
+import argparse
+import statistics
+
+from common import get_bench_db, print_table
+
+LEGACY_GET_SEEDS = """
+    WITH prioritized_seeds AS (
+        SELECT company_name, company_name_token, source, tier, times_tested, times_successful,
+               success_rate, last_tested_at,
+               CASE
+                   WHEN times_tested = 0 AND tier = 1 THEN 1
+                   WHEN times_tested = 0 AND tier = 2 THEN 2
+                   WHEN times_tested = 0 THEN 3
+                   WHEN success_rate >= 50.0 AND last_tested_at < NOW() - INTERVAL '7 days' THEN 4
+                   WHEN success_rate >= 30.0 AND last_tested_at < NOW() - INTERVAL '14 days' THEN 5
+                   WHEN times_tested <= 2 AND tier = 1 THEN 6
+                   WHEN times_tested <= 2 AND tier = 2 THEN 7
+                   ELSE 8
+               END AS priority,
+               RANDOM() AS random_sort
+        FROM seed_companies
+        WHERE is_blacklisted = false
+    )
+    SELECT company_name FROM prioritized_seeds ORDER BY priority ASC, random_sort LIMIT %s
+"""
+
+LEGACY_V7 = """
+    SELECT company_name, company_name_token FROM seed_companies
+    WHERE is_blacklisted = FALSE AND (times_tested < 3 OR times_tested IS NULL)
+    ORDER BY tier ASC, times_tested ASC NULLS FIRST, RANDOM()
+    LIMIT %s
+"""
+
+
+def grow_seeds(db, target: int) -> int:
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM seed_companies WHERE company_name_token LIKE 'bench-seed-%%'")
+            existing = cur.fetchone()[0]
+            if existing < target:
+                # Mostly tested seeds, like a mature table: ~5% never tested
+                cur.execute("""
+                    INSERT INTO seed_companies (company_name, company_name_token, source, tier,
+                                                times_tested, times_successful, success_rate, last_tested_at)
+                    SELECT 'Bench Seed ' || g, 'bench-seed-' || g, 'benchmark', 1 + (g %% 4),
+                           CASE WHEN g %% 20 = 0 THEN 0 ELSE 1 + (g %% 5) END,
+                           CASE WHEN g %% 7 = 0 THEN 1 ELSE 0 END,
+                           CASE WHEN g %% 7 = 0 THEN 40.0 ELSE 0 END,
+                           CASE WHEN g %% 20 = 0 THEN NULL ELSE NOW() - ((g %% 30) || ' days')::interval END
+                    FROM generate_series(%s, %s) g
+                    ON CONFLICT (company_name_token) DO NOTHING
+                """, (existing + 1, target))
+            conn.commit()
+            cur.execute("ANALYZE seed_companies")
+            conn.commit()
+    return target
+
+
+def median_ms(fn, runs: int) -> str:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return f'{statistics.median(samples) * 1000:.1f}'
+
+
+def run_sql(db, sql, limit):
+    with db.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (limit,))
+            return cur.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+    
+    db = get_bench_db()
+    rows = []
+    for size in sorted(args.sizes):
+        grow_seeds(db, size)
+        rows.append((
+            size,
+            median_ms(lambda: run_sql(db, LEGACY_GET_SEEDS, args.limit), args.runs),
+            median_ms(lambda: run_sql(db, LEGACY_V7, args.limit), args.runs),
+            median_ms(lambda: db.get_seeds(limit=args.limit), args.runs),
+            median_ms(lambda: db.get_seeds(limit=args.limit, max_times_tested=2), args.runs),
+        ))
+    print_table(['seeds', 'legacy get_seeds ms', 'legacy v7 ms', 'get_seeds ms', 'get_seeds(max_tested=2) ms'], rows)
+    
+    if args.cleanup:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM seed_companies WHERE company_name_token LIKE 'bench-seed-%%'")
+            conn.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: per-title regex loop vs the shared skills engine.
+
+Builds a synthetic batch of job titles (default 100k drawn from ~5k distinct
+titles, which is roughly the duplication seen in job_archive) and times:
+
+  legacy   - the old _extract_skills_from_text: ~60 re.search calls per title
+  engine   - skills.count_skills over the raw titles (cold cache)
+  grouped  - skills.count_skills over GROUP BY title counts, as analytics does
+
+It also checks that the engine tags every distinct title exactly like the
+legacy per-pattern search. No database is needed.
+"""
+
+import re
+import random
+import argparse
+
+from common import timed, print_table
+
+import skills
+
+WORDS = [
+    'Senior', 'Staff', 'Principal', 'Lead', 'Junior', 'Software', 'Engineer', 'Developer',
+    'Manager', 'Analyst', 'Product', 'Designer', 'Sales', 'Account', 'Executive', 'Marketing',
+    'Python', 'Java', 'JavaScript', 'Go', 'Golang', 'Rust', 'C++', 'C#', 'React', 'Node.js',
+    'Vue.js', 'AWS', 'GCP', 'Kubernetes', 'K8s', 'Docker', 'SQL', 'PostgreSQL', 'ML', 'AI',
+    'Machine Learning', 'Data Science', 'Data Engineer', 'Full-Stack', 'Frontend', 'Back End',
+    'DevOps', 'iOS', 'Android', 'GitHub', 'Git', 'Spark', 'Kafka', 'GraphQL', '(Remote)', '-', '/',
+]
+
+
+def legacy_extract(text):
+    """The pre-engine implementation, kept verbatim for comparison"""
+    if not text:
+        return {}
+    found = {}
+    for skill, pattern in skills.SKILL_PATTERNS.items():
+        if re.search(pattern, text, re.IGNORECASE):
+            found[skill] = found.get(skill, 0) + 1
+    return found
+
+
+def make_titles(total, distinct, seed=42):
+    rng = random.Random(seed)
+    uniques = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(distinct)]
+    # Zipf-ish duplication: a few titles are very common
+    weights = [1.0 / (i + 1) for i in range(distinct)]
+    return rng.choices(uniques, weights=weights, k=total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--distinct', type=int, default=5_000)
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles, args.distinct)
+    grouped = {}
+    for title in titles:
+        grouped[title] = grouped.get(title, 0) + 1
+
+    # Parity: the engine must tag exactly like searching each pattern separately
+    mismatches = [t for t in grouped if set(legacy_extract(t)) != skills.tag_title(t)]
+    print(f"Parity: {len(grouped) - len(mismatches)}/{len(grouped)} distinct titles tagged identically")
+    for title in mismatches[:5]:
+        print(f"  MISMATCH {title!r}: legacy={sorted(legacy_extract(title))} engine={sorted(skills.tag_title(title))}")
+
+    results = {}
+    with timed(results, 'legacy'):
+        legacy_counts = {}
+        for title in titles:
+            for skill, count in legacy_extract(title).items():
+                legacy_counts[skill] = legacy_counts.get(skill, 0) + count
+
+    skills.tag_title.cache_clear()
+    with timed(results, 'engine'):
+        engine_counts = skills.count_skills((title, 1) for title in titles)
+    engine_cache = skills.cache_info()
+
+    skills.tag_title.cache_clear()
+    with timed(results, 'grouped'):
+        grouped_counts = skills.count_skills(grouped.items())
+
+    assert legacy_counts == engine_counts == grouped_counts, "skill counts differ"
+
+    print(f"\n{args.titles:,} titles, {len(grouped):,} distinct "
+          f"(engine cache: {engine_cache.hits:,} hits / {engine_cache.misses:,} misses)\n")
+    print_table(
+        ['path', 'seconds', 'titles/s', 'speedup'],
+        [
+            [name, f"{results[name]:.3f}", f"{args.titles / results[name]:,.0f}",
+             f"{results['legacy'] / results[name]:.1f}x"]
+            for name in ('legacy', 'engine', 'grouped')
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
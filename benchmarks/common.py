@@ -0,0 +1,48 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks write synthetic data, so they refuse to run against DATABASE_URL and
+require a scratch database in BENCH_DATABASE_URL instead:
+
+    BENCH_DATABASE_URL=postgresql://localhost/jobintel_bench python benchmarks/bench_archive_jobs.py
+"""
+
+import os
+import sys
+import time
+import logging
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+def get_bench_db():
+    """Return a Database bound to the scratch BENCH_DATABASE_URL"""
+    from database import Database
+    
+    url = os.getenv('BENCH_DATABASE_URL')
+    if not url:
+        sys.exit("BENCH_DATABASE_URL is not set (point it at a scratch database, never production)")
+    if url == os.getenv('DATABASE_URL'):
+        sys.exit("BENCH_DATABASE_URL must not be the same as DATABASE_URL")
+    return Database(url)
+
+
+@contextmanager
+def timed(results: dict, key: str):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    line = '  '.join(str(h).ljust(w) for h, w in zip(headers, widths))
+    print(line)
+    print('-' * len(line))
+    for row in rows:
+        print('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,172 @@
+"""Load test: Waitress vs the ASGI serving mode under slow requests and idle clients.
+
+Starts the API against the scratch database once per SERVER_MODE (rate limits
+disabled, no scheduler) and, for --duration seconds, runs at the same time:
+
+  idle    - --idle TCP connections opened and left idle (keep-alive clients)
+  slow    - --slow clients looping on cache-missing /api/salary-insights
+            requests (a unique query each time, ~0.5-1s of database work)
+  probes  - --probes dashboard clients polling /api/stats with If-None-Match
+            and /api/advanced-analytics (cached), like the dashboard does
+
+and reports probe latency percentiles, completed slow requests and errors.
+With Waitress the probes queue behind the slow requests for one of
+WAITRESS_THREADS threads; in ASGI mode they are answered on the event loop.
+
+    BENCH_DATABASE_URL=... python benchmarks/load_test_serving.py --idle 2000 --slow 16
+"""
+
+import os
+import sys
+import time
+import uuid
+import socket
+import asyncio
+import argparse
+import subprocess
+import statistics
+
+import aiohttp
+
+from common import ROOT, get_bench_db, print_table
+
+SERVER = """
+import main
+main.limiter.enabled = False
+main.run_server({port}, host='127.0.0.1')
+"""
+
+API_KEY = 'load-test-key'
+
+
+def start_server(mode: str, port: int, database_url: str) -> subprocess.Popen:
+    env = dict(os.environ, SERVER_MODE=mode, DATABASE_URL=database_url, API_KEY=API_KEY,
+               ADMIN_API_KEY=API_KEY + '-admin', PYTHONPATH=ROOT)
+    process = subprocess.Popen([sys.executable, '-c', SERVER.format(port=port)], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+async def hold_idle(port: int, count: int, stop: asyncio.Event, opened: list):
+    connections = []
+    for _ in range(count):
+        try:
+            connections.append(await asyncio.open_connection('127.0.0.1', port))
+        except OSError:
+            break
+    opened.append(len(connections))
+    await stop.wait()
+    for _, writer in connections:
+        writer.close()
+
+
+async def slow_client(session, base: str, stop: asyncio.Event, results: dict):
+    departments = ['Engineering', 'Sales', 'Product', 'Design', 'Support']
+    while not stop.is_set():
+        params = {'department': departments[len(results['slow']) % 5], 'nonce': uuid.uuid4().hex}
+        try:
+            async with session.get(f'{base}/api/salary-insights', params=params,
+                                   headers={'X-API-Key': API_KEY}) as response:
+                await response.read()
+                results['slow' if response.status == 200 else 'errors'].append(response.status)
+        except Exception:
+            results['errors'].append('slow')
+
+
+async def probe_client(session, base: str, stop: asyncio.Event, results: dict, interval: float):
+    etag = None
+    while not stop.is_set():
+        for path in ('/api/stats', '/api/advanced-analytics'):
+            headers = {'If-None-Match': etag} if etag and path == '/api/stats' else {}
+            started = time.perf_counter()
+            try:
+                async with session.get(f'{base}{path}', headers=headers) as response:
+                    await response.read()
+                    if path == '/api/stats' and response.status == 200:
+                        etag = response.headers.get('ETag')
+                    if response.status in (200, 304):
+                        results['probes'].append(time.perf_counter() - started)
+                    else:
+                        results['errors'].append(response.status)
+            except Exception:
+                results['errors'].append('probe')
+        await asyncio.sleep(interval)
+
+
+async def run_load(port: int, args) -> dict:
+    base = f'http://127.0.0.1:{port}'
+    results = {'probes': [], 'slow': [], 'errors': []}
+    stop = asyncio.Event()
+    opened = []
+    timeout = aiohttp.ClientTimeout(total=120)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        # Warm the caches so probes measure steady-state polling
+        for path in ('/api/stats', '/api/advanced-analytics'):
+            async with session.get(f'{base}{path}') as response:
+                await response.read()
+
+        tasks = [asyncio.create_task(hold_idle(port, args.idle, stop, opened))]
+        tasks += [asyncio.create_task(slow_client(session, base, stop, results)) for _ in range(args.slow)]
+        await asyncio.sleep(1)  # let the slow requests occupy the server first
+        tasks += [asyncio.create_task(probe_client(session, base, stop, results, args.interval))
+                  for _ in range(args.probes)]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    results['idle_opened'] = opened[0] if opened else 0
+    return results
+
+
+def percentile(samples, q):
+    if not samples:
+        return float('nan')
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1] if len(samples) > 1 else samples[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='waitress,asgi')
+    parser.add_argument('--idle', type=int, default=1000)
+    parser.add_argument('--slow', type=int, default=16)
+    parser.add_argument('--probes', type=int, default=4)
+    parser.add_argument('--interval', type=float, default=0.2, help='seconds between probe rounds')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=18080)
+    args = parser.parse_args()
+
+    db = get_bench_db()
+    db.refresh_analytics_rollups()
+
+    rows = []
+    for offset, mode in enumerate(args.modes.split(',')):
+        port = args.port + offset
+        server = start_server(mode, port, db.database_url)
+        try:
+            results = asyncio.run(run_load(port, args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        probes = [s * 1000 for s in results['probes']]
+        rows.append([
+            mode, results['idle_opened'], len(probes),
+            f"{percentile(probes, 50):.0f}", f"{percentile(probes, 95):.0f}",
+            f"{max(probes):.0f}" if probes else '-',
+            len(results['slow']), len(results['errors']),
+        ])
+
+    print(f"\n{args.idle} idle connections, {args.slow} slow clients, {args.probes} probe clients, "
+          f"{args.duration:.0f}s per mode\n")
+    print_table(['mode', 'idle open', 'probes', 'p50 ms', 'p95 ms', 'max ms', 'slow done', 'errors'], rows)
+
+
+if __name__ == '__main__':
+    main()
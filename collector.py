@@ -17,7 +17,8 @@ from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
 from playwright.async_api import async_playwright, Playwright, Browser, TimeoutError as PlaywrightTimeout
 
-from database import get_db, Database
+from database import get_db, get_async_db, Database, AsyncDatabase
+from ingestion import IngestionQueue, IngestItem, SeedOutcomeBuffer
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -60,6 +61,11 @@ class CollectionStats:
 class JobIntelCollector:
     def __init__(self, db: Optional[Database] = None):
         self.db = db or get_db()
+        # DB calls are awaited through a bounded executor so they never stall the event loop
+        self._owns_adb = db is not None
+        self.adb = AsyncDatabase(self.db) if self._owns_adb else get_async_db()
+        self.ingest: Optional[IngestionQueue] = None
+        self.seed_outcomes: Optional[SeedOutcomeBuffer] = None
         self.client: Optional[aiohttp.ClientSession] = None
         self.stats = CollectionStats()
         self._semaphore = asyncio.Semaphore(50)
@@ -68,6 +74,55 @@ class JobIntelCollector:
         self.proxies = []
         self._ats_cache: Dict[str, str] = {}
     
+    @staticmethod
+    def _job_dicts(board: JobBoard) -> List[Dict]:
+        return [
+            {
+                'id': job.id,
+                'title': job.title,
+                'location': job.location,
+                'department': job.department,
+                'work_type': job.work_type,
+                'url': job.url,
+                'posted_date': job.posted_date,
+                'salary_min': job.salary_min,
+                'salary_max': job.salary_max,
+                'salary_currency': job.salary_currency,
+                'metadata': job.metadata
+            }
+            for job in board.jobs
+        ]
+    
+    async def _start_ingest(self):
+        self.ingest = IngestionQueue(self.adb)
+        await self.ingest.start()
+        self.seed_outcomes = SeedOutcomeBuffer(self.adb)
+        await self.seed_outcomes.start()
+    
+    async def _finish_ingest(self):
+        """Flush the write-behind queue and fold its counters into the run stats"""
+        if self.seed_outcomes:
+            await self.seed_outcomes.close()
+            self.seed_outcomes = None
+        if not self.ingest:
+            return
+        await self.ingest.close()
+        metrics = self.ingest.metrics
+        self.stats.total_new_jobs += metrics.new_jobs
+        self.stats.total_updated_jobs += metrics.updated_jobs
+        self.stats.total_closed_jobs += metrics.closed_jobs
+        self.ingest = None
+    
+    async def _record_seed(self, token: str, tested: int = 0, successful: int = 0):
+        """Count a seed outcome in the run's buffer, or write it straight through outside a run"""
+        if self.seed_outcomes:
+            self.seed_outcomes.record(token, tested, successful)
+        else:
+            try:
+                await self.adb.record_seed_outcomes({token: (tested, successful)})
+            except Exception:
+                pass  # already logged; a lost count only skews the seed's success rate
+    
     def _generate_token_variations(self, company_name: str) -> List[str]:
         """Generate multiple token variations for a company name"""
         tokens = set()
@@ -169,6 +224,8 @@ class JobIntelCollector:
         if self.client and not self.client.closed:
             await self.client.close()
         await self.close_playwright()
+        if self._owns_adb:
+            self.adb.close(wait=False)
     
     def _extract_salary(self, text: str) -> Dict:
         if not text:
@@ -465,11 +522,12 @@ class JobIntelCollector:
         
         return None
 
-    async def _test_company(self, company_name: str, board_hint: str = None) -> Optional[JobBoard]:
+    async def _test_company(self, company_name: str, board_hint: str = None, seed_token: str = None) -> Optional[JobBoard]:
         self.stats.total_tested += 1
+        seed_token = seed_token or self.db._name_to_token(company_name)
         
         try:
-            self.db.increment_seed_tested(company_name)
+            await self._record_seed(seed_token, tested=1)
         except:
             pass
         
@@ -488,7 +546,7 @@ class JobIntelCollector:
                 if ats_type == board_hint.lower():
                     board = await test_func(company_name)
                     if board:
-                        self.db.increment_seed_success(company_name)
+                        await self._record_seed(seed_token, successful=1)
                         return board
                     break
         
@@ -498,7 +556,7 @@ class JobIntelCollector:
             
             board = await test_func(company_name)
             if board:
-                self.db.increment_seed_success(company_name)
+                await self._record_seed(seed_token, successful=1)
                 return board
             
             await asyncio.sleep(0.1)
@@ -506,7 +564,7 @@ class JobIntelCollector:
         # Generic fallback
         board = await self._test_generic_careers(company_name)
         if board:
-            self.db.increment_seed_success(company_name)
+            await self._record_seed(seed_token, successful=1)
             return board
         
         return None
@@ -1116,10 +1174,10 @@ class JobIntelCollector:
         self.stats.total_jobs_collected += len(board.jobs)
         return board
     
-    async def _discover_and_scrape(self, company_name: str):
+    async def _discover_and_scrape(self, company_name: str, seed_token: str = None):
         async with self._semaphore:
             try:
-                board = await self._test_company(company_name)
+                board = await self._test_company(company_name, seed_token=seed_token)
                 if board:
                     self.stats.total_discovered += 1
                     board = await self.scrape_board(board)
@@ -1129,33 +1187,12 @@ class JobIntelCollector:
                         self.stats.companies_skipped_no_jobs += 1
                         return
                     
-                    company_id = self.db.add_company(
+                    await self.ingest.put(IngestItem(
                         company_name=board.company_name,
                         ats_type=board.ats_type,
                         board_url=board.board_url,
-                        job_count=len(board.jobs)
-                    )
-                    
-                    if company_id:
-                        new, updated, closed = self.db.archive_jobs(company_id, [
-                            {
-                                'id': job.id,
-                                'title': job.title,
-                                'location': job.location,
-                                'department': job.department,
-                                'work_type': job.work_type,
-                                'url': job.url,
-                                'posted_date': job.posted_date,
-                                'salary_min': job.salary_min,
-                                'salary_max': job.salary_max,
-                                'salary_currency': job.salary_currency,
-                                'metadata': job.metadata
-                            }
-                            for job in board.jobs
-                        ])
-                        self.stats.total_new_jobs += new
-                        self.stats.total_updated_jobs += updated
-                        self.stats.total_closed_jobs += closed
+                        jobs=self._job_dicts(board)
+                    ))
             except Exception as e:
                 logger.error(f"Error processing {company_name}: {e}")
 
@@ -1177,7 +1214,7 @@ class JobIntelCollector:
                                 companies.append(name)
                         unique = list(set(companies))[:1000]
                         seeds = [(name, self.db._name_to_token(name), 'external', 2) for name in unique]
-                        inserted = self.db.insert_seeds(seeds)
+                        inserted = await self.adb.insert_seeds(seeds)
                         logger.info(f"✅ Added {inserted} seeds from {url}")
             except Exception as e:
                 logger.debug(f"External seed failed: {e}")
@@ -1188,19 +1225,23 @@ class JobIntelCollector:
         
         await self.add_external_seeds()
         
-        seeds = self.db.get_seeds(limit=max_companies, prioritize_quality=True)
+        seeds = await self.adb.get_seeds(limit=max_companies, prioritize_quality=True)
         logger.info(f"📋 Testing {len(seeds)} seeds")
         
-        tasks = [self._discover_and_scrape(seed['company_name']) for seed in seeds]
+        tasks = [self._discover_and_scrape(seed['company_name'], seed.get('company_name_token')) for seed in seeds]
         
-        batch_size = 50
-        for i in range(0, len(tasks), batch_size):
-            batch = tasks[i:i + batch_size]
-            await asyncio.gather(*batch, return_exceptions=True)
-            await asyncio.sleep(2)
+        await self._start_ingest()
+        try:
+            batch_size = 50
+            for i in range(0, len(tasks), batch_size):
+                batch = tasks[i:i + batch_size]
+                await asyncio.gather(*batch, return_exceptions=True)
+                await asyncio.sleep(2)
+        finally:
+            await self._finish_ingest()
         
         try:
-            self.db.blacklist_poor_seeds(min_tests=3, max_success_rate=5.0)
+            await self.adb.blacklist_poor_seeds(min_tests=3, max_success_rate=5.0)
         except:
             pass
         
@@ -1221,20 +1262,24 @@ class JobIntelCollector:
 
     async def run_refresh(self, hours_since_update: int = 6, max_companies: int = 1000) -> CollectionStats:
         await self.initialize_playwright()
-        stats = CollectionStats()
+        stats = self.stats
         
-        companies = self.db.get_companies_for_refresh(hours_since_update, max_companies)
+        companies = await self.adb.get_companies_for_refresh(hours_since_update, max_companies)
         logger.info(f"🔄 Refreshing {len(companies)} companies")
         
         tasks = []
         for company in companies:
             tasks.append(self._refresh_company(company))
         
-        batch_size = 50
-        for i in range(0, len(tasks), batch_size):
-            batch = tasks[i:i + batch_size]
-            await asyncio.gather(*batch, return_exceptions=True)
-            await asyncio.sleep(2)
+        await self._start_ingest()
+        try:
+            batch_size = 50
+            for i in range(0, len(tasks), batch_size):
+                batch = tasks[i:i + batch_size]
+                await asyncio.gather(*batch, return_exceptions=True)
+                await asyncio.sleep(2)
+        finally:
+            await self._finish_ingest()
         
         stats.end_time = datetime.now()
         logger.info(f"✅ Refresh complete: {stats.total_jobs_collected} jobs")
@@ -1246,27 +1291,15 @@ class JobIntelCollector:
                 board = JobBoard(company['company_name'], company['ats_type'], company['board_url'])
                 board = await self.scrape_board(board)
                 
-                self.db.update_company_job_count(company['id'], len(board.jobs))
-                new, updated, closed = self.db.archive_jobs(company['id'], [
-                    {
-                        'id': job.id,
-                        'title': job.title,
-                        'location': job.location,
-                        'department': job.department,
-                        'work_type': job.work_type,
-                        'url': job.url,
-                        'posted_date': job.posted_date,
-                        'salary_min': job.salary_min,
-                        'salary_max': job.salary_max,
-                        'salary_currency': job.salary_currency,
-                        'metadata': job.metadata
-                    } for job in board.jobs
-                ])
+                await self.ingest.put(IngestItem(
+                    company_name=company['company_name'],
+                    ats_type=company['ats_type'],
+                    board_url=company['board_url'],
+                    jobs=self._job_dicts(board),
+                    company_id=company['id']
+                ))
                 
                 self.stats.total_jobs_collected += len(board.jobs)
-                self.stats.total_new_jobs += new
-                self.stats.total_updated_jobs += updated
-                self.stats.total_closed_jobs += closed
             except Exception as e:
                 logger.error(f"Error refreshing {company['company_name']}: {e}")
 
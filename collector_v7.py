@@ -9,22 +9,41 @@ Key Improvements:
 - Enhanced scrapers with multiple fallback strategies
 """
 
+import os
+import time
 import asyncio
+import functools
 import aiohttp
 import json
 import re
 import logging
 import sqlite3
-from dataclasses import dataclass, field
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Set, Any
 from urllib.parse import urlparse, quote
 from contextlib import asynccontextmanager
 import hashlib
 
+from rate_governor import HostGovernor, THROTTLE_STATUSES
+from probe_cache import ProbeCache, ProbeTrace, current_probe, HIT, MISS, ERROR, PROBE_CACHE_ENABLED
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Discovery scheduling (see JobIntelCollectorV7.discover_from_seeds)
+DISCOVERY_WORKERS = int(os.getenv('DISCOVERY_WORKERS', 10))  # Seeds tested at once
+# Seconds a seed's requests may spend in flight before it is abandoned; time queued behind the
+# per-host rate limits doesn't count, DISCOVERY_SEED_MAX_SECONDS bounds the wall-clock total
+DISCOVERY_SEED_DEADLINE = float(os.getenv('DISCOVERY_SEED_DEADLINE', 120))
+DISCOVERY_SEED_MAX_SECONDS = float(os.getenv('DISCOVERY_SEED_MAX_SECONDS', 900))
+DISCOVERY_PROGRESS_SECONDS = float(os.getenv('DISCOVERY_PROGRESS_SECONDS', 15))
+# Confidence policy: which found board settles a seed, cancelling its other probes
+DISCOVERY_EARLY_CANCEL = os.getenv('DISCOVERY_EARLY_CANCEL', 'true').lower() == 'true'
+DISCOVERY_CONFIDENT_MIN_JOBS = int(os.getenv('DISCOVERY_CONFIDENT_MIN_JOBS', 1))
+DISCOVERY_CONFIDENT_NAME_MATCH = os.getenv('DISCOVERY_CONFIDENT_NAME_MATCH', 'true').lower() == 'true'
+
 # =============================================================================
 # ATS CONFIGURATIONS - 15 Types (was 7)
 # =============================================================================
@@ -233,6 +252,7 @@ class CompanyJobBoard:
     locations: List[str] = field(default_factory=list)
     discovered_companies: Set[str] = field(default_factory=set)  # Self-discovery
     last_updated: datetime = field(default_factory=datetime.now)
+    cached: bool = False  # Rebuilt from the probe cache: no jobs, already stored by an earlier run
 
 @dataclass
 class DiscoveryStats:
@@ -243,7 +263,90 @@ class DiscoveryStats:
     ats_breakdown: Dict[str, int] = field(default_factory=dict)
     new_discoveries: int = 0  # Self-discovered companies
     errors: int = 0
+    seeds_timed_out: int = 0  # Abandoned at the per-seed deadline (also counted in errors, not recorded as tested)
     duration_seconds: float = 0
+    progress: Dict = field(default_factory=dict)  # Final DiscoveryProgress.to_dict()
+    early_exit: Dict = field(default_factory=dict)  # Seeds settled by a confident board before their probes finished
+    hosts: Dict[str, Dict] = field(default_factory=dict)  # HostGovernor.report(): per-host rate/throughput
+    cached_boards: int = 0  # Boards a fresh probe-cache entry says exist (not re-ingested)
+    probe_cache: Dict = field(default_factory=dict)  # ProbeCache.report(): lookups, HTTP requests avoided
+    probe_dedup: Dict = field(default_factory=dict)  # ProbePlanner.report(): probes shared across seeds
+
+@dataclass
+class SeedClock:
+    """Time during which at least one of a seed's requests was in flight"""
+    in_flight: int = 0
+    active_since: float = 0.0
+    active_total: float = 0.0
+    
+    def begin(self):
+        if self.in_flight == 0:
+            self.active_since = time.monotonic()
+        self.in_flight += 1
+    
+    def end(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self.active_total += time.monotonic() - self.active_since
+    
+    def consumed(self) -> float:
+        return self.active_total + (time.monotonic() - self.active_since if self.in_flight else 0.0)
+
+
+# The seed the current task is probing for, if any
+current_seed: ContextVar[Optional[SeedClock]] = ContextVar('current_seed', default=None)
+
+
+@dataclass
+class DiscoveryProgress:
+    """Live counters for a discovery run, logged every DISCOVERY_PROGRESS_SECONDS"""
+    total: int = 0
+    done: int = 0
+    in_flight: int = 0
+    hits: int = 0
+    timed_out: int = 0
+    errors: int = 0
+    started: float = field(default_factory=time.monotonic)
+    
+    def to_dict(self) -> Dict:
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        return {
+            'total': self.total,
+            'done': self.done,
+            'in_flight': self.in_flight,
+            'queued': self.total - self.done - self.in_flight,
+            'hits': self.hits,
+            'timed_out': self.timed_out,
+            'errors': self.errors,
+            'elapsed_seconds': round(elapsed, 1),
+            'seeds_per_minute': round(rate * 60, 1),
+            'eta_seconds': round((self.total - self.done) / rate) if rate > 0 else None,
+        }
+
+@dataclass
+class ConfidencePolicy:
+    """Decides when a found board settles a seed, so its outstanding probes can be cancelled.
+    
+    Confident means at least `min_jobs` jobs and, with `require_name_match`, the
+    board's company name or token equal to the seed once case and punctuation
+    are dropped ("Scale AI" -> scaleai). Other boards are kept but the seed's
+    remaining probes run to completion, as before.
+    """
+    enabled: bool = DISCOVERY_EARLY_CANCEL
+    min_jobs: int = DISCOVERY_CONFIDENT_MIN_JOBS
+    require_name_match: bool = DISCOVERY_CONFIDENT_NAME_MATCH
+    
+    @staticmethod
+    def _key(name: str) -> str:
+        return re.sub(r'[^a-z0-9]', '', name.lower())
+    
+    def is_confident(self, board: 'CompanyJobBoard', seed: str) -> bool:
+        if not self.enabled or board.job_count < self.min_jobs:
+            return False
+        if self.require_name_match:
+            return self._key(seed) in (self._key(board.company_name), self._key(board.token))
+        return True
 
 # =============================================================================
 # TOKEN GENERATION (Aggressive - Up to 50 variations)
@@ -369,17 +472,83 @@ class TokenGenerator:
 class ATSScraper:
     """Base ATS scraper with common functionality"""
     
-    def __init__(self, session: aiohttp.ClientSession):
+    ats_type = 'default'  # Picks the per-host rate budget (see rate_governor.configured_rate)
+    
+    def __init__(self, session: aiohttp.ClientSession, governor: Optional[HostGovernor] = None,
+                 probe_cache: Optional[ProbeCache] = None):
         self.session = session
+        self.governor = governor or HostGovernor()
+        self.probe_cache = probe_cache
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Accept': 'application/json, text/html',
         }
     
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """session.request paced by the shared per-host governor"""
+        kwargs.setdefault('headers', self.headers)
+        trace = current_probe.get()
+        # Only time past the host's rate limit counts against the seed's deadline
+        clock = current_seed.get() or SeedClock()
+        async with self.governor.slot(url, self.ats_type) as slot:
+            if trace is not None:
+                trace.requests += 1
+            clock.begin()
+            try:
+                async with self.session.request(method, url, **kwargs) as resp:
+                    slot.status = resp.status
+                    slot.retry_after = resp.headers.get('Retry-After')
+                    if trace is not None and resp.status in THROTTLE_STATUSES:
+                        trace.failed = True
+                    yield resp
+            except asyncio.TimeoutError:
+                # Includes aiohttp's ServerTimeoutError. DNS/connection errors aren't
+                # failures: a tenant subdomain that doesn't resolve is a miss.
+                if trace is not None:
+                    trace.failed = True
+                raise
+            finally:
+                clock.end()
+    
+    async def probe(self, token: str) -> Optional[CompanyJobBoard]:
+        """check_token() behind the probe cache: a fresh cached outcome costs no requests"""
+        if self.probe_cache is None:
+            return await self.check_token(token)
+        
+        entry = self.probe_cache.get(self.ats_type, token)
+        if entry is not None:
+            if entry.outcome != HIT:
+                return None
+            return CompanyJobBoard(
+                company_name=entry.company_name or token,
+                token=token,
+                ats_type=self.ats_type,
+                board_url=entry.board_url or '',
+                job_count=entry.job_count,
+                cached=True,
+            )
+        
+        trace = ProbeTrace()
+        reset = current_probe.set(trace)
+        try:
+            board = await self.check_token(token)
+        finally:
+            current_probe.reset(reset)
+        
+        # Tokens rejected without a request (blacklists, length checks) aren't worth storing
+        if trace.requests:
+            if board is not None and board.job_count > 0:
+                self.probe_cache.put(self.ats_type, token, HIT, trace.requests,
+                                     board.company_name, board.board_url, board.job_count)
+            else:
+                self.probe_cache.put(self.ats_type, token, ERROR if trace.failed else MISS, trace.requests)
+        return board
+    
     async def fetch(self, url: str, json_response: bool = True) -> Optional[Any]:
         """Fetch URL with error handling"""
         try:
-            async with self.session.get(url, headers=self.headers, timeout=10) as resp:
+            async with self.request('GET', url, timeout=10) as resp:
                 if resp.status == 200:
                     if json_response:
                         return await resp.json()
@@ -433,6 +602,8 @@ class ATSScraper:
 class GreenhouseScraper(ATSScraper):
     """Greenhouse ATS scraper using API"""
     
+    ats_type = 'greenhouse'
+    
     # Blacklist generic words and test companies
     BLACKLISTED_TOKENS = {
         'system', 'original', 'magic', 'ie', 'test', 'demo', 'sample', 'example',
@@ -509,6 +680,8 @@ class GreenhouseScraper(ATSScraper):
 class LeverScraper(ATSScraper):
     """Lever ATS scraper"""
     
+    ats_type = 'lever'
+    
     # Blacklist generic words
     BLACKLISTED_TOKENS = {
         'better', 'ecosystem', 'signal', 'choose', 'color', 'super', 'future',
@@ -579,6 +752,8 @@ class LeverScraper(ATSScraper):
 class AshbyScraper(ATSScraper):
     """Ashby ATS scraper using GraphQL API"""
     
+    ats_type = 'ashby'
+    
     async def check_token(self, token: str) -> Optional[CompanyJobBoard]:
         """Check if an Ashby token is valid"""
         # Try the posting API first
@@ -601,7 +776,7 @@ class AshbyScraper(ATSScraper):
                     }
                 }"""
             }
-            async with self.session.post(api_url, json=payload, headers=self.headers, timeout=10) as resp:
+            async with self.request('POST', api_url, json=payload, timeout=10) as resp:
                 if resp.status == 200:
                     data = await resp.json()
                     job_board = data.get('data', {}).get('jobBoard', {})
@@ -656,6 +831,8 @@ class AshbyScraper(ATSScraper):
 class WorkdayScraper(ATSScraper):
     """Workday ATS scraper with multiple subdomain patterns"""
     
+    ats_type = 'workday'
+    
     WORKDAY_PATTERNS = ['wd5', 'wd1', 'wd3', 'wd12']
     
     # Blacklist ambiguous/generic short tokens
@@ -684,7 +861,7 @@ class WorkdayScraper(ATSScraper):
                     # Workday uses a specific API endpoint
                     if '/jobs' in url:
                         payload = {"appliedFacets": {}, "limit": 20, "offset": 0}
-                        async with self.session.post(url, json=payload, headers={
+                        async with self.request('POST', url, json=payload, headers={
                             **self.headers,
                             'Content-Type': 'application/json',
                         }, timeout=15) as resp:
@@ -694,7 +871,7 @@ class WorkdayScraper(ATSScraper):
                                     return self._parse_workday_response(token, pattern, data)
                     else:
                         # Check if the page loads
-                        async with self.session.get(url, headers=self.headers, timeout=15) as resp:
+                        async with self.request('GET', url, timeout=15) as resp:
                             if resp.status == 200:
                                 text = await resp.text()
                                 if 'jobResults' in text or 'job-results' in text.lower():
@@ -752,6 +929,8 @@ class WorkdayScraper(ATSScraper):
 class ICIMSScraper(ATSScraper):
     """iCIMS ATS scraper"""
     
+    ats_type = 'icims'
+    
     async def check_token(self, token: str) -> Optional[CompanyJobBoard]:
         """Check iCIMS careers page"""
         # Skip very short tokens (likely false positives)
@@ -789,6 +968,8 @@ class ICIMSScraper(ATSScraper):
 class WorkableScraper(ATSScraper):
     """Workable ATS scraper"""
     
+    ats_type = 'workable'
+    
     async def check_token(self, token: str) -> Optional[CompanyJobBoard]:
         """Check Workable API"""
         url = f"https://apply.workable.com/api/v3/accounts/{token}/jobs"
@@ -838,6 +1019,8 @@ class WorkableScraper(ATSScraper):
 class RecruiteeScraper(ATSScraper):
     """Recruitee ATS scraper"""
     
+    ats_type = 'recruitee'
+    
     # Blacklist generic words that match random companies
     BLACKLISTED_TOKENS = {
         'library', 'manual', 'blue', 'flow', 'tech', 'pay', 'adam', 'max', 
@@ -917,6 +1100,8 @@ class RecruiteeScraper(ATSScraper):
 class SmartRecruitersScraper(ATSScraper):
     """SmartRecruiters ATS scraper"""
     
+    ats_type = 'smartrecruiters'
+    
     # Blacklist generic words
     BLACKLISTED_TOKENS = {
         'entropik', '2019', 'test', 'demo', 'jobs', 'careers', 'team', 'work',
@@ -992,6 +1177,8 @@ class SmartRecruitersScraper(ATSScraper):
 class BreezyScraper(ATSScraper):
     """Breezy HR ATS scraper"""
     
+    ats_type = 'breezy'
+    
     # Blacklist generic words
     BLACKLISTED_TOKENS = {
         'af', 'test', 'demo', 'jobs', 'careers', 'team', 'work', 'hire',
@@ -1052,6 +1239,114 @@ class BreezyScraper(ATSScraper):
         )
 
 
+# =============================================================================
+# PROBE PLANNING (Cross-seed token dedup)
+# =============================================================================
+
+class ProbePlanner:
+    """Runs each (ats_type, token) probe once per discovery run.
+    
+    Seeds often generate the same tokens ("Scale AI" and "Scale" both yield
+    `scale`). Probes are memoized lazily, as seeds ask for them: the first
+    request starts a shared task, and every seed that asks while it runs
+    awaits the same task, so the result fans back to all of them. Per-seed
+    priority ordering and early exit are unchanged: a seed only asks for the
+    probes it would have made on its own. A probe is cancelled once no seed is
+    waiting for it any more (every waiting seed finished or hit its deadline).
+    
+    A finished probe's task is dropped and its outcome kept. A board stays
+    whole until a seed has stored it (see stored()); the seeds that asked
+    first may time out or be cancelled before that, and then a later seed
+    must be able to store the jobs. Once stored, only a slim copy (the board
+    without its jobs) is kept for later seeds, which are duplicates of the
+    first, so memory doesn't grow with every board's job list over a run.
+    """
+    
+    def __init__(self):
+        self._probes: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._results: Dict[Tuple[str, str], Optional[CompanyJobBoard]] = {}
+        self._unstored: Dict[int, Tuple[str, str]] = {}  # id(whole board in _results) -> key
+        self._waiters: Dict[Tuple[str, str], int] = {}
+        self.issued = 0
+        self.cancelled = 0  # probes abandoned by every seed waiting on them
+        self.planned = 0  # (seed, ats_type, token) probes the seeds' token lists call for
+        self.planned_unique = 0  # distinct (ats_type, token) among them, summed over batches
+        self.requested = 0  # probes seeds actually asked for
+        self.shared = 0  # ...that another seed's probe answered
+    
+    def plan(self, seed_tokens: Dict[str, List[str]], ats_types: List[str]) -> Tuple[int, int]:
+        """Count the seeds' probes and the distinct ones among them: (planned, unique).
+        
+        Only counts, for the run's report; nothing is scheduled until probe().
+        """
+        planned = sum(len(tokens) for tokens in seed_tokens.values()) * len(ats_types)
+        unique = len({token for tokens in seed_tokens.values() for token in tokens}) * len(ats_types)
+        self.planned += planned
+        self.planned_unique += unique
+        return planned, unique
+    
+    async def probe(self, scraper: ATSScraper, token: str) -> Optional[CompanyJobBoard]:
+        self.requested += 1
+        key = (scraper.ats_type, token)
+        if key in self._results:
+            self.shared += 1
+            return self._results[key]
+        task = self._probes.get(key)
+        if task is None:
+            task = self._probes[key] = asyncio.create_task(scraper.probe(token))
+            task.add_done_callback(functools.partial(self._finished, key))
+            self.issued += 1
+        else:
+            self.shared += 1
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # One seed giving up must not cancel the probe for the others
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    # Nobody wants it any more; a later seed asking for it starts afresh
+                    task.cancel()
+                    del self._probes[key]
+                    self.cancelled += 1
+    
+    def _finished(self, key: Tuple[str, str], task: asyncio.Task):
+        # Retrieves the outcome even if every waiter has gone away
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self._probes.get(key) is task:
+            del self._probes[key]
+        board = task.result()
+        self._results[key] = board
+        if board is not None:
+            self._unstored[id(board)] = key
+    
+    def stored(self, board: CompanyJobBoard):
+        """A seed has stored this board (or found it already stored): keep only a slim copy"""
+        key = self._unstored.pop(id(board), None)
+        if key is not None:
+            self._results[key] = replace(
+                board, jobs=[], departments=[], locations=[], discovered_companies=set()
+            )
+    
+    @staticmethod
+    def _percent(part: int, whole: int) -> float:
+        return round(part / whole * 100, 1) if whole else 0.0
+    
+    def report(self) -> Dict:
+        return {
+            'planned': self.planned,
+            'planned_unique': self.planned_unique,
+            'planned_saved_percent': self._percent(self.planned - self.planned_unique, self.planned),
+            'requested': self.requested,
+            'issued': self.issued,
+            'cancelled': self.cancelled,
+            'saved_percent': self._percent(self.shared, self.requested),
+        }
+
+
 # =============================================================================
 # MAIN COLLECTOR (with Parallel Testing)
 # =============================================================================
@@ -1062,27 +1357,50 @@ class JobIntelCollectorV7:
     def __init__(self, db_path: str = 'job_intel.db'):
         self.db_path = db_path
         self.scrapers = {}
+        self.governor: Optional[HostGovernor] = None
+        self.probe_cache: Optional[ProbeCache] = None  # Set by run_discovery (CACHE_ATS_RESULTS)
+        self.planner: Optional[ProbePlanner] = None  # Per discover_from_seeds run
+        self.progress = DiscoveryProgress()  # Live counters of the current discover_from_seeds run
+        self.confidence = ConfidencePolicy()
+        self.early_exit = {'seeds': 0, 'probes_cancelled': 0, 'saved_seconds': 0.0, 'max_saved_seconds': 0.0}
+        self._probe_finish: Dict[str, float] = {}  # ats_type -> EWMA of seconds from group start to probe answer
         self.token_generator = TokenGenerator()
         self.discovered_companies: Set[str] = set()
         self.results: List[CompanyJobBoard] = []  # Store discovered companies
+        self.ingest = None  # Optional ingestion.IngestionQueue for write-behind saving to PostgreSQL
+        self.seed_outcomes = None  # Optional ingestion.SeedOutcomeBuffer for seed accounting
+        self.seed_tokens: Dict[str, str] = {}  # seed name -> seed_companies.company_name_token
     
     async def init_scrapers(self, session: aiohttp.ClientSession):
-        """Initialize all ATS scrapers"""
+        """Initialize all ATS scrapers (sharing one per-host rate governor)"""
+        self.governor = HostGovernor()
         self.scrapers = {
-            'greenhouse': GreenhouseScraper(session),
-            'lever': LeverScraper(session),
-            'ashby': AshbyScraper(session),
-            'workday': WorkdayScraper(session),
-            'icims': ICIMSScraper(session),
-            'workable': WorkableScraper(session),
-            'recruitee': RecruiteeScraper(session),
-            'smartrecruiters': SmartRecruitersScraper(session),
-            'breezy': BreezyScraper(session),
+            'greenhouse': GreenhouseScraper(session, self.governor, self.probe_cache),
+            'lever': LeverScraper(session, self.governor, self.probe_cache),
+            'ashby': AshbyScraper(session, self.governor, self.probe_cache),
+            'workday': WorkdayScraper(session, self.governor, self.probe_cache),
+            'icims': ICIMSScraper(session, self.governor, self.probe_cache),
+            'workable': WorkableScraper(session, self.governor, self.probe_cache),
+            'recruitee': RecruiteeScraper(session, self.governor, self.probe_cache),
+            'smartrecruiters': SmartRecruitersScraper(session, self.governor, self.probe_cache),
+            'breezy': BreezyScraper(session, self.governor, self.probe_cache),
         }
     
+    def _probe_tokens(self, company_name: str) -> List[str]:
+        """Tokens actually probed for a seed (the most likely variations first)"""
+        return self.token_generator.generate_tokens(company_name)[:10]
+    
     async def test_company_parallel(self, company_name: str) -> List[CompanyJobBoard]:
-        """Test all ATS types in parallel for a company"""
-        tokens = self.token_generator.generate_tokens(company_name)
+        """Test all ATS types in parallel for a company.
+        
+        Priority groups run in order. Within a group, probes are consumed as
+        they finish; a board the confidence policy trusts cancels the group's
+        outstanding probes at once and skips the lower-priority groups. Any
+        board from priority 1 also ends the search; otherwise boards that
+        aren't trusted (0 jobs, another company's name) are kept and groups 2
+        and 3 still run.
+        """
+        tokens = self._probe_tokens(company_name)
         results = []
         
         # Group by priority
@@ -1094,106 +1412,280 @@ class JobIntelCollectorV7:
         
         # Test priority 1 first (most likely to hit for startups)
         for priority in [1, 2, 3]:
-            ats_types = priority_groups[priority]
-            if not ats_types:
-                continue
-            
             # Test all tokens against all ATS types in this priority group
-            tasks = []
-            for token in tokens[:10]:  # Limit tokens per priority group
-                for ats_type in ats_types:
+            pending = {}
+            for token in tokens:
+                for ats_type in priority_groups[priority]:
                     scraper = self.scrapers.get(ats_type)
                     if scraper:
-                        tasks.append(self._test_single(scraper, token, ats_type))
+                        pending[asyncio.create_task(self._test_single(scraper, token, ats_type))] = ats_type
+            if not pending:
+                continue
             
-            if tasks:
-                group_results = await asyncio.gather(*tasks, return_exceptions=True)
-                for result in group_results:
-                    if isinstance(result, CompanyJobBoard):
-                        results.append(result)
-                        # Early exit if we found results in priority 1
-                        if priority == 1 and results:
-                            return results
+            started = time.monotonic()
+            group_confident = False
+            group_found = False
+            try:
+                while pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    elapsed = time.monotonic() - started
+                    confident = False
+                    for task in done:
+                        self._record_probe_finish(pending.pop(task), elapsed)
+                        result = task.result()
+                        if isinstance(result, CompanyJobBoard):
+                            results.append(result)
+                            group_found = True
+                            confident = confident or self.confidence.is_confident(result, company_name)
+                    group_confident = group_confident or confident
+                    if confident and pending:
+                        self._record_early_exit(company_name, pending, elapsed)
+                        break
+            finally:
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+            
+            # The seed has its answer: skip the lower-priority groups
+            if group_confident or (priority == 1 and group_found):
+                return results
         
         return results
     
+    def _record_probe_finish(self, ats_type: str, elapsed: float):
+        previous = self._probe_finish.get(ats_type)
+        self._probe_finish[ats_type] = elapsed if previous is None else previous * 0.8 + elapsed * 0.2
+    
+    def _record_early_exit(self, seed: str, cancelled: Dict[asyncio.Task, str], elapsed: float):
+        """Count a confident early exit and estimate the wall-clock it saved.
+        
+        Without it the group would have run until its slowest probe answered;
+        each cancelled probe is assumed to answer at its ATS's typical offset
+        from the group start.
+        """
+        expected = max(self._probe_finish.get(ats_type, elapsed) for ats_type in cancelled.values())
+        saved = max(0.0, expected - elapsed)
+        self.early_exit['seeds'] += 1
+        self.early_exit['probes_cancelled'] += len(cancelled)
+        self.early_exit['saved_seconds'] += saved
+        self.early_exit['max_saved_seconds'] = max(self.early_exit['max_saved_seconds'], saved)
+        logger.debug(f"{seed}: confident board after {elapsed:.1f}s, cancelled {len(cancelled)} probes (~{saved:.1f}s saved)")
+    
     async def _test_single(self, scraper: ATSScraper, token: str, ats_type: str) -> Optional[CompanyJobBoard]:
         """Test a single token against a single ATS"""
         try:
-            return await scraper.check_token(token)
+            if self.planner is not None:
+                return await self.planner.probe(scraper, token)
+            return await scraper.probe(token)
         except Exception as e:
             logger.debug(f"Error testing {ats_type}/{token}: {e}")
             return None
     
-    async def discover_from_seeds(self, seeds: List[str], batch_size: int = 10) -> DiscoveryStats:
-        """Discover companies from seed list with parallel testing"""
+    async def discover_from_seeds(self, seeds: List[str], workers: int = None, batch_size: int = None,
+                                  seed_deadline: float = None) -> DiscoveryStats:
+        """Discover companies from seed list with parallel testing.
+        
+        `workers` seeds are tested at once (batch_size is the old name for it);
+        each worker pulls the next seed as soon as its current one finishes, so
+        one slow seed never holds up the others. A seed still unresolved after
+        `seed_deadline` seconds is abandoned and its outstanding probes cancelled.
+        """
+        workers = workers or batch_size or DISCOVERY_WORKERS
+        seed_deadline = seed_deadline or DISCOVERY_SEED_DEADLINE
         stats = DiscoveryStats()
         start_time = datetime.now()
         
         # Track discovered companies to avoid duplicates within this run
         seen_companies: Set[str] = set()
         
+        seed_tokens = {seed: self._probe_tokens(seed) for seed in seeds}
+        if self.probe_cache is not None:
+            await self.probe_cache.preload(token for tokens in seed_tokens.values() for token in tokens)
+        
+        self.planner = ProbePlanner()
+        self.progress = DiscoveryProgress(total=len(seeds))
+        self.early_exit = {'seeds': 0, 'probes_cancelled': 0, 'saved_seconds': 0.0, 'max_saved_seconds': 0.0}
         connector = aiohttp.TCPConnector(limit=50, limit_per_host=10)
         async with aiohttp.ClientSession(connector=connector) as session:
             await self.init_scrapers(session)
+            planned, unique = self.planner.plan(seed_tokens, [ats for ats in ATS_CONFIGS if ats in self.scrapers])
+            logger.info(f"Testing {len(seeds)} seeds with {workers} workers "
+                        f"({unique}/{planned} distinct probes, {seed_deadline:.0f}s per seed)")
             
-            # Process in batches
-            for i in range(0, len(seeds), batch_size):
-                batch = seeds[i:i + batch_size]
-                logger.info(f"Processing batch {i//batch_size + 1}/{(len(seeds) + batch_size - 1)//batch_size}: {batch}")
-                
-                # Run all seeds in batch in parallel
-                tasks = [self.test_company_parallel(seed) for seed in batch]
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for seed, result in zip(batch, batch_results):
-                    stats.seeds_tested += 1
-                    
-                    if isinstance(result, Exception):
-                        stats.errors += 1
-                        logger.warning(f"Error processing {seed}: {result}")
-                        continue
-                    
-                    if result:
-                        for company in result:
-                            # Skip 0-job false positives
-                            if company.job_count == 0:
-                                continue
-                            
-                            # Skip duplicates (same company found via different token variants)
-                            # Use both token and company_name to catch more duplicates
-                            company_key = f"{company.token.lower()}:{company.ats_type}"
-                            company_name_key = f"{company.company_name.lower()}:{company.ats_type}"
-                            if company_key in seen_companies or company_name_key in seen_companies:
-                                continue
-                            seen_companies.add(company_key)
-                            seen_companies.add(company_name_key)
-                                
-                            stats.companies_found += 1
-                            stats.jobs_found += company.job_count
-                            
-                            ats = company.ats_type.split('_')[0]  # Normalize workday_wd5 -> workday
-                            stats.ats_breakdown[ats] = stats.ats_breakdown.get(ats, 0) + 1
-                            
-                            # Collect self-discovered companies
-                            self.discovered_companies.update(company.discovered_companies)
-                            
-                            # Store result for later saving to PostgreSQL
-                            self.results.append(company)
-                            
-                            logger.info(f"Found: {company.company_name} ({company.ats_type}) - {company.job_count} jobs")
-                            
-                            # Save to database
-                            await self._save_company(company)
-                
-                # Small delay between batches
-                await asyncio.sleep(0.5)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+            
+            async def produce():
+                for seed in seeds:
+                    await queue.put(seed)
+                for _ in range(workers):
+                    await queue.put(None)
+            
+            tasks = [asyncio.create_task(produce(), name='discovery-producer')]
+            tasks += [
+                asyncio.create_task(self._seed_worker(queue, stats, seen_companies, seed_deadline),
+                                    name=f'discovery-worker-{i}')
+                for i in range(workers)
+            ]
+            reporter = asyncio.create_task(self._report_progress(), name='discovery-progress')
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks + [reporter]:
+                    task.cancel()
+                await asyncio.gather(*tasks, reporter, return_exceptions=True)
         
         stats.new_discoveries = len(self.discovered_companies)
         stats.duration_seconds = (datetime.now() - start_time).total_seconds()
+        stats.progress = self.progress.to_dict()
+        stats.hosts = self.governor.report()
+        stats.probe_dedup = self.planner.report()
+        stats.early_exit = dict(
+            self.early_exit,
+            saved_seconds=round(self.early_exit['saved_seconds'], 1),
+            max_saved_seconds=round(self.early_exit['max_saved_seconds'], 1),
+            avg_saved_per_seed_seconds=round(self.early_exit['saved_seconds'] / stats.seeds_tested, 2) if stats.seeds_tested else 0.0,
+        )
+        logger.info(f"⚡ Early exit: {stats.early_exit['seeds']} seeds settled by a confident board, "
+                    f"{stats.early_exit['probes_cancelled']} probes cancelled, ~{stats.early_exit['saved_seconds']}s "
+                    f"saved ({stats.early_exit['avg_saved_per_seed_seconds']}s per seed)")
+        logger.info(f"🔁 Probe dedup: {stats.probe_dedup['issued']} probes issued for {stats.probe_dedup['requested']} "
+                    f"requested ({stats.probe_dedup['saved_percent']}% saved across seeds, "
+                    f"{stats.probe_dedup['cancelled']} cancelled)")
+        if self.probe_cache is not None:
+            stats.probe_cache = self.probe_cache.report()
+            logger.info(f"🗂️ Probe cache: {stats.probe_cache['hits']}/{stats.probe_cache['lookups']} probes answered "
+                        f"from cache, {stats.probe_cache['requests_avoided']} HTTP requests avoided")
+        for host, report in stats.hosts.items():
+            logger.info(f"🌐 {host}: {report['requests']} requests, {report['throughput_per_second']}/s "
+                        f"(rate {report['configured_rate']} -> {report['current_rate']}/s, "
+                        f"{report['throttled']} throttled, {report['server_errors'] + report['timeouts']} failed)")
         
         return stats
     
+    async def _seed_worker(self, queue: asyncio.Queue, stats: DiscoveryStats, seen_companies: Set[str],
+                           seed_deadline: float):
+        """Test seeds from the queue until the producer's end marker"""
+        while True:
+            seed = await queue.get()
+            if seed is None:
+                return
+            self.progress.in_flight += 1
+            try:
+                result = await self._test_with_deadline(seed, seed_deadline)
+            except asyncio.TimeoutError:
+                stats.seeds_timed_out += 1
+                self.progress.timed_out += 1
+                result = TimeoutError(f"no answer within {seed_deadline:.0f}s")
+            except Exception as e:
+                result = e
+            finally:
+                self.progress.in_flight -= 1
+            
+            found = await self._handle_seed_result(seed, result, stats, seen_companies)
+            self.progress.done += 1
+            self.progress.hits += int(found)
+            self.progress.errors += int(isinstance(result, Exception))
+    
+    async def _test_with_deadline(self, seed: str, seed_deadline: float) -> List[CompanyJobBoard]:
+        """test_company_parallel, cancelled once its requests have been in flight `seed_deadline` seconds.
+        
+        Probes first wait on the per-host rate limits shared by all workers,
+        which says nothing about the seed, so only time with at least one of
+        its requests actually sent counts (a shared probe counts for the seed
+        that started it). DISCOVERY_SEED_MAX_SECONDS caps the wall-clock time.
+        """
+        clock = SeedClock()
+        reset = current_seed.set(clock)
+        try:
+            task = asyncio.create_task(self.test_company_parallel(seed))
+        finally:
+            current_seed.reset(reset)
+        wall_deadline = time.monotonic() + max(DISCOVERY_SEED_MAX_SECONDS, seed_deadline)
+        try:
+            while not task.done():
+                remaining = min(seed_deadline - clock.consumed(), wall_deadline - time.monotonic())
+                if remaining <= 0:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    raise asyncio.TimeoutError()
+                await asyncio.wait({task}, timeout=remaining)
+            return task.result()
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+    
+    async def _handle_seed_result(self, seed: str, result, stats: DiscoveryStats, seen_companies: Set[str]) -> bool:
+        """Account for one tested seed and hand its new boards on; True if it found a board with jobs"""
+        stats.seeds_tested += 1
+        
+        if isinstance(result, Exception):
+            # Not recorded as tested: a timeout or error (often our own pacing) says nothing about the
+            # seed, and counting it would push good seeds toward blacklist_poor_seeds
+            stats.errors += 1
+            logger.warning(f"Error processing {seed}: {result}")
+            return False
+        
+        found = any(company.job_count > 0 for company in result or [])
+        self._record_seed(seed, found=found)
+        
+        for company in result or []:
+            # Skip 0-job false positives
+            if company.job_count == 0:
+                continue
+            
+            # Found by an earlier run: already stored and kept fresh by the refresh cycle
+            if company.cached:
+                stats.cached_boards += 1
+                continue
+            
+            # Skip duplicates (same company found via different token variants)
+            # Use both token and company_name to catch more duplicates
+            company_key = f"{company.token.lower()}:{company.ats_type}"
+            company_name_key = f"{company.company_name.lower()}:{company.ats_type}"
+            if company_key in seen_companies or company_name_key in seen_companies:
+                if self.planner is not None:
+                    self.planner.stored(company)
+                continue
+            seen_companies.add(company_key)
+            seen_companies.add(company_name_key)
+            
+            stats.companies_found += 1
+            stats.jobs_found += company.job_count
+            
+            ats = company.ats_type.split('_')[0]  # Normalize workday_wd5 -> workday
+            stats.ats_breakdown[ats] = stats.ats_breakdown.get(ats, 0) + 1
+            
+            # Collect self-discovered companies
+            self.discovered_companies.update(company.discovered_companies)
+            
+            # Store result, and hand it to the write-behind queue when saving to PostgreSQL
+            self.results.append(company)
+            if self.ingest is not None:
+                await self.ingest.put(board_to_ingest_item(company))
+            
+            logger.info(f"Found: {company.company_name} ({company.ats_type}) - {company.job_count} jobs")
+            
+            # Save to database
+            await self._save_company(company)
+            if self.planner is not None:
+                self.planner.stored(company)
+        
+        return found
+    
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(DISCOVERY_PROGRESS_SECONDS)
+            progress = self.progress.to_dict()
+            eta = '?' if progress['eta_seconds'] is None else f"{progress['eta_seconds']}s"
+            logger.info(f"📈 Discovery: {progress['done']}/{progress['total']} seeds, {progress['in_flight']} in flight, "
+                        f"{progress['hits']} hits, {progress['timed_out']} timed out, "
+                        f"{progress['seeds_per_minute']} seeds/min, ETA {eta}")
+    
+    def _record_seed(self, seed: str, found: bool):
+        if self.seed_outcomes is not None and seed in self.seed_tokens:
+            self.seed_outcomes.record(self.seed_tokens[seed], tested=1, successful=int(found))
+    
     async def _save_company(self, company: CompanyJobBoard):
         """Save company to database (SQLite fallback only)"""
         # Skip if no db_path (we're saving to PostgreSQL instead)
@@ -1272,6 +1764,37 @@ class JobIntelCollectorV7:
         conn.close()
 
 
+def board_to_ingest_item(board: CompanyJobBoard):
+    """Convert a discovered board into an ingestion.IngestItem.
+    
+    Discovery boards can be truncated (Workday only returns the first page), so
+    they are marked partial: jobs missing from the board are never closed here.
+    """
+    from ingestion import IngestItem
+    
+    return IngestItem(
+        company_name=board.company_name,
+        ats_type=board.ats_type,
+        board_url=board.board_url,
+        job_count=board.job_count,
+        partial=True,
+        discovery_token=board.token,
+        jobs=[
+            {
+                'id': job.id or job.title[:50],
+                'title': job.title,
+                'location': job.location or '',
+                'department': job.department or '',
+                'work_type': 'Remote' if job.remote else None,
+                'url': job.url or '',
+                'posted_date': job.posted_at,
+                'metadata': {'description': job.description} if job.description else {},
+            }
+            for job in board.jobs
+        ],
+    )
+
+
 # =============================================================================
 # CLI INTERFACE
 # =============================================================================
@@ -1283,7 +1806,7 @@ async def main():
     parser = argparse.ArgumentParser(description='Job Intelligence Collector V7')
     parser.add_argument('--seeds', nargs='+', help='Company names to test')
     parser.add_argument('--file', help='File with seed companies (one per line)')
-    parser.add_argument('--batch-size', type=int, default=10, help='Batch size for parallel testing')
+    parser.add_argument('--workers', type=int, default=DISCOVERY_WORKERS, help='Seeds tested at once')
     parser.add_argument('--db', default='job_intel.db', help='Database path')
     
     args = parser.parse_args()
@@ -1306,7 +1829,7 @@ async def main():
         ]
     
     logger.info(f"Starting discovery with {len(seeds)} seeds...")
-    stats = await collector.discover_from_seeds(seeds, batch_size=args.batch_size)
+    stats = await collector.discover_from_seeds(seeds, workers=args.workers)
     
     print("\n" + "="*60)
     print("DISCOVERY RESULTS")
@@ -1314,7 +1837,7 @@ async def main():
     print(f"Seeds Tested: {stats.seeds_tested}")
     print(f"Companies Found: {stats.companies_found}")
     print(f"Jobs Found: {stats.jobs_found}")
-    print(f"Errors: {stats.errors}")
+    print(f"Errors: {stats.errors} ({stats.seeds_timed_out} past the per-seed deadline)")
     print(f"Duration: {stats.duration_seconds:.1f} seconds")
     print(f"\nATS Breakdown:")
     for ats, count in sorted(stats.ats_breakdown.items(), key=lambda x: -x[1]):
@@ -1623,21 +2146,13 @@ async def run_discovery(db=None, max_seeds: int = 500) -> Dict:
     
     # Load seeds from database
     seeds = []
+    seed_tokens = {}
     if db is not None:
         try:
-            with db.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT company_name FROM seed_companies 
-                        WHERE is_blacklisted = FALSE 
-                        AND (times_tested < 3 OR times_tested IS NULL)
-                        ORDER BY 
-                            tier ASC,
-                            times_tested ASC NULLS FIRST,
-                            RANDOM()
-                        LIMIT %s
-                    """, (max_seeds,))
-                    seeds = [row[0] for row in cur.fetchall()]
+            # Indexed per-bucket sampling, limited to seeds tested fewer than 3 times
+            rows = db.get_seeds(limit=max_seeds, prioritize_quality=True, max_times_tested=2)
+            seeds = [row['company_name'] for row in rows]
+            seed_tokens = {row['company_name']: row['company_name_token'] for row in rows if row['company_name_token']}
         except Exception as e:
             logger.error(f"Error loading seeds: {e}")
     
@@ -1653,76 +2168,38 @@ async def run_discovery(db=None, max_seeds: int = 500) -> Dict:
     
     logger.info(f"Loaded {len(seeds)} seeds to test")
     
-    # Create collector and run
+    # Create collector and run; boards are written to PostgreSQL by the
+    # ingestion queue's writers while discovery is still scraping
     collector = JobIntelCollectorV7(db_path=None)  # Won't use sqlite
-    stats = await collector.discover_from_seeds(seeds, batch_size=10)
-    
-    # Save results to PostgreSQL
     saved_companies = 0
     saved_jobs = 0
+    ingestion_metrics = None
     
-    if db is not None and collector.results:
-        for result in collector.results:
-            # Skip companies with no jobs (false positives)
-            if result.job_count == 0:
-                continue
-                
-            try:
-                with db.get_connection() as conn:
-                    with conn.cursor() as cur:
-                        # Upsert company
-                        cur.execute("""
-                            INSERT INTO companies (company_name, company_name_token, ats_type, board_url, job_count, last_scraped)
-                            VALUES (%s, %s, %s, %s, %s, NOW())
-                            ON CONFLICT (company_name) DO UPDATE SET
-                                job_count = EXCLUDED.job_count,
-                                last_scraped = NOW()
-                            RETURNING id
-                        """, (
-                            result.company_name,
-                            result.token,
-                            result.ats_type,
-                            result.board_url,
-                            result.job_count,
-                        ))
-                        company_row = cur.fetchone()
-                        if company_row:
-                            saved_companies += 1
-                            company_id = company_row[0]
-                            
-                            # Save jobs (job is a JobPosting dataclass, use attributes)
-                            for job in result.jobs[:100]:  # Limit jobs per company
-                                try:
-                                    cur.execute("""
-                                        INSERT INTO job_archive (company_id, job_id, title, department, location, job_url, status, first_seen, last_seen)
-                                        VALUES (%s, %s, %s, %s, %s, %s, 'active', NOW(), NOW())
-                                        ON CONFLICT (company_id, job_id) DO UPDATE SET
-                                            last_seen = NOW(),
-                                            status = 'active'
-                                    """, (
-                                        company_id,
-                                        job.id or job.title[:50],
-                                        job.title,
-                                        job.department or '',
-                                        job.location or '',
-                                        job.url or '',
-                                    ))
-                                    saved_jobs += 1
-                                except Exception as je:
-                                    logger.debug(f"Error saving job: {je}")
-                        
-                        # Update seed as tested
-                        cur.execute("""
-                            UPDATE seed_companies 
-                            SET times_tested = COALESCE(times_tested, 0) + 1,
-                                times_successful = COALESCE(times_successful, 0) + 1,
-                                last_tested_at = NOW()
-                            WHERE LOWER(company_name) = LOWER(%s)
-                        """, (result.company_name,))
-                        
-                        conn.commit()
-            except Exception as e:
-                logger.debug(f"Error saving result for {result.company_name}: {e}")
+    if db is not None:
+        from database import AsyncDatabase
+        from ingestion import IngestionQueue, SeedOutcomeBuffer
+        
+        adb = AsyncDatabase(db)
+        collector.ingest = IngestionQueue(adb)
+        collector.seed_outcomes = SeedOutcomeBuffer(adb)
+        collector.seed_tokens = seed_tokens
+        collector.probe_cache = ProbeCache(adb) if PROBE_CACHE_ENABLED else None
+        await collector.ingest.start()
+        await collector.seed_outcomes.start()
+        try:
+            stats = await collector.discover_from_seeds(seeds)
+        finally:
+            if collector.probe_cache is not None:
+                await collector.probe_cache.close()
+            await collector.seed_outcomes.close()
+            await collector.ingest.close()
+            adb.close()
+        saved_companies = collector.ingest.metrics.boards_written
+        saved_jobs = collector.ingest.metrics.jobs_written
+        ingestion_metrics = collector.ingest.metrics.to_dict()
+    else:
+        collector.probe_cache = ProbeCache() if PROBE_CACHE_ENABLED else None
+        stats = await collector.discover_from_seeds(seeds)
     
     return {
         'success': True,
@@ -1731,10 +2208,18 @@ async def run_discovery(db=None, max_seeds: int = 500) -> Dict:
         'jobs_found': stats.jobs_found,
         'saved_companies': saved_companies,
         'saved_jobs': saved_jobs,
+        'ingestion': ingestion_metrics,
         'errors': stats.errors,
+        'seeds_timed_out': stats.seeds_timed_out,
         'duration_seconds': stats.duration_seconds,
+        'progress': stats.progress,
+        'early_exit': stats.early_exit,
         'ats_breakdown': stats.ats_breakdown,
         'new_discoveries': stats.new_discoveries,
+        'hosts': stats.hosts,
+        'cached_boards': stats.cached_boards,
+        'probe_cache': stats.probe_cache,
+        'probe_dedup': stats.probe_dedup,
     }
 
 
@@ -79,7 +79,10 @@ class Config:
     
     # Cache Settings
     CACHE_ATS_RESULTS: bool = os.getenv('CACHE_ATS_RESULTS', 'true').lower() == 'true'
-    CACHE_TTL_SECONDS: int = int(os.getenv('CACHE_TTL_SECONDS', 3600))
+    CACHE_TTL_SECONDS: int = int(os.getenv('CACHE_TTL_SECONDS', 3600))  # Boards found by a token probe
+    # Token probes that found nothing / failed (see probe_cache.py); misses are stable, errors usually aren't
+    CACHE_MISS_TTL_SECONDS: int = int(os.getenv('CACHE_MISS_TTL_SECONDS', 3 * 24 * 3600))
+    CACHE_ERROR_TTL_SECONDS: int = int(os.getenv('CACHE_ERROR_TTL_SECONDS', 900))
     
     # Scheduled Tasks
     SELF_GROWTH_SCHEDULE_HOUR: int = int(os.getenv('SELF_GROWTH_SCHEDULE_HOUR', 4))  # 4 AM UTC
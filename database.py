@@ -1,16 +1,24 @@
 """Database Interface for Job Intelligence Platform - Production Grade with Smart Seed Rotation + Cleanup + Trends"""
 
 import os
+import asyncio
+import functools
 import logging
+import io
 import json
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import time
+import random
+from typing import List, Dict, Any, Optional, Tuple, Set
 from datetime import datetime, timedelta
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
-from psycopg2.extras import execute_batch, RealDictCursor
+from psycopg2.extras import execute_batch, execute_values, RealDictCursor
 from psycopg2.pool import ThreadedConnectionPool
 
+from skills import tag_title, count_skills, TREND_SKILLS
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,6 +26,50 @@ logger = logging.getLogger(__name__)
 TRENDS_CUTOFF_DATE = os.getenv('TRENDS_CUTOFF_DATE', '2024-12-25 00:00:00')
 logger.info(f"📅 Trends cutoff date set to: {TRENDS_CUTOFF_DATE}")
 
+# Output column -> select expression for Database.iter_active_job_rows
+ACTIVE_JOB_COLUMNS = {
+    'id': 'j.id',
+    'title': 'j.title',
+    'location': 'j.location',
+    'department': 'j.department',
+    'work_type': 'j.work_type',
+    'job_url': 'j.job_url',
+    'posted_date': 'j.posted_date',
+    'salary_min': 'j.salary_min',
+    'salary_max': 'j.salary_max',
+    'first_seen': 'j.first_seen',
+    'last_seen': 'j.last_seen',
+    'company_name': 'c.company_name',
+    'ats_type': 'c.ats_type',
+}
+
+# Output column -> select expression for Database.copy_jobs_export (see export.py for types)
+EXPORT_JOB_COLUMNS = {
+    'id': 'j.id',
+    'company_id': 'j.company_id',
+    'job_id': 'j.job_id',
+    'title': 'j.title',
+    'location': 'j.location',
+    'department': 'j.department',
+    'work_type': 'j.work_type',
+    'job_url': 'j.job_url',
+    'posted_date': 'j.posted_date',
+    'salary_min': 'j.salary_min',
+    'salary_max': 'j.salary_max',
+    'salary_currency': 'j.salary_currency',
+    'status': 'j.status',
+    'first_seen': 'j.first_seen',
+    'last_seen': 'j.last_seen',
+    'closed_at': 'j.closed_at',
+    'skills': "array_to_string(j.skills, '|')",
+    'company_name': 'c.company_name',
+    'ats_type': 'c.ats_type',
+    'board_url': 'c.board_url',
+}
+# How far the export watermark trails the export's snapshot; must exceed the
+# longest job_archive write transaction (see copy_jobs_export)
+EXPORT_WATERMARK_LAG_SECONDS = int(os.getenv('EXPORT_WATERMARK_LAG_SECONDS', 300))
+
 def infer_work_type(title: str, location: str, description: str = None) -> Optional[str]:
     """Infer work type from job title, location, and description"""
     text = f"{title} {location} {description or ''}".lower()
@@ -74,6 +126,7 @@ class Database:
             raise
         
         self._create_tables()
+        self.trigram_search = self._create_search_indexes()
         logger.info("✅ Database connection pool initialized successfully")
     
     @contextmanager
@@ -132,6 +185,21 @@ class Database:
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_location ON job_archive(location)")
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_work_type ON job_archive(work_type)")
                 
+                # Keyset pagination for /api/companies/<id>/jobs?status=...
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_company_status_seen ON job_archive(company_id, status, first_seen DESC, id DESC)")
+                # Keyset pagination for /api/jobs (newest first)
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_active_recent ON job_archive(last_seen DESC, id DESC) WHERE status = 'active'")
+                # Salary insights read only the salaried active rows
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_active_salary ON job_archive(company_id) WHERE status = 'active' AND salary_min IS NOT NULL")
+                # Incremental bulk exports (rows seen or closed after a watermark)
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_last_seen ON job_archive(last_seen)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_closed_at ON job_archive(closed_at) WHERE closed_at IS NOT NULL")
+                
+                # Skill tags extracted from the title at ingest (NULL = not tagged yet, see backfill_skill_tags)
+                cur.execute("ALTER TABLE job_archive ADD COLUMN IF NOT EXISTS skills TEXT[]")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_skills ON job_archive USING GIN (skills)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_job_archive_untagged ON job_archive(id) WHERE skills IS NULL")
+                
                 # Seeds
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS seed_companies (
@@ -157,6 +225,70 @@ class Database:
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_seeds_blacklisted ON seed_companies(is_blacklisted)")
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_seeds_tier ON seed_companies(tier)")
                 
+                # Seed rotation: a materialized priority bucket (kept current by a trigger
+                # when seeds are tested) plus a random sort key, so get_seeds can sample
+                # each bucket with an index range scan instead of ORDER BY RANDOM()
+                cur.execute("ALTER TABLE seed_companies ADD COLUMN IF NOT EXISTS priority_bucket SMALLINT")
+                cur.execute("ALTER TABLE seed_companies ADD COLUMN IF NOT EXISTS random_key DOUBLE PRECISION DEFAULT random()")
+                cur.execute("""
+                    CREATE OR REPLACE FUNCTION seed_priority_bucket(
+                        p_times_tested INTEGER, p_tier INTEGER, p_success_rate NUMERIC, p_last_tested_at TIMESTAMP
+                    ) RETURNS SMALLINT LANGUAGE sql STABLE AS $$
+                        SELECT (CASE
+                            WHEN COALESCE(p_times_tested, 0) = 0 AND p_tier = 1 THEN 1
+                            WHEN COALESCE(p_times_tested, 0) = 0 AND p_tier = 2 THEN 2
+                            WHEN COALESCE(p_times_tested, 0) = 0 THEN 3
+                            WHEN p_success_rate >= 50.0 AND p_last_tested_at < NOW() - INTERVAL '7 days' THEN 4
+                            WHEN p_success_rate >= 30.0 AND p_last_tested_at < NOW() - INTERVAL '14 days' THEN 5
+                            WHEN p_times_tested <= 2 AND p_tier = 1 THEN 6
+                            WHEN p_times_tested <= 2 AND p_tier = 2 THEN 7
+                            ELSE 8
+                        END)::SMALLINT
+                    $$
+                """)
+                cur.execute("""
+                    CREATE OR REPLACE FUNCTION seed_companies_set_bucket() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+                    BEGIN
+                        NEW.priority_bucket := seed_priority_bucket(NEW.times_tested, NEW.tier, NEW.success_rate, NEW.last_tested_at);
+                        -- A tested seed gets a fresh position so rotation keeps moving
+                        IF TG_OP = 'UPDATE' AND NEW.times_tested IS DISTINCT FROM OLD.times_tested THEN
+                            NEW.random_key := random();
+                        END IF;
+                        RETURN NEW;
+                    END
+                    $$
+                """)
+                cur.execute("""
+                    DO $$
+                    BEGIN
+                        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_seed_companies_bucket') THEN
+                            CREATE TRIGGER trg_seed_companies_bucket
+                            BEFORE INSERT OR UPDATE OF times_tested, times_successful, success_rate, last_tested_at, tier
+                            ON seed_companies
+                            FOR EACH ROW EXECUTE FUNCTION seed_companies_set_bucket();
+                        END IF;
+                    END
+                    $$
+                """)
+                cur.execute("""
+                    UPDATE seed_companies
+                    SET priority_bucket = seed_priority_bucket(times_tested, tier, success_rate, last_tested_at)
+                    WHERE priority_bucket IS NULL
+                """)
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_seeds_bucket_random
+                    ON seed_companies(priority_bucket, random_key)
+                    WHERE is_blacklisted = FALSE
+                """)
+                # Same, limited to low-tested seeds: get_seeds(max_times_tested=...) samples
+                # the buckets that mix test counts (4, 5, 8) from this one instead of
+                # post-filtering whole buckets of the index above
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_seeds_bucket_random_low_tested
+                    ON seed_companies(priority_bucket, random_key)
+                    WHERE is_blacklisted = FALSE AND COALESCE(times_tested, 0) <= {self.SEED_LOW_TESTED_MAX}
+                """)
+                
                 # Snapshots
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS snapshots_6h (
@@ -172,6 +304,30 @@ class Database:
                 """)
                 
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_company_time ON snapshots_6h(company_id, snapshot_time DESC)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_time ON snapshots_6h(snapshot_time DESC)")
+                
+                # Small key/value counters; 'ingest_generation' is bumped once per finished
+                # write job (see bump_data_generation / get_data_version)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS app_state (
+                        key VARCHAR(100) PRIMARY KEY,
+                        value BIGINT NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP DEFAULT NOW()
+                    )
+                """)
+                
+                # Current per-company counters, maintained at ingest so snapshots are a cheap copy
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS company_stats (
+                        company_id INTEGER PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+                        active_jobs INTEGER DEFAULT 0,
+                        locations_count INTEGER DEFAULT 0,
+                        departments_count INTEGER DEFAULT 0,
+                        updated_at TIMESTAMP DEFAULT NOW()
+                    )
+                """)
+                # All jobs ever archived for the company (NULL until the row is next refreshed)
+                cur.execute("ALTER TABLE company_stats ADD COLUMN IF NOT EXISTS total_jobs INTEGER")
                 
                 # Monthly snapshots
                 cur.execute("""
@@ -203,8 +359,61 @@ class Database:
                 
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_intel_events_type_time ON intelligence_events(event_type, detected_at DESC)")
                 
+                # Precomputed analytics payloads (see refresh_analytics_rollups)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS analytics_rollups (
+                        name VARCHAR(100) PRIMARY KEY,
+                        payload JSONB NOT NULL,
+                        refreshed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        refresh_ms INTEGER
+                    )
+                """)
+                
+                # Outcome of probing one token against one ATS (see probe_cache.py)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS ats_probe_cache (
+                        ats_type VARCHAR(50) NOT NULL,
+                        token VARCHAR(255) NOT NULL,
+                        outcome VARCHAR(10) NOT NULL,
+                        requests SMALLINT NOT NULL DEFAULT 1,
+                        company_name VARCHAR(255),
+                        board_url TEXT,
+                        job_count INTEGER NOT NULL DEFAULT 0,
+                        checked_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        expires_at TIMESTAMP NOT NULL,
+                        PRIMARY KEY (ats_type, token)
+                    )
+                """)
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_probe_cache_token ON ats_probe_cache(token)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_probe_cache_expires ON ats_probe_cache(expires_at)")
+                
                 conn.commit()
     
+    def _create_search_indexes(self) -> bool:
+        """Name search indexes for companies and seeds.
+        
+        The LOWER(company_name) text_pattern_ops btrees serve case-insensitive
+        equality and prefix (autocomplete) lookups. pg_trgm GIN indexes serve
+        substring and fuzzy matches. Returns False when pg_trgm can't be
+        installed; search then falls back to prefix + ILIKE matching.
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_companies_name_lower ON companies(LOWER(company_name) text_pattern_ops)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_seeds_name_lower ON seed_companies(LOWER(company_name) text_pattern_ops)")
+                conn.commit()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_companies_name_trgm ON companies USING GIN (company_name gin_trgm_ops)")
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_seeds_name_trgm ON seed_companies USING GIN (company_name gin_trgm_ops)")
+                    conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"⚠️ pg_trgm unavailable, name search falls back to prefix/ILIKE matching: {e}")
+                return False
+    
     def _name_to_token(self, name: str) -> str:
         token = name.lower()
         token = re.sub(r'\s+(inc|llc|ltd|co|corp|corporation|gmbh|sa|ag|plc)\.?$', '', token, flags=re.IGNORECASE)
@@ -214,90 +423,7 @@ class Database:
     
     def _extract_skills_from_text(self, text: str) -> Dict[str, int]:
         """Extract skills from job title/description"""
-        if not text:
-            return {}
-        
-        skills = {}
-        
-        # Comprehensive skill patterns
-        skill_patterns = {
-            # Programming Languages
-            'Python': r'\bPython\b',
-            'JavaScript': r'\bJavaScript\b|\bJS\b',
-            'TypeScript': r'\bTypeScript\b|\bTS\b',
-            'Java': r'\bJava\b(?!Script)',
-            'Go': r'\bGo\b|\bGolang\b',
-            'Rust': r'\bRust\b',
-            'C++': r'\bC\+\+\b',
-            'C#': r'\bC#\b',
-            'Ruby': r'\bRuby\b',
-            'PHP': r'\bPHP\b',
-            'Swift': r'\bSwift\b',
-            'Kotlin': r'\bKotlin\b',
-            
-            # Frontend
-            'React': r'\bReact\b|\bReactJS\b',
-            'Vue': r'\bVue\.js\b|\bVue\b',
-            'Angular': r'\bAngular\b',
-            'Next.js': r'\bNext\.js\b',
-            'Svelte': r'\bSvelte\b',
-            'HTML': r'\bHTML\b',
-            'CSS': r'\bCSS\b',
-            'Tailwind': r'\bTailwind\b',
-            
-            # Backend
-            'Node.js': r'\bNode\.?js\b',
-            'Django': r'\bDjango\b',
-            'Flask': r'\bFlask\b',
-            'FastAPI': r'\bFastAPI\b',
-            'Spring': r'\bSpring\b',
-            'Express': r'\bExpress\b',
-            
-            # Cloud
-            'AWS': r'\bAWS\b',
-            'Azure': r'\bAzure\b',
-            'GCP': r'\bGCP\b|\bGoogle Cloud\b',
-            'Docker': r'\bDocker\b',
-            'Kubernetes': r'\bKubernetes\b|\bK8s\b',
-            'Terraform': r'\bTerraform\b',
-            
-            # Databases
-            'SQL': r'\bSQL\b',
-            'PostgreSQL': r'\bPostgreSQL\b|\bPostgres\b',
-            'MySQL': r'\bMySQL\b',
-            'MongoDB': r'\bMongoDB\b',
-            'Redis': r'\bRedis\b',
-            'Elasticsearch': r'\bElasticsearch\b',
-            
-            # Data & AI
-            'Machine Learning': r'\bMachine Learning\b|\bML\b',
-            'AI': r'\bAI\b|\bArtificial Intelligence\b',
-            'Data Science': r'\bData Science\b',
-            'TensorFlow': r'\bTensorFlow\b',
-            'PyTorch': r'\bPyTorch\b',
-            'Spark': r'\bSpark\b',
-            
-            # DevOps
-            'CI/CD': r'\bCI/CD\b',
-            'Jenkins': r'\bJenkins\b',
-            'Git': r'\bGit\b(?!Hub|Lab)',
-            'Linux': r'\bLinux\b',
-            
-            # Roles (for categorization)
-            'Full Stack': r'\bFull[- ]?Stack\b',
-            'Frontend': r'\bFront[- ]?end\b|\bFront[- ]?End\b',
-            'Backend': r'\bBack[- ]?end\b|\bBack[- ]?End\b',
-            'DevOps': r'\bDevOps\b',
-            'Data Engineer': r'\bData Engineer\b',
-            'Mobile': r'\bMobile\b|\biOS\b|\bAndroid\b',
-        }
-        
-        text_lower = text.lower()
-        for skill, pattern in skill_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                skills[skill] = skills.get(skill, 0) + 1
-        
-        return skills
+        return {skill: 1 for skill in tag_title(text)}
     
     def acquire_advisory_lock(self, lock_name: str, timeout: int = 0) -> bool:
         try:
@@ -357,6 +483,32 @@ class Database:
             logger.error(f"Error adding company: {e}")
             return None
     
+    def upsert_discovered_company(self, company_name: str, token: str, ats_type: str, board_url: str,
+                                  job_count: int = 0) -> Optional[int]:
+        """Insert a company found by discovery, or only refresh job_count/last_scraped of an existing one.
+        
+        Unlike add_company, an existing row keeps its ats_type, board_url and
+        metadata: a seed's probe shouldn't repoint a company the refresh cycle
+        already tracks.
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT INTO companies (company_name, company_name_token, ats_type, board_url, job_count, last_scraped)
+                        VALUES (%s, %s, %s, %s, %s, NOW())
+                        ON CONFLICT (company_name) DO UPDATE SET
+                            job_count = EXCLUDED.job_count,
+                            last_scraped = NOW()
+                        RETURNING id
+                    """, (company_name, token, ats_type, board_url, job_count))
+                    company_id = cur.fetchone()[0]
+                    conn.commit()
+                    return company_id
+        except Exception as e:
+            logger.error(f"Error upserting discovered company {company_name}: {e}")
+            return None
+    
     def get_company_id(self, company_name: str) -> Optional[int]:
         try:
             with self.get_connection() as conn:
@@ -402,8 +554,8 @@ class Database:
             updated_count = 0
             closed_count = 0
             
-            # Track new locations for expansion detection
-            new_locations = set()
+            # Track new locations for expansion detection: lower -> [location, job_count]
+            new_locations = {}
             
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
@@ -439,18 +591,19 @@ class Database:
                         location = job.get('location')
                         if location and location.strip():
                             location_lower = location.lower()
-                            if location_lower not in existing_locations and location_lower not in new_locations:
-                                new_locations.add(location_lower)
-                                # Track expansion event
-                                self.track_location_expansion(company_id, location, 1)
+                            if location_lower not in existing_locations:
+                                if location_lower not in new_locations:
+                                    new_locations[location_lower] = [location, 0]
+                                new_locations[location_lower][1] += 1
                         
                         cur.execute("""
                             INSERT INTO job_archive 
-                            (company_id, job_id, title, location, department, work_type, job_url, posted_date, salary_min, salary_max, salary_currency, status, metadata)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'active', %s)
+                            (company_id, job_id, title, location, department, work_type, job_url, posted_date, salary_min, salary_max, salary_currency, status, metadata, skills)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'active', %s, %s)
                             ON CONFLICT (company_id, job_id) 
                             DO UPDATE SET
                                 title = EXCLUDED.title,
+                                skills = EXCLUDED.skills,
                                 location = EXCLUDED.location,
                                 department = EXCLUDED.department,
                                 work_type = EXCLUDED.work_type,
@@ -467,7 +620,8 @@ class Database:
                             company_id, job['id'], job.get('title'), job.get('location'),
                             job.get('department'), work_type, job.get('url'),
                             job.get('posted_date'), job.get('salary_min'), job.get('salary_max'),
-                            job.get('salary_currency'), json.dumps(job.get('metadata', {}))
+                            job.get('salary_currency'), json.dumps(job.get('metadata', {})),
+                            sorted(tag_title(job.get('title')))
                         ))
                         was_inserted = cur.fetchone()[0]
                         if was_inserted:
@@ -475,6 +629,14 @@ class Database:
                         else:
                             updated_count += 1
                     
+                    if new_locations:
+                        self._record_location_expansions(cur, [
+                            (company_id, location, job_count)
+                            for location, job_count in new_locations.values()
+                        ])
+                    
+                    self._refresh_company_stats(cur, [company_id])
+                    
                     conn.commit()
                     
                     if new_locations:
@@ -486,6 +648,179 @@ class Database:
             logger.error(f"Error archiving jobs: {e}")
             return 0, 0, 0
     
+    @staticmethod
+    def _normalize_posted_date(value) -> Optional[str]:
+        """Coerce an ATS posted date (ISO string, epoch seconds/millis, date) to YYYY-MM-DD"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (int, float)):
+            seconds = value / 1000 if value > 1e11 else value
+            try:
+                return datetime.utcfromtimestamp(seconds).date().isoformat()
+            except (OverflowError, OSError, ValueError):
+                return None
+        match = re.match(r'\s*(\d{4}-\d{2}-\d{2})', str(value))
+        return match.group(1) if match else None
+    
+    @staticmethod
+    def _normalize_salary(value) -> Optional[int]:
+        if value is None or value == '':
+            return None
+        try:
+            return int(round(float(value)))
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _copy_csv_row(values: List[Any]) -> str:
+        """Format one COPY ... CSV line: None -> bare empty field (NULL), everything else quoted"""
+        return ','.join(
+            '' if v is None else '"' + str(v).replace('\x00', '').replace('"', '""') + '"'
+            for v in values
+        ) + '\n'
+    
+    @staticmethod
+    def _pg_text_array(values: List[str]) -> str:
+        """Postgres TEXT[] literal for COPY"""
+        return '{' + ','.join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values) + '}'
+    
+    def _stage_jobs(self, cur, boards: Dict[int, List[Dict]]) -> int:
+        """COPY every job of every board into the session-local _job_stage table"""
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS _job_stage (
+                seq INTEGER,
+                company_id INTEGER,
+                job_id VARCHAR(255),
+                title TEXT,
+                location TEXT,
+                department TEXT,
+                work_type VARCHAR(50),
+                job_url TEXT,
+                posted_date DATE,
+                salary_min INTEGER,
+                salary_max INTEGER,
+                salary_currency VARCHAR(10),
+                metadata JSONB,
+                skills TEXT[]
+            ) ON COMMIT DELETE ROWS
+        """)
+        
+        buf = io.StringIO()
+        seq = 0
+        for company_id, jobs in boards.items():
+            for job in jobs:
+                metadata = job.get('metadata') or {}
+                work_type = job.get('work_type')
+                if not work_type or work_type.strip() == '':
+                    work_type = infer_work_type(
+                        job.get('title') or '',
+                        job.get('location') or '',
+                        metadata.get('description', '') if isinstance(metadata, dict) else None
+                    )
+                seq += 1
+                buf.write(self._copy_csv_row([
+                    seq, company_id, str(job['id']), job.get('title'), job.get('location'),
+                    job.get('department'), work_type, job.get('url'),
+                    self._normalize_posted_date(job.get('posted_date')),
+                    self._normalize_salary(job.get('salary_min')),
+                    self._normalize_salary(job.get('salary_max')),
+                    job.get('salary_currency'), json.dumps(metadata, default=str),
+                    self._pg_text_array(sorted(tag_title(job.get('title'))))
+                ]))
+        buf.seek(0)
+        cur.copy_expert("""
+            COPY _job_stage (seq, company_id, job_id, title, location, department, work_type,
+                             job_url, posted_date, salary_min, salary_max, salary_currency, metadata, skills)
+            FROM STDIN WITH (FORMAT csv)
+        """, buf)
+        return seq
+    
+    def archive_jobs_bulk(self, boards: Dict[int, List[Dict]], partial_company_ids: Set[int] = None) -> Tuple[int, int, int]:
+        """Set-based equivalent of archive_jobs for one or many boards.
+        
+        `boards` maps company_id -> scraped jobs. All rows are COPY'd into a temp
+        staging table and the close / insert / update diffs are applied with a
+        handful of statements in a single transaction. Boards with no jobs are
+        ignored, exactly like archive_jobs. Companies in `partial_company_ids`
+        only scraped part of their board, so their missing jobs are not closed.
+        Returns summed (new, updated, closed). Errors are logged and re-raised
+        (nothing is written), so callers can count the boards as failed.
+        """
+        if not any(boards.values()):
+            return 0, 0, 0
+        boards = {company_id: jobs for company_id, jobs in boards.items() if jobs}
+        partial_company_ids = partial_company_ids or set()
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    staged = self._stage_jobs(cur, boards)
+                    company_ids = list(boards.keys())
+                    
+                    # New locations must be detected before the upsert makes them "existing"
+                    expansions = self._record_staged_location_expansions(cur, company_ids)
+                    
+                    cur.execute("""
+                        UPDATE job_archive ja
+                        SET status = 'closed', closed_at = NOW()
+                        WHERE ja.company_id = ANY(%s)
+                        AND ja.status = 'active'
+                        AND NOT EXISTS (
+                            SELECT 1 FROM _job_stage s
+                            WHERE s.company_id = ja.company_id AND s.job_id = ja.job_id
+                        )
+                    """, ([cid for cid in company_ids if cid not in partial_company_ids],))
+                    closed_count = cur.rowcount
+                    
+                    # DISTINCT ON keeps the last occurrence of a duplicated job id,
+                    # matching the last-write-wins behaviour of the per-row path
+                    cur.execute("""
+                        WITH upserted AS (
+                            INSERT INTO job_archive
+                            (company_id, job_id, title, location, department, work_type, job_url, posted_date, salary_min, salary_max, salary_currency, status, metadata, skills)
+                            SELECT DISTINCT ON (company_id, job_id)
+                                company_id, job_id, title, location, department, work_type, job_url,
+                                posted_date, salary_min, salary_max, salary_currency, 'active', metadata, skills
+                            FROM _job_stage
+                            ORDER BY company_id, job_id, seq DESC
+                            ON CONFLICT (company_id, job_id)
+                            DO UPDATE SET
+                                title = EXCLUDED.title,
+                                skills = EXCLUDED.skills,
+                                location = EXCLUDED.location,
+                                department = EXCLUDED.department,
+                                work_type = EXCLUDED.work_type,
+                                job_url = EXCLUDED.job_url,
+                                posted_date = EXCLUDED.posted_date,
+                                salary_min = EXCLUDED.salary_min,
+                                salary_max = EXCLUDED.salary_max,
+                                salary_currency = EXCLUDED.salary_currency,
+                                last_seen = NOW(),
+                                status = 'active',
+                                metadata = EXCLUDED.metadata
+                            RETURNING (xmax = 0) AS inserted
+                        )
+                        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+                        FROM upserted
+                    """)
+                    new_count, updated_count = cur.fetchone()
+                    
+                    self._refresh_company_stats(cur, company_ids)
+                    
+                    conn.commit()
+            
+            if expansions:
+                logger.info(f"📍 Recorded {expansions} location expansion(s) across {len(boards)} companies")
+            
+            logger.info(f"Job archive (bulk, {len(boards)} boards, {staged} rows): +{new_count} new, ~{updated_count} updated, -{closed_count} closed")
+            return new_count, updated_count, closed_count
+        except Exception as e:
+            logger.error(f"Error bulk archiving jobs for {len(boards)} boards: {e}")
+            raise
+    
     def backfill_work_types(self) -> int:
         """Backfill work_type for existing jobs that don't have it set"""
         try:
@@ -526,6 +861,44 @@ class Database:
             logger.error(f"Error backfilling work types: {e}")
             return 0
     
+    def backfill_skill_tags(self, batch_size: int = 5000, max_rows: Optional[int] = None) -> int:
+        """Tag jobs ingested before skills were extracted at ingest time.
+        
+        Works through untagged rows in id order, one committed batch at a time,
+        stopping after `max_rows` (all of them when None). Returns rows tagged.
+        """
+        tagged = 0
+        last_id = 0
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    while max_rows is None or tagged < max_rows:
+                        limit = batch_size if max_rows is None else min(batch_size, max_rows - tagged)
+                        cur.execute("""
+                            SELECT id, title FROM job_archive
+                            WHERE skills IS NULL AND id > %s
+                            ORDER BY id
+                            LIMIT %s
+                        """, (last_id, limit))
+                        rows = cur.fetchall()
+                        if not rows:
+                            break
+                        execute_values(cur, """
+                            UPDATE job_archive ja SET skills = v.skills
+                            FROM (VALUES %s) AS v(id, skills)
+                            WHERE ja.id = v.id
+                        """, [(job_id, sorted(tag_title(title))) for job_id, title in rows],
+                            template="(%s, %s::TEXT[])", page_size=1000)
+                        conn.commit()
+                        tagged += len(rows)
+                        last_id = rows[-1][0]
+            if tagged:
+                logger.info(f"🏷️ Backfilled skill tags for {tagged} jobs")
+            return tagged
+        except Exception as e:
+            logger.error(f"Error backfilling skill tags: {e}")
+            return tagged
+    
     def insert_seeds(self, seeds: List[Tuple[str, str, str, int]]) -> int:
         if not seeds:
             return 0
@@ -549,11 +922,11 @@ class Database:
             token = self._name_to_token(company_name)
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("SELECT 1 FROM seed_companies WHERE company_name_token = %s OR company_name ILIKE %s", (token, company_name))
+                    cur.execute("SELECT 1 FROM seed_companies WHERE company_name_token = %s OR LOWER(company_name) = LOWER(%s)", (token, company_name))
                     if cur.fetchone():
                         logger.info(f"Seed already exists: {company_name}")
                         return False
-                    cur.execute("SELECT 1 FROM companies WHERE company_name ILIKE %s", (company_name,))
+                    cur.execute("SELECT 1 FROM companies WHERE LOWER(company_name) = LOWER(%s)", (company_name,))
                     if cur.fetchone():
                         logger.info(f"Company already tracked: {company_name}")
                         return False
@@ -569,112 +942,226 @@ class Database:
             logger.error(f"Error adding manual seed: {e}")
             return False
     
+    # ========================================================================
+    # COMPANY & SEED NAME SEARCH
+    # ========================================================================
+    
+    # Beyond this many matches totals come from the planner's row estimate
+    SEARCH_EXACT_COUNT_LIMIT = 1000
+    
+    @staticmethod
+    def _escape_like(text: str) -> str:
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    def _search_names(self, table: str, columns: str, popularity: str, query: str,
+                      limit: int, offset: int, conditions: List[str], params: List) -> Tuple[List[Dict], int, bool]:
+        """Ranked name search over `table`; returns (rows, total, total_is_estimate).
+        
+        Ranking: exact name, then prefix, then substring matches, then fuzzy
+        (pg_trgm word similarity) matches, each ordered by similarity and
+        `popularity`. Queries shorter than 3 characters have no trigrams and
+        only match by prefix.
+        """
+        query = query.strip()
+        args = {
+            'q': query,
+            'prefix': self._escape_like(query.lower()) + '%',
+            'contains': '%' + self._escape_like(query) + '%',
+            'limit': limit,
+            'offset': offset,
+        }
+        for i, value in enumerate(params):
+            args[f'p{i}'] = value
+        extra = ''.join(f" AND {c}" for c in conditions)
+        
+        if len(query) < 3:
+            match = "LOWER(company_name) LIKE %(prefix)s"
+        elif self.trigram_search:
+            match = "(company_name ILIKE %(contains)s OR %(q)s <%% company_name)"
+        else:
+            match = "company_name ILIKE %(contains)s"
+        score = "word_similarity(%(q)s, company_name)" if self.trigram_search else "0"
+        where = f"WHERE {match}{extra}"
+        
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(f"""
+                    SELECT {columns},
+                           CASE
+                               WHEN LOWER(company_name) = LOWER(%(q)s) THEN 3
+                               WHEN LOWER(company_name) LIKE %(prefix)s THEN 2
+                               WHEN company_name ILIKE %(contains)s THEN 1
+                               ELSE 0
+                           END AS match_rank,
+                           {score} AS match_score
+                    FROM {table}
+                    {where}
+                    ORDER BY match_rank DESC, match_score DESC, {popularity} DESC NULLS LAST, company_name
+                    LIMIT %(limit)s OFFSET %(offset)s
+                """, args)
+                rows = [dict(row) for row in cur.fetchall()]
+                
+                # Exact count up to the cap, planner estimate beyond it
+                cur.execute(f"""
+                    SELECT COUNT(*) AS n FROM (
+                        SELECT 1 FROM {table} {where} LIMIT {self.SEARCH_EXACT_COUNT_LIMIT + 1}
+                    ) capped
+                """, args)
+                total = cur.fetchone()['n']
+                if total <= self.SEARCH_EXACT_COUNT_LIMIT:
+                    return rows, total, False
+                
+                cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} {where}", args)
+                plan = cur.fetchone()['QUERY PLAN'][0]['Plan']
+                return rows, max(total, int(plan['Plan Rows'])), True
+    
+    def search_companies(self, query: str, limit: int = 20, offset: int = 0,
+                         ats_type: str = None) -> Tuple[List[Dict], int, bool]:
+        """Ranked fuzzy company search; returns (companies, total, total_is_estimate)"""
+        conditions, params = [], []
+        if ats_type:
+            conditions.append("ats_type = %(p0)s")
+            params.append(ats_type)
+        try:
+            return self._search_names(
+                'companies',
+                "id, company_name, ats_type, board_url, job_count, last_scraped, created_at, "
+                "COALESCE(job_count, 0) AS active_jobs",
+                'job_count', query, limit, offset, conditions, params
+            )
+        except Exception as e:
+            logger.error(f"Error searching companies: {e}")
+            return [], 0, False
+    
+    def search_seeds(self, query: str, limit: int = 20, offset: int = 0,
+                     include_blacklisted: bool = False) -> Tuple[List[Dict], int, bool]:
+        """Ranked fuzzy seed search; returns (seeds, total, total_is_estimate)"""
+        conditions = [] if include_blacklisted else ["is_blacklisted = FALSE"]
+        try:
+            return self._search_names(
+                'seed_companies',
+                "id, company_name, source, tier, website_url, times_tested, success_rate, "
+                "is_blacklisted, last_tested_at",
+                'success_rate', query, limit, offset, conditions, []
+            )
+        except Exception as e:
+            logger.error(f"Error searching seeds: {e}")
+            return [], 0, False
+    
+    def autocomplete_companies(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Companies whose name starts with `prefix` (largest first), topped up
+        with fuzzy word matches when pg_trgm is available"""
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute("""
+                        SELECT id, company_name, ats_type, job_count
+                        FROM companies
+                        WHERE LOWER(company_name) LIKE %s
+                        ORDER BY job_count DESC NULLS LAST, company_name
+                        LIMIT %s
+                    """, (self._escape_like(prefix.lower()) + '%', limit))
+                    matches = [dict(row) for row in cur.fetchall()]
+                    
+                    if self.trigram_search and len(prefix) >= 3 and len(matches) < limit:
+                        cur.execute("""
+                            SELECT id, company_name, ats_type, job_count
+                            FROM companies
+                            WHERE %s <%% company_name AND NOT (id = ANY(%s))
+                            ORDER BY word_similarity(%s, company_name) DESC, job_count DESC NULLS LAST
+                            LIMIT %s
+                        """, (prefix, [m['id'] for m in matches], prefix, limit - len(matches)))
+                        matches.extend(dict(row) for row in cur.fetchall())
+                    return matches
+        except Exception as e:
+            logger.error(f"Error autocompleting companies: {e}")
+            return []
+    
     # ========================================================================
     # SMART SEED ROTATION LOGIC
     # ========================================================================
     
-    def get_seeds(self, limit: int = 100, prioritize_quality: bool = True) -> List[Dict]:
+    SEED_PRIORITY_BUCKETS = range(1, 9)
+    # Highest times_tested a bucket can hold, for the buckets that bound it
+    SEED_BUCKET_MAX_TESTED = {1: 0, 2: 0, 3: 0, 6: 2, 7: 2}
+    # times_tested cutoff of idx_seeds_bucket_random_low_tested
+    SEED_LOW_TESTED_MAX = 2
+    
+    def get_seeds(self, limit: int = 100, prioritize_quality: bool = True, max_times_tested: int = None) -> List[Dict]:
         """
         Get seeds for testing with intelligent rotation
         
-        Priority order:
+        Priority order (materialized in seed_companies.priority_bucket):
         1. Never tested seeds from tier 1 (highest quality)
         2. Never tested seeds from tier 2
         3. Never tested seeds from any tier
         4. Successful seeds tested 7+ days ago (re-test winners)
         5. Successful seeds tested 14+ days ago
-        6. Low-tested seeds (1-2 times) from tier 1/2
-        7. Everything else not blacklisted
+        6. Low-tested seeds (1-2 times) from tier 1
+        7. Low-tested seeds (1-2 times) from tier 2
+        8. Everything else not blacklisted
         
-        Uses RANDOM() within each priority group to ensure variety
+        Each bucket is sampled by starting at a random point of its random_key
+        range and wrapping around, which is an index range scan on
+        idx_seeds_bucket_random; cost depends on `limit`, not on table size.
+        With prioritize_quality=False the per-bucket samples are shuffled
+        together instead of taken in priority order.
+        
+        max_times_tested (NULL counts as 0) is folded into the buckets: buckets
+        whose bound already satisfies it are sampled unfiltered, buckets that
+        can't satisfy it are skipped, and the rest are filtered on the same
+        expression as idx_seeds_bucket_random_low_tested, so at or below
+        SEED_LOW_TESTED_MAX they are still index range scans over matching rows.
         """
         try:
+            parts = []
+            params = []
+            for bucket in self.SEED_PRIORITY_BUCKETS:
+                tested_filter, tested_params = "", []
+                bound = self.SEED_BUCKET_MAX_TESTED.get(bucket)
+                if max_times_tested is not None and (bound is None or bound > max_times_tested):
+                    if max_times_tested < 1:
+                        continue  # only buckets 1-3 hold untested seeds
+                    tested_filter, tested_params = "AND COALESCE(times_tested, 0) <= %s", [max_times_tested]
+                start_key = random.random()
+                for part, key_filter in ((0, "random_key >= %s"), (1, "random_key < %s")):
+                    parts.append(f"""
+                        (SELECT company_name, company_name_token, source, tier, times_tested,
+                                times_successful, success_rate, last_tested_at,
+                                priority_bucket, {part} AS part, random_key
+                         FROM seed_companies
+                         WHERE is_blacklisted = false AND priority_bucket = %s AND {key_filter} {tested_filter}
+                         ORDER BY random_key
+                         LIMIT %s)
+                    """)
+                    params.extend([bucket, start_key] + tested_params + [limit])
+            
+            if not parts:
+                return []
+            
+            order = "priority_bucket, part, random_key" if prioritize_quality else "RANDOM()"
+            query = f"""
+                SELECT company_name, company_name_token, source, tier, times_tested,
+                       times_successful, success_rate, last_tested_at
+                FROM ({' UNION ALL '.join(parts)}) sampled
+                ORDER BY {order}
+                LIMIT %s
+            """
+            params.append(limit)
+            
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    if prioritize_quality:
-                        query = """
-                            WITH prioritized_seeds AS (
-                                SELECT 
-                                    company_name,
-                                    company_name_token,
-                                    source,
-                                    tier,
-                                    times_tested,
-                                    times_successful,
-                                    success_rate,
-                                    last_tested_at,
-                                    is_blacklisted,
-                                    CASE
-                                        -- Priority 1: Never tested tier 1 (premium sources)
-                                        WHEN times_tested = 0 AND tier = 1 THEN 1
-                                        
-                                        -- Priority 2: Never tested tier 2 (public companies)
-                                        WHEN times_tested = 0 AND tier = 2 THEN 2
-                                        
-                                        -- Priority 3: Never tested other tiers
-                                        WHEN times_tested = 0 THEN 3
-                                        
-                                        -- Priority 4: High success seeds tested a week ago
-                                        WHEN success_rate >= 50.0 AND 
-                                             last_tested_at < NOW() - INTERVAL '7 days' THEN 4
-                                        
-                                        -- Priority 5: Good success seeds tested 2 weeks ago
-                                        WHEN success_rate >= 30.0 AND 
-                                             last_tested_at < NOW() - INTERVAL '14 days' THEN 5
-                                        
-                                        -- Priority 6: Low-tested tier 1 seeds (give them another chance)
-                                        WHEN times_tested <= 2 AND tier = 1 THEN 6
-                                        
-                                        -- Priority 7: Low-tested tier 2 seeds
-                                        WHEN times_tested <= 2 AND tier = 2 THEN 7
-                                        
-                                        -- Priority 8: Everything else
-                                        ELSE 8
-                                    END as priority,
-                                    -- Randomize within each priority group
-                                    RANDOM() as random_sort
-                                FROM seed_companies
-                                WHERE is_blacklisted = false
-                            )
-                            SELECT 
-                                company_name,
-                                company_name_token,
-                                source,
-                                tier,
-                                times_tested,
-                                times_successful,
-                                success_rate,
-                                last_tested_at
-                            FROM prioritized_seeds
-                            ORDER BY priority ASC, random_sort
-                            LIMIT %s
-                        """
-                    else:
-                        # Simple random selection of non-blacklisted seeds
-                        query = """
-                            SELECT 
-                                company_name,
-                                company_name_token,
-                                source,
-                                tier,
-                                times_tested,
-                                times_successful,
-                                success_rate,
-                                last_tested_at
-                            FROM seed_companies
-                            WHERE is_blacklisted = false
-                            ORDER BY RANDOM()
-                            LIMIT %s
-                        """
-                    
-                    cur.execute(query, (limit,))
+                    cur.execute(query, params)
                     columns = [desc[0] for desc in cur.description]
                     seeds = [dict(zip(columns, row)) for row in cur.fetchall()]
                     
                     if seeds:
                         logger.info(f"🌱 Retrieved {len(seeds)} seeds for testing")
                         # Log rotation stats
-                        never_tested = sum(1 for s in seeds if s['times_tested'] == 0)
+                        never_tested = sum(1 for s in seeds if not s['times_tested'])
                         retesting = len(seeds) - never_tested
                         logger.info(f"   - {never_tested} never tested, {retesting} re-testing")
                     
@@ -683,44 +1170,136 @@ class Database:
             logger.error(f"Error getting seeds: {e}")
             return []
     
-    def increment_seed_tested(self, company_name: str):
-        """Increment times_tested counter and update last_tested_at"""
+    def refresh_seed_buckets(self) -> int:
+        """Move seeds whose bucket changed with time alone (the 7/14-day re-test windows)"""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute("""
-                        UPDATE seed_companies 
-                        SET times_tested = times_tested + 1,
-                            last_tested_at = NOW(),
-                            success_rate = CASE 
-                                WHEN times_tested + 1 > 0 
-                                THEN ROUND((times_successful::DECIMAL / (times_tested + 1) * 100), 2)
-                                ELSE 0 
-                            END
-                        WHERE company_name ILIKE %s
-                    """, (company_name,))
+                        UPDATE seed_companies
+                        SET priority_bucket = seed_priority_bucket(times_tested, tier, success_rate, last_tested_at)
+                        WHERE is_blacklisted = false
+                        AND priority_bucket IS DISTINCT FROM seed_priority_bucket(times_tested, tier, success_rate, last_tested_at)
+                    """)
+                    moved = cur.rowcount
                     conn.commit()
+                    logger.info(f"🌱 Re-bucketed {moved} seeds")
+                    return moved
         except Exception as e:
-            logger.debug(f"Error updating seed tested count: {e}")
+            logger.error(f"Error refreshing seed buckets: {e}")
+            return 0
     
-    def increment_seed_success(self, company_name: str):
-        """Increment success counter and recalculate success rate"""
+    def record_seed_outcomes(self, outcomes: Dict[str, Tuple[int, int]]) -> int:
+        """Apply accumulated seed test outcomes in one statement.
+        
+        `outcomes` maps company_name_token -> (times tested, times successful)
+        since the last flush. Rows are matched on the unique token index and
+        success_rate is recomputed from the new totals in the same UPDATE.
+        Returns the number of seed rows updated.
+        
+        The rows are locked in id order first, so concurrent flushes over
+        overlapping seeds queue behind each other instead of deadlocking.
+        Raises on failure so the caller can keep the outcomes and retry.
+        """
+        rows = [(token, tested, successful) for token, (tested, successful) in outcomes.items() if token]
+        if not rows:
+            return 0
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute("""
-                        UPDATE seed_companies 
-                        SET times_successful = times_successful + 1,
-                            success_rate = CASE 
-                                WHEN times_tested > 0 
-                                THEN ROUND(((times_successful + 1)::DECIMAL / times_tested * 100), 2)
-                                ELSE 100.0
+                        SELECT id FROM seed_companies
+                        WHERE company_name_token = ANY(%s)
+                        ORDER BY id
+                        FOR UPDATE
+                    """, ([row[0] for row in rows],))
+                    execute_values(cur, """
+                        UPDATE seed_companies s
+                        SET times_tested = COALESCE(s.times_tested, 0) + v.tested,
+                            times_successful = COALESCE(s.times_successful, 0) + v.successful,
+                            last_tested_at = CASE WHEN v.tested > 0 THEN NOW() ELSE s.last_tested_at END,
+                            success_rate = CASE
+                                WHEN COALESCE(s.times_tested, 0) + v.tested > 0
+                                THEN LEAST(ROUND(((COALESCE(s.times_successful, 0) + v.successful)::DECIMAL
+                                                  / (COALESCE(s.times_tested, 0) + v.tested) * 100), 2), 100.0)
+                                WHEN COALESCE(s.times_successful, 0) + v.successful > 0 THEN 100.0
+                                ELSE 0
                             END
-                        WHERE company_name ILIKE %s
-                    """, (company_name,))
+                        FROM (VALUES %s) AS v(token, tested, successful)
+                        WHERE s.company_name_token = v.token
+                    """, rows, template="(%s, %s::int, %s::int)", page_size=max(len(rows), 1))
+                    updated = cur.rowcount
+                    conn.commit()
+                    logger.debug(f"Recorded outcomes for {updated}/{len(rows)} seeds")
+                    return updated
+        except Exception as e:
+            logger.error(f"Error recording seed outcomes: {e}")
+            raise
+    
+    def load_probe_cache(self, tokens: List[str]) -> List[Dict]:
+        """Unexpired ats_probe_cache rows for these tokens, with seconds left to live.
+        
+        Expired rows are purged first, so the table only holds what a run can use.
+        """
+        if not tokens:
+            return []
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute("DELETE FROM ats_probe_cache WHERE expires_at <= NOW()")
+                    cur.execute("""
+                        SELECT ats_type, token, outcome, requests, company_name, board_url, job_count,
+                               EXTRACT(EPOCH FROM (expires_at - NOW()))::FLOAT AS ttl_seconds
+                        FROM ats_probe_cache
+                        WHERE token = ANY(%s)
+                    """, (list(tokens),))
+                    rows = [dict(row) for row in cur.fetchall()]
                     conn.commit()
+                    return rows
         except Exception as e:
-            logger.debug(f"Error updating seed success count: {e}")
+            logger.error(f"Error loading probe cache: {e}")
+            return []
+    
+    def save_probe_cache(self, rows: List[Tuple[str, str, str, int, Optional[str], Optional[str], int, float]]) -> int:
+        """Upsert probe outcomes: (ats_type, token, outcome, requests, company_name, board_url, job_count, ttl_seconds)"""
+        if not rows:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    execute_values(cur, """
+                        INSERT INTO ats_probe_cache
+                            (ats_type, token, outcome, requests, company_name, board_url, job_count, expires_at)
+                        VALUES %s
+                        ON CONFLICT (ats_type, token) DO UPDATE SET
+                            outcome = EXCLUDED.outcome,
+                            requests = EXCLUDED.requests,
+                            company_name = EXCLUDED.company_name,
+                            board_url = EXCLUDED.board_url,
+                            job_count = EXCLUDED.job_count,
+                            checked_at = NOW(),
+                            expires_at = EXCLUDED.expires_at
+                    """, rows, template="(%s, %s, %s, %s, %s, %s, %s, NOW() + make_interval(secs => %s))",
+                        page_size=1000)
+                    conn.commit()
+                    return len(rows)
+        except Exception as e:
+            logger.error(f"Error saving probe cache: {e}")
+            return 0
+    
+    def increment_seed_tested(self, company_name: str):
+        """Increment times_tested counter and update last_tested_at"""
+        try:
+            self.record_seed_outcomes({self._name_to_token(company_name): (1, 0)})
+        except Exception:
+            pass  # already logged
+    
+    def increment_seed_success(self, company_name: str):
+        """Increment success counter and recalculate success rate"""
+        try:
+            self.record_seed_outcomes({self._name_to_token(company_name): (0, 1)})
+        except Exception:
+            pass  # already logged
     
     def blacklist_poor_seeds(self, min_tests: int = 3, max_success_rate: float = 5.0) -> int:
         """Blacklist seeds that have been tested multiple times but never/rarely succeeded"""
@@ -873,25 +1452,49 @@ class Database:
     # END SMART SEED ROTATION LOGIC
     # ========================================================================
     
-    def create_company_snapshots(self) -> int:
+    def create_company_snapshots(self, changed_only: bool = False) -> int:
+        """Snapshot every company's counters from company_stats (kept current at ingest).
+        
+        changed_only=True skips companies whose counters equal their latest
+        snapshot. That is much cheaper on large fleets, but trend queries that
+        expect one snapshot per company per window (get_job_count_changes,
+        get_market_trends, fastest-growing companies) will see gaps for
+        unchanged companies, so the scheduled snapshot keeps the full mode.
+        """
         try:
+            # First run after upgrade, or companies added by paths that don't ingest jobs
+            self.rebuild_company_stats(only_missing=True)
+            
+            changed_filter = """
+                AND NOT EXISTS (
+                    SELECT 1 FROM (
+                        SELECT sn.job_count, sn.active_jobs, sn.locations_count, sn.departments_count
+                        FROM snapshots_6h sn
+                        WHERE sn.company_id = c.id
+                        ORDER BY sn.snapshot_time DESC
+                        LIMIT 1
+                    ) latest
+                    WHERE (latest.job_count, latest.active_jobs, latest.locations_count, latest.departments_count)
+                        IS NOT DISTINCT FROM (c.job_count, s.active_jobs, s.locations_count, s.departments_count)
+                )
+            """ if changed_only else ""
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("""
+                    cur.execute(f"""
                         INSERT INTO snapshots_6h (company_id, job_count, active_jobs, locations_count, departments_count)
                         SELECT 
                             c.id,
                             c.job_count,
-                            COUNT(DISTINCT CASE WHEN j.status = 'active' THEN j.id END) as active_jobs,
-                            COUNT(DISTINCT j.location) as locations_count,
-                            COUNT(DISTINCT j.department) as departments_count
+                            COALESCE(s.active_jobs, 0),
+                            COALESCE(s.locations_count, 0),
+                            COALESCE(s.departments_count, 0)
                         FROM companies c
-                        LEFT JOIN job_archive j ON c.id = j.company_id
-                        GROUP BY c.id
+                        LEFT JOIN company_stats s ON s.company_id = c.id
+                        WHERE TRUE {changed_filter}
                     """)
                     count = cur.rowcount
                     conn.commit()
-                    logger.info(f"Created {count} company snapshots")
+                    logger.info(f"Created {count} company snapshots{' (changed only)' if changed_only else ''}")
                     return count
         except Exception as e:
             logger.error(f"Error creating snapshots: {e}")
@@ -928,6 +1531,193 @@ class Database:
             logger.error(f"Error creating monthly snapshot: {e}")
             return False
     
+    def iter_active_job_rows(self, limit: int, after: Optional[Tuple[datetime, int]] = None,
+                             company: str = None, location: str = None, work_type: str = None,
+                             department: str = None, itersize: int = 2000):
+        """Stream active jobs newest-first through a server-side cursor.
+        
+        Keyset-paginated on (last_seen, id): pass the last row's position as
+        `after` to continue. company/location match case-insensitive substrings,
+        work_type/department match exactly (work_type case-insensitively).
+        Yields tuples in ACTIVE_JOB_COLUMNS order; the connection is held until
+        the generator is exhausted or closed.
+        """
+        conditions = ["j.status = 'active'"]
+        params = []
+        if after:
+            conditions.append("(j.last_seen, j.id) < (%s, %s)")
+            params.extend(after)
+        if company:
+            conditions.append("c.company_name ILIKE %s")
+            params.append(f"%{company}%")
+        if location:
+            conditions.append("j.location ILIKE %s")
+            params.append(f"%{location}%")
+        if work_type:
+            conditions.append("LOWER(j.work_type) = LOWER(%s)")
+            params.append(work_type)
+        if department:
+            conditions.append("j.department = %s")
+            params.append(department)
+        params.append(limit)
+        
+        with self.get_connection() as conn:
+            try:
+                with conn.cursor(name='iter_active_jobs') as cur:
+                    cur.itersize = itersize
+                    cur.execute(f"""
+                        SELECT {', '.join(ACTIVE_JOB_COLUMNS.values())}
+                        FROM job_archive j
+                        JOIN companies c ON j.company_id = c.id
+                        WHERE {' AND '.join(conditions)}
+                        ORDER BY j.last_seen DESC, j.id DESC
+                        LIMIT %s
+                    """, params)
+                    yield from cur
+            finally:
+                # Named cursors live in a transaction; don't hand it back to the pool open
+                conn.rollback()
+    
+    def copy_jobs_export(self, out, since: Optional[datetime] = None, on_watermark=None):
+        """COPY job_archive joined with company fields to `out` as CSV with a header.
+        
+        Rows are written by Postgres straight into out.write(). With `since`,
+        only rows whose last_seen or closed_at is later are exported. The
+        watermark is read in the same REPEATABLE READ snapshot as the COPY and
+        handed to on_watermark before any data; it is the `since` for the next
+        incremental export. Returns it too.
+        
+        last_seen/closed_at are stamped with NOW(), the writing transaction's
+        start, so a transaction still open when the snapshot is taken can
+        later commit rows stamped below the newest visible value. The
+        watermark is therefore the newest visible stamp capped at this
+        transaction's own NOW() minus EXPORT_WATERMARK_LAG_SECONDS: any writer
+        shorter than the lag that is still open here started after it. Only
+        the export's own snapshot is consulted, so no monitoring privileges
+        are needed. Consecutive incremental exports overlap as a result:
+        clients must upsert by id rather than append.
+        """
+        select = f"""
+            SELECT {', '.join(f'{expr} AS {name}' for name, expr in EXPORT_JOB_COLUMNS.items())}
+            FROM job_archive j
+            JOIN companies c ON j.company_id = c.id
+        """
+        with self.get_connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                    cur.execute("SET LOCAL DateStyle = 'ISO, YMD'")
+                    cur.execute("""
+                        SELECT LEAST(
+                            GREATEST((SELECT MAX(last_seen) FROM job_archive), (SELECT MAX(closed_at) FROM job_archive)),
+                            NOW()::TIMESTAMP - make_interval(secs => %s)
+                        )
+                    """, (EXPORT_WATERMARK_LAG_SECONDS,))
+                    watermark = cur.fetchone()[0]
+                    if on_watermark:
+                        on_watermark(watermark)
+                    if since:
+                        select += cur.mogrify(" WHERE (j.last_seen > %s OR j.closed_at > %s)", (since, since)).decode()
+                    cur.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)", out)
+                    return watermark
+            finally:
+                conn.rollback()
+    
+    def count_hiring_companies(self) -> int:
+        """Companies with at least one active job (from the ingest-maintained counters)"""
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT COUNT(*) FROM company_stats WHERE active_jobs > 0")
+                    return cur.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting hiring companies: {e}")
+            return 0
+    
+    def get_company_header(self, company_id: int, facet_limit: int = 200) -> Optional[Dict]:
+        """Company row plus job counters, without the job list.
+        
+        All counters come from company_stats (kept current at ingest), so the
+        company's archive history is never counted here. `departments`/
+        `locations` are the most common values among active jobs (up to
+        facet_limit) for building filters, read through
+        idx_job_archive_company_status.
+        """
+        stats_query = """
+            SELECT active_jobs, total_jobs, locations_count, departments_count
+            FROM company_stats WHERE company_id = %s
+        """
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("SELECT * FROM companies WHERE id = %s", (company_id,))
+                company = cur.fetchone()
+                if not company:
+                    return None
+                header = dict(company)
+                
+                cur.execute(stats_query, (company_id,))
+                stats = cur.fetchone()
+                if stats is None or stats['total_jobs'] is None:
+                    self._refresh_company_stats(cur, [company_id])
+                    conn.commit()
+                    cur.execute(stats_query, (company_id,))
+                    stats = cur.fetchone()
+                header.update(stats)
+                header['closed_jobs'] = header['total_jobs'] - header['active_jobs']
+                
+                for column, key in (('department', 'departments'), ('location', 'locations')):
+                    cur.execute(f"""
+                        SELECT {column} AS value
+                        FROM job_archive
+                        WHERE company_id = %s AND status = 'active' AND {column} IS NOT NULL AND {column} <> ''
+                        GROUP BY {column}
+                        ORDER BY COUNT(*) DESC, {column}
+                        LIMIT %s
+                    """, (company_id, facet_limit))
+                    header[key] = sorted(row['value'] for row in cur.fetchall())
+                return header
+    
+    def get_company_jobs(self, company_id: int, limit: int = 50, after: Optional[Tuple[datetime, int]] = None,
+                         status: str = None, search: str = None, department: str = None,
+                         location: str = None) -> Tuple[List[Dict], bool]:
+        """One keyset page of a company's jobs, newest first_seen first.
+        
+        `after` is the (first_seen, id) of the previous page's last row. With a
+        status the scan runs on idx_job_archive_company_status_seen in order.
+        Returns (jobs, has_more).
+        """
+        conditions = ["company_id = %s"]
+        params: List[Any] = [company_id]
+        if status:
+            conditions.append("status = %s")
+            params.append(status)
+        if after:
+            conditions.append("(first_seen, id) < (%s, %s)")
+            params.extend(after)
+        if search:
+            conditions.append("title ILIKE %s")
+            params.append(f"%{search}%")
+        if department:
+            conditions.append("department = %s")
+            params.append(department)
+        if location:
+            conditions.append("location = %s")
+            params.append(location)
+        params.append(limit + 1)
+        
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(f"""
+                    SELECT id, job_id, title, location, department, work_type, job_url,
+                           posted_date, salary_min, salary_max, salary_currency, status, first_seen, last_seen
+                    FROM job_archive
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY first_seen DESC, id DESC
+                    LIMIT %s
+                """, params)
+                jobs = [dict(row) for row in cur.fetchall()]
+        return jobs[:limit], len(jobs) > limit
+    
     def get_job_count_changes(self, days: int = 7, threshold_percent: float = 10.0) -> Tuple[List[Dict], List[Dict]]:
         try:
             with self.get_connection() as conn:
@@ -991,21 +1781,115 @@ class Database:
             logger.error(f"Error getting location expansions: {e}")
             return []
     
+    def _refresh_company_stats(self, cur, company_ids: List[int]):
+        """Recompute company_stats for the given companies on the caller's cursor.
+        
+        Only touched companies are recounted (via the company_id index), and a
+        row's updated_at only moves when a counter actually changed.
+        """
+        if not company_ids:
+            return
+        cur.execute("""
+            INSERT INTO company_stats (company_id, active_jobs, total_jobs, locations_count, departments_count, updated_at)
+            SELECT c.id,
+                   COUNT(j.id) FILTER (WHERE j.status = 'active'),
+                   COUNT(j.id),
+                   COUNT(DISTINCT j.location),
+                   COUNT(DISTINCT j.department),
+                   NOW()
+            FROM unnest(%s::int[]) AS c(id)
+            JOIN companies co ON co.id = c.id
+            LEFT JOIN job_archive j ON j.company_id = c.id
+            GROUP BY c.id
+            ON CONFLICT (company_id) DO UPDATE SET
+                active_jobs = EXCLUDED.active_jobs,
+                total_jobs = EXCLUDED.total_jobs,
+                locations_count = EXCLUDED.locations_count,
+                departments_count = EXCLUDED.departments_count,
+                updated_at = NOW()
+            WHERE (company_stats.active_jobs, company_stats.total_jobs, company_stats.locations_count, company_stats.departments_count)
+                IS DISTINCT FROM (EXCLUDED.active_jobs, EXCLUDED.total_jobs, EXCLUDED.locations_count, EXCLUDED.departments_count)
+        """, (list(company_ids),))
+    
+    def rebuild_company_stats(self, only_missing: bool = True) -> int:
+        """Backfill company_stats (companies with no row yet, or one without total_jobs), or recount every company"""
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    if only_missing:
+                        cur.execute("""
+                            SELECT c.id FROM companies c
+                            WHERE NOT EXISTS (SELECT 1 FROM company_stats s WHERE s.company_id = c.id AND s.total_jobs IS NOT NULL)
+                        """)
+                    else:
+                        cur.execute("SELECT id FROM companies")
+                    company_ids = [row[0] for row in cur.fetchall()]
+                    self._refresh_company_stats(cur, company_ids)
+                    conn.commit()
+                    if company_ids:
+                        logger.info(f"📊 Rebuilt stats for {len(company_ids)} companies")
+                    return len(company_ids)
+        except Exception as e:
+            logger.error(f"Error rebuilding company stats: {e}")
+            return 0
+    
+    # Shared by both archive paths. Candidates are (company_id, location, job_count)
+    # for locations the company has never listed before; an event is only written
+    # when the company already has a snapshot (i.e. this isn't its first scan) and
+    # no established (>1 day old) posting already covers the location.
+    _EXPANSION_INSERT_SQL = """
+        INSERT INTO intelligence_events (company_id, event_type, metadata, detected_at)
+        SELECT c.company_id, 'location_expansion',
+               jsonb_build_object('location', c.location, 'job_count', c.job_count), NOW()
+        FROM ({candidates}) AS c(company_id, location, job_count)
+        WHERE EXISTS (SELECT 1 FROM snapshots_6h sn WHERE sn.company_id = c.company_id)
+        AND NOT EXISTS (
+            SELECT 1 FROM job_archive ja
+            WHERE ja.company_id = c.company_id
+            AND ja.first_seen < NOW() - INTERVAL '1 day'
+            AND STRPOS(LOWER(ja.location), LOWER(c.location)) > 0
+        )
+    """
+    
+    def _record_location_expansions(self, cur, candidates: List[Tuple[int, str, int]]) -> int:
+        """Insert location_expansion events for all candidates in one statement on the caller's cursor"""
+        if not candidates:
+            return 0
+        company_ids, locations, job_counts = (list(col) for col in zip(*candidates))
+        cur.execute(
+            self._EXPANSION_INSERT_SQL.format(
+                candidates="SELECT * FROM unnest(%s::int[], %s::text[], %s::int[])"
+            ),
+            (company_ids, locations, job_counts)
+        )
+        return cur.rowcount
+    
+    def _record_staged_location_expansions(self, cur, company_ids: List[int]) -> int:
+        """Detect new locations in _job_stage against job_archive and record them in one statement"""
+        # The explicit company_id filter keeps the anti-join on the company index
+        # instead of hashing every location in job_archive
+        cur.execute(self._EXPANSION_INSERT_SQL.format(candidates="""
+            SELECT s.company_id, MIN(s.location), COUNT(*)::int
+            FROM _job_stage s
+            WHERE s.location IS NOT NULL AND TRIM(s.location) <> ''
+            AND NOT EXISTS (
+                SELECT 1 FROM job_archive ja
+                WHERE ja.company_id = ANY(%s)
+                AND ja.company_id = s.company_id
+                AND LOWER(ja.location) = LOWER(s.location)
+            )
+            GROUP BY s.company_id, LOWER(s.location)
+        """), (company_ids,))
+        return cur.rowcount
+    
     def track_location_expansion(self, company_id: int, new_location: str, job_count: int = 1):
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("SELECT COUNT(*) FROM snapshots_6h WHERE company_id = %s", (company_id,))
-                    snapshot_count = cur.fetchone()[0]
-                    if snapshot_count == 0:
-                        logger.debug(f"Skipping location expansion for company {company_id} (first scan)")
-                        return
-                    cur.execute("SELECT id FROM job_archive WHERE company_id = %s AND location ILIKE %s AND first_seen < NOW() - INTERVAL '1 day'", (company_id, f'%{new_location}%'))
-                    if cur.fetchone():
-                        return
-                    cur.execute("INSERT INTO intelligence_events (company_id, event_type, metadata, detected_at) VALUES (%s, 'location_expansion', %s, NOW())", (company_id, json.dumps({'location': new_location, 'job_count': job_count})))
+                    recorded = self._record_location_expansions(cur, [(company_id, new_location, job_count)])
                     conn.commit()
-                    logger.info(f"📍 Location expansion detected: {new_location}")
+                    if recorded:
+                        logger.info(f"📍 Location expansion detected: {new_location}")
         except Exception as e:
             logger.error(f"Error tracking location expansion: {e}")
     
@@ -1093,6 +1977,58 @@ class Database:
                 'by_department': {}
             }
     
+    def _bump_data_generation(self, cur):
+        """Advance the ingest generation in the caller's transaction"""
+        cur.execute("""
+            INSERT INTO app_state (key, value, updated_at)
+            VALUES ('ingest_generation', 1, NOW())
+            ON CONFLICT (key) DO UPDATE SET value = app_state.value + 1, updated_at = NOW()
+        """)
+    
+    def bump_data_generation(self):
+        """Advance the ingest generation in its own short transaction.
+        
+        Called once when a write job (collection run, seed expansion, rollup
+        refresh...) finishes, never inside ingest transactions: the single
+        app_state row would serialize concurrent writers on its row lock.
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    self._bump_data_generation(cur)
+                    conn.commit()
+        except Exception as e:
+            logger.error(f"Error bumping data generation: {e}")
+    
+    def get_data_version(self) -> Optional[Dict[str, Any]]:
+        """Cheap fingerprint of API-visible data for HTTP validators.
+        
+        Combines the ingest generation (bumped once per finished write job, see
+        bump_data_generation), the newest active last_seen, and the newest
+        snapshot_time. Each part is a single-row index lookup. Response cache
+        keys use the generation only; ETags use all three.
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT
+                            (SELECT value FROM app_state WHERE key = 'ingest_generation'),
+                            (SELECT updated_at FROM app_state WHERE key = 'ingest_generation'),
+                            (SELECT MAX(last_seen) FROM job_archive WHERE status = 'active'),
+                            (SELECT MAX(snapshot_time) FROM snapshots_6h)
+                    """)
+                    generation, generation_at, last_seen, snapshot_time = cur.fetchone()
+                    return {
+                        'generation': generation or 0,
+                        'last_seen': last_seen,
+                        'snapshot_time': snapshot_time,
+                        'last_modified': max((t for t in (generation_at, last_seen, snapshot_time) if t), default=None)
+                    }
+        except Exception as e:
+            logger.error(f"Error getting data version: {e}")
+            return None
+    
     def get_stats(self) -> Dict[str, Any]:
         try:
             with self.get_connection() as conn:
@@ -1153,6 +2089,77 @@ class Database:
             return []
     
     def get_advanced_analytics(self) -> Dict:
+        """Advanced analytics served from the 'advanced_analytics' rollup.
+        
+        Falls back to computing (and storing) the rollup when it doesn't exist yet.
+        """
+        rollup = self.get_analytics_rollup('advanced_analytics')
+        if rollup is None:
+            self.refresh_analytics_rollups()
+            rollup = self.get_analytics_rollup('advanced_analytics')
+        return rollup['payload'] if rollup else {}
+    
+    def get_analytics_rollup(self, name: str) -> Optional[Dict]:
+        """Return {'payload', 'refreshed_at', 'refresh_ms', 'age_seconds'} for a rollup, or None"""
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute("""
+                        SELECT payload, refreshed_at, refresh_ms,
+                               EXTRACT(EPOCH FROM (NOW() - refreshed_at))::INTEGER AS age_seconds
+                        FROM analytics_rollups
+                        WHERE name = %s
+                    """, (name,))
+                    row = cur.fetchone()
+                    return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error reading analytics rollup {name}: {e}")
+            return None
+    
+    def refresh_analytics_rollups(self) -> Dict[str, int]:
+        """Recompute the analytics rollups and store them with freshness timestamps.
+        
+        Called from daily maintenance (after every refresh/discovery run) and on
+        a scheduler interval. Returns {rollup name: refresh time in ms}.
+        
+        Payloads are encoded like the app's JSON provider (orjson: ISO 8601
+        dates) so rollup-backed responses match the live ones.
+        """
+        # Imported here: the middleware package sets up auth etc. on import,
+        # which collector processes don't need
+        from middleware.json_provider import stored_dumps
+
+        rollups = {
+            'advanced_analytics': self.compute_advanced_analytics,
+            'salary_insights': self.compute_salary_insights,
+        }
+        timings = {}
+        for name, compute in rollups.items():
+            started = time.perf_counter()
+            payload = compute()
+            if not payload:
+                logger.warning(f"Skipping empty analytics rollup {name}")
+                continue
+            refresh_ms = int((time.perf_counter() - started) * 1000)
+            try:
+                with self.get_connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute("""
+                            INSERT INTO analytics_rollups (name, payload, refreshed_at, refresh_ms)
+                            VALUES (%s, %s, NOW(), %s)
+                            ON CONFLICT (name) DO UPDATE SET
+                                payload = EXCLUDED.payload,
+                                refreshed_at = EXCLUDED.refreshed_at,
+                                refresh_ms = EXCLUDED.refresh_ms
+                        """, (name, stored_dumps(payload), refresh_ms))
+                        conn.commit()
+                timings[name] = refresh_ms
+                logger.info(f"📊 Refreshed analytics rollup {name} in {refresh_ms}ms")
+            except Exception as e:
+                logger.error(f"Error storing analytics rollup {name}: {e}")
+        return timings
+    
+    def compute_advanced_analytics(self) -> Dict:
         """Get comprehensive advanced analytics with skills extraction - FIXED GROWTH METRICS"""
         try:
             with self.get_connection() as conn:
@@ -1239,19 +2246,24 @@ class Database:
                         'jobs_with_salary': salary_row['with_salary'] or 0
                     }
                     
-                    # Skills extraction
+                    # Skills (tagged at ingest; rows still waiting for the backfill are tagged here)
                     cur.execute("""
-                        SELECT title
-                        FROM job_archive
-                        WHERE status = 'active' AND title IS NOT NULL
+                        SELECT skill, COUNT(*) AS job_count
+                        FROM job_archive, unnest(skills) AS skill
+                        WHERE status = 'active'
+                        GROUP BY skill
                     """)
-                    jobs = cur.fetchall()
+                    all_skills = {row['skill']: row['job_count'] for row in cur.fetchall()}
                     
-                    all_skills = {}
-                    for job in jobs:
-                        skills = self._extract_skills_from_text(job['title'])
-                        for skill, count in skills.items():
-                            all_skills[skill] = all_skills.get(skill, 0) + count
+                    cur.execute("""
+                        SELECT title, COUNT(*) AS job_count
+                        FROM job_archive
+                        WHERE status = 'active' AND title IS NOT NULL AND skills IS NULL
+                        GROUP BY title
+                    """)
+                    untagged = count_skills((row['title'], row['job_count']) for row in cur.fetchall())
+                    for skill, count in untagged.items():
+                        all_skills[skill] = all_skills.get(skill, 0) + count
                     
                     top_skills = dict(sorted(all_skills.items(), key=lambda x: x[1], reverse=True)[:30])
                     
@@ -1335,6 +2347,140 @@ class Database:
             logger.error(f"Error getting advanced analytics: {e}", exc_info=True)
             return {}
 
+    def get_salary_insights(self, currency: str = None, work_type: str = None,
+                            department: str = None) -> Optional[Dict]:
+        """Salary insights; unfiltered requests are served from the 'salary_insights' rollup"""
+        if currency or work_type or department:
+            return self.compute_salary_insights(currency, work_type, department)
+        rollup = self.get_analytics_rollup('salary_insights')
+        if rollup is None:
+            self.refresh_analytics_rollups()
+            rollup = self.get_analytics_rollup('salary_insights')
+        return rollup['payload'] if rollup else self.compute_salary_insights()
+    
+    def compute_salary_insights(self, currency: str = None, work_type: str = None,
+                                department: str = None) -> Optional[Dict]:
+        """Salary overview, breakdowns and percentiles for active jobs in one statement.
+        
+        Every section aggregates the same materialized CTE of salaried rows, so
+        the archive is read once however many sections there are; the overall
+        job count (for the "% with salary" figure) is a count on the active-jobs
+        index. work_type/department filter both; currency (salary_currency,
+        NULL treated as USD) only applies to the salaried rows.
+        """
+        conditions = []
+        params = []
+        if work_type:
+            conditions.append("LOWER(j.work_type) = LOWER(%s)")
+            params.append(work_type)
+        if department:
+            conditions.append("j.department = %s")
+            params.append(department)
+        salary_conditions = list(conditions)
+        salary_params = list(params)
+        if currency:
+            salary_conditions.append("COALESCE(j.salary_currency, 'USD') = UPPER(%s)")
+            salary_params.append(currency)
+        
+        where = ''.join(f" AND {c}" for c in conditions)
+        salary_where = ''.join(f" AND {c}" for c in salary_conditions)
+        
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    # mid is NULL for rows with only salary_min: they count towards
+                    # the per-group job counts but not averages, buckets or percentiles
+                    cur.execute(f"""
+                        WITH s AS MATERIALIZED (
+                            SELECT j.title, j.location, j.company_id, j.salary_min, j.salary_max,
+                                   COALESCE(j.salary_currency, 'USD') AS currency,
+                                   (j.salary_min + j.salary_max) / 2 AS mid
+                            FROM job_archive j
+                            WHERE j.status = 'active' AND j.salary_min IS NOT NULL{salary_where}
+                        ),
+                        totals AS (
+                            SELECT COUNT(mid) AS jobs_with_salary,
+                                   MIN(salary_min) FILTER (WHERE mid IS NOT NULL) AS min_salary,
+                                   MAX(salary_max) AS max_salary,
+                                   PERCENTILE_CONT(ARRAY[0.10, 0.25, 0.50, 0.75, 0.90])
+                                       WITHIN GROUP (ORDER BY mid) AS percentiles
+                            FROM s
+                        )
+                        SELECT
+                            t.jobs_with_salary, t.min_salary, t.max_salary, t.percentiles,
+                            (SELECT COUNT(*) FROM job_archive j WHERE j.status = 'active'{where}) AS total_jobs,
+                            (SELECT COALESCE(json_agg(r), '[]') FROM (
+                                SELECT title AS role, AVG(mid) AS avg_salary, COUNT(*) AS count
+                                FROM s
+                                GROUP BY title
+                                ORDER BY avg_salary DESC NULLS LAST
+                                LIMIT 20
+                            ) r) AS by_role,
+                            (SELECT COALESCE(json_agg(r), '[]') FROM (
+                                SELECT location, AVG(mid) AS avg_salary, COUNT(*) AS count
+                                FROM s
+                                WHERE location IS NOT NULL
+                                GROUP BY location
+                                ORDER BY avg_salary DESC NULLS LAST
+                                LIMIT 15
+                            ) r) AS by_location,
+                            (SELECT COALESCE(json_agg(r), '[]') FROM (
+                                SELECT c.company_name AS company, AVG(s.mid) AS avg_salary, COUNT(*) AS count
+                                FROM s
+                                JOIN companies c ON c.id = s.company_id
+                                GROUP BY c.company_name
+                                ORDER BY avg_salary DESC NULLS LAST
+                                LIMIT 15
+                            ) r) AS by_company,
+                            (SELECT COALESCE(json_agg(r), '[]') FROM (
+                                SELECT
+                                    CASE
+                                        WHEN mid < 75000 THEN '<$75k'
+                                        WHEN mid < 100000 THEN '$75k-$100k'
+                                        WHEN mid < 150000 THEN '$100k-$150k'
+                                        WHEN mid < 200000 THEN '$150k-$200k'
+                                        WHEN mid < 250000 THEN '$200k-$250k'
+                                        ELSE '$250k+'
+                                    END AS range,
+                                    COUNT(*) AS count
+                                FROM s
+                                WHERE mid IS NOT NULL
+                                GROUP BY range
+                                ORDER BY MIN(mid)
+                            ) r) AS distribution,
+                            (SELECT COALESCE(json_agg(r), '[]') FROM (
+                                SELECT s.title AS role, c.company_name AS company, s.location,
+                                       s.salary_min, s.salary_max, s.currency, COUNT(*) AS count
+                                FROM s
+                                JOIN companies c ON c.id = s.company_id
+                                GROUP BY s.title, c.company_name, s.location, s.salary_min, s.salary_max, s.currency
+                                ORDER BY s.salary_max DESC NULLS LAST
+                                LIMIT 100
+                            ) r) AS detailed
+                        FROM totals t
+                    """, salary_params + params)
+                    row = cur.fetchone()
+            
+            p10, p25, p50, p75, p90 = row['percentiles'] or [None] * 5
+            return {
+                'overview': {
+                    'jobs_with_salary': row['jobs_with_salary'],
+                    'min_salary': row['min_salary'],
+                    'max_salary': row['max_salary'],
+                    'median_salary': p50,
+                    'total_jobs': row['total_jobs'],
+                },
+                'by_role': row['by_role'],
+                'by_location': row['by_location'],
+                'by_company': row['by_company'],
+                'distribution': row['distribution'],
+                'detailed': row['detailed'],
+                'percentiles': {'p10': p10, 'p25': p25, 'p50': p50, 'p75': p75, 'p90': p90},
+            }
+        except Exception as e:
+            logger.error(f"Error getting salary insights: {e}", exc_info=True)
+            return None
+
     # ========================================================================
     # TRENDS & RETENTION METRICS - WITH CONFIGURABLE CUTOFF DATE
     # ========================================================================
@@ -1365,40 +2511,50 @@ class Database:
         """Get skills demand trends over time - filtered by configurable cutoff date"""
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                tracked = {skill: key for key, skill in TREND_SKILLS.items()}
+                
+                # LEFT JOIN keeps weeks whose jobs mention none of the tracked skills
                 cur.execute("""
                     SELECT 
                         DATE_TRUNC('week', first_seen) as week,
-                        title,
+                        skill,
                         COUNT(*) as job_count
                     FROM job_archive
+                    LEFT JOIN LATERAL unnest(skills) AS skill ON skill = ANY(%s)
                     WHERE first_seen > NOW() - INTERVAL %s
                     AND first_seen >= %s::timestamp
                     AND status = 'active'
-                    GROUP BY week, title
-                    ORDER BY week, job_count DESC
-                """, (f'{days} days', TRENDS_CUTOFF_DATE))
+                    GROUP BY week, skill
+                    ORDER BY week
+                """, (list(tracked), f'{days} days', TRENDS_CUTOFF_DATE))
                 
                 weekly_data = {}
-                skills_to_track = [
-                    'python', 'javascript', 'react', 'java', 'typescript',
-                    'node', 'aws', 'kubernetes', 'docker', 'sql',
-                    'go', 'rust', 'vue', 'angular', 'graphql',
-                    'mongodb', 'postgresql', 'redis', 'kafka', 'spark',
-                    'machine learning', 'ai', 'data science', 'devops',
-                    'tensorflow', 'pytorch', 'backend', 'frontend', 'fullstack'
-                ]
-                
                 for row in cur.fetchall():
                     week = row['week'].isoformat()
-                    title = row['title'].lower()
-                    count = row['job_count']
-                    
                     if week not in weekly_data:
-                        weekly_data[week] = {skill: 0 for skill in skills_to_track}
-                    
-                    for skill in skills_to_track:
-                        if skill in title:
-                            weekly_data[week][skill] += count
+                        weekly_data[week] = {key: 0 for key in TREND_SKILLS}
+                    if row['skill']:
+                        weekly_data[week][tracked[row['skill']]] += row['job_count']
+                
+                # Jobs not tagged yet (backfill pending)
+                cur.execute("""
+                    SELECT 
+                        DATE_TRUNC('week', first_seen) as week,
+                        title,
+                        COUNT(*) as job_count
+                    FROM job_archive
+                    WHERE first_seen > NOW() - INTERVAL %s
+                    AND first_seen >= %s::timestamp
+                    AND status = 'active'
+                    AND skills IS NULL
+                    GROUP BY week, title
+                """, (f'{days} days', TRENDS_CUTOFF_DATE))
+                
+                for row in cur.fetchall():
+                    week = weekly_data[row['week'].isoformat()]
+                    for skill in tag_title(row['title']):
+                        if skill in tracked:
+                            week[tracked[skill]] += row['job_count']
                 
                 return weekly_data
 
@@ -1536,6 +2692,23 @@ class Database:
                 conn.commit()
                 return deleted
 
+    def purge_closed_jobs(self, days_to_keep=90):
+        """Delete jobs closed for more than days_to_keep days, keeping company_stats in step"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM job_archive
+                    WHERE status = 'closed'
+                      AND last_seen < NOW() - INTERVAL %s
+                    RETURNING company_id
+                """, (f'{days_to_keep} days',))
+                company_ids = {row[0] for row in cur.fetchall()}
+                deleted = cur.rowcount
+                # Same transaction: total_jobs and the distinct location/department counts include closed jobs
+                self._refresh_company_stats(cur, sorted(company_ids))
+                conn.commit()
+                return deleted
+
     def add_performance_indexes(self):
         """Add missing indexes for better query performance"""
         with self.get_connection() as conn:
@@ -1562,3 +2735,74 @@ def get_db() -> Database:
     if _db_instance is None:
         _db_instance = Database()
     return _db_instance
+
+
+# ============================================================================
+# ASYNC FACADE (for asyncio collectors)
+# ============================================================================
+
+class AsyncDatabase:
+    """Awaitable facade over Database for code running on an asyncio event loop.
+    
+    psycopg2 calls block, so they run on a dedicated thread pool instead of the
+    loop. DB_ASYNC_WORKERS bounds how many run at once; extra calls queue without
+    holding up in-flight HTTP fetches. Keep it below the pool size so the API
+    still gets connections during a collection run.
+    """
+    
+    def __init__(self, db: Database = None, max_workers: int = None):
+        self.db = db or get_db()
+        self.max_workers = max_workers or int(os.getenv('DB_ASYNC_WORKERS', 8))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='db-async')
+    
+    async def run(self, func, *args, **kwargs):
+        """Run any blocking Database call (or other callable) on the DB executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def add_company(self, *args, **kwargs) -> Optional[int]:
+        return await self.run(self.db.add_company, *args, **kwargs)
+    
+    async def update_company_job_count(self, company_id: int, job_count: int):
+        return await self.run(self.db.update_company_job_count, company_id, job_count)
+    
+    async def get_companies_for_refresh(self, *args, **kwargs) -> List[Dict]:
+        return await self.run(self.db.get_companies_for_refresh, *args, **kwargs)
+    
+    async def archive_jobs_bulk(self, boards: Dict[int, List[Dict]], partial_company_ids: Set[int] = None) -> Tuple[int, int, int]:
+        return await self.run(self.db.archive_jobs_bulk, boards, partial_company_ids)
+    
+    async def insert_seeds(self, seeds: List[Tuple[str, str, str, int]]) -> int:
+        return await self.run(self.db.insert_seeds, seeds)
+    
+    async def get_seeds(self, *args, **kwargs) -> List[Dict]:
+        return await self.run(self.db.get_seeds, *args, **kwargs)
+    
+    async def record_seed_outcomes(self, outcomes: Dict[str, Tuple[int, int]]) -> int:
+        return await self.run(self.db.record_seed_outcomes, outcomes)
+    
+    async def load_probe_cache(self, tokens: List[str]) -> List[Dict]:
+        return await self.run(self.db.load_probe_cache, tokens)
+    
+    async def save_probe_cache(self, rows: List[Tuple]) -> int:
+        return await self.run(self.db.save_probe_cache, rows)
+    
+    async def increment_seed_tested(self, company_name: str):
+        return await self.run(self.db.increment_seed_tested, company_name)
+    
+    async def increment_seed_success(self, company_name: str):
+        return await self.run(self.db.increment_seed_success, company_name)
+    
+    async def blacklist_poor_seeds(self, *args, **kwargs) -> int:
+        return await self.run(self.db.blacklist_poor_seeds, *args, **kwargs)
+    
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+_async_db_instance = None
+
+def get_async_db() -> AsyncDatabase:
+    global _async_db_instance
+    if _async_db_instance is None:
+        _async_db_instance = AsyncDatabase(get_db())
+    return _async_db_instance
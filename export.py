@@ -0,0 +1,324 @@
+"""Bulk export of job_archive (joined with company fields) for downstream analysis.
+
+Postgres does the row formatting: Database.copy_jobs_export runs
+COPY (SELECT ...) TO STDOUT as CSV on a worker thread, and the bytes flow
+through a bounded pipe to the HTTP response. Depending on the format they are
+
+  csv      passed through as-is
+  csv.gz   gzip-compressed chunk by chunk
+  arrow    parsed by pyarrow's streaming CSV reader into record batches and
+  parquet  written as an Arrow IPC stream / Parquet row groups
+
+so no Python object is built per row in any format (the Arrow formats need
+pyarrow; CSV works without it). The pipe holds at most EXPORT_PIPE_CHUNKS
+chunks: a slow client stalls the COPY instead of buffering the table in memory,
+and a client that disconnects cancels it.
+
+    export = JobExport(get_db(), 'parquet', since=watermark)
+    next_watermark = export.start()   # raises if the query fails
+    response = Response(export.stream(), mimetype=export.mimetype)
+    response.call_on_close(export.close)
+"""
+
+import os
+import zlib
+import queue
+import logging
+import threading
+from datetime import datetime
+from typing import Iterator, Optional
+
+from database import Database, EXPORT_JOB_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+ARROW_FORMATS = ('arrow', 'parquet')
+
+EXPORT_PIPE_CHUNKS = int(os.getenv('EXPORT_PIPE_CHUNKS', 64))
+EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', 256 * 1024))
+EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', 6))
+EXPORT_MAX_CONCURRENT = int(os.getenv('EXPORT_MAX_CONCURRENT', 2))
+
+# Each export holds a pooled connection for its whole duration
+_export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+
+def _arrow_schema():
+    """Column types for the Arrow formats (timestamps are naive UTC, like the database)"""
+    types = {
+        'id': pa.int32(), 'company_id': pa.int32(), 'posted_date': pa.date32(),
+        'salary_min': pa.int32(), 'salary_max': pa.int32(),
+        'first_seen': pa.timestamp('us'), 'last_seen': pa.timestamp('us'), 'closed_at': pa.timestamp('us'),
+    }
+    return {name: types.get(name, pa.string()) for name in EXPORT_JOB_COLUMNS}
+
+
+class ExportCancelled(Exception):
+    """The consumer went away; raised inside the COPY to abort it"""
+
+
+class ExportBusy(Exception):
+    """EXPORT_MAX_CONCURRENT exports are already running"""
+
+
+class _Pipe:
+    """Bounded byte pipe from the COPY thread (write) to the response (chunks / read).
+
+    psycopg2 calls write() once per row, so rows are coalesced into
+    EXPORT_CHUNK_BYTES chunks before they cross the queue.
+    """
+
+    _EOF = object()
+
+    def __init__(self, max_chunks: int = EXPORT_PIPE_CHUNKS, chunk_bytes: int = EXPORT_CHUNK_BYTES):
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._chunk_bytes = chunk_bytes
+        self._pending = bytearray()
+        self._readbuf = b''
+        self._done = False
+        self.cancelled = threading.Event()
+        self.bytes_in = 0
+
+    # -- producer side (COPY thread) --
+
+    def _put(self, item):
+        while True:
+            if self.cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, data) -> int:
+        self._pending += data
+        if len(self._pending) >= self._chunk_bytes:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+        return len(data)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Flush and signal the end of the stream (or the error that ended it)"""
+        try:
+            if error is None and self._pending:
+                self._put(bytes(self._pending))
+            self._put(error if error is not None else self._EOF)
+        except ExportCancelled:
+            pass
+
+    # -- consumer side --
+
+    def chunks(self) -> Iterator[bytes]:
+        while not self._done:
+            item = self._queue.get()
+            if item is self._EOF:
+                self._done = True
+                return
+            if isinstance(item, BaseException):
+                self._done = True
+                raise item
+            self.bytes_in += len(item)
+            yield item
+
+    def read(self, size: int = -1) -> bytes:
+        """File-like read for pyarrow's CSV reader"""
+        if size is None or size < 0:
+            return self._readbuf + b''.join(self.chunks())
+        while len(self._readbuf) < size and not self._done:
+            self._readbuf += next(self.chunks(), b'')
+        data, self._readbuf = self._readbuf[:size], self._readbuf[size:]
+        return data
+
+    def cancel(self):
+        self.cancelled.set()
+        # Unblock a producer waiting on a full queue
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    # pyarrow wraps file-likes and checks these
+    closed = False
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class _Sink:
+    """Write-only file the Arrow writers fill and the response generator drains"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class JobExport:
+    """One streaming export of job_archive in one of EXPORT_FORMATS"""
+
+    def __init__(self, db: Database, fmt: str, since: Optional[datetime] = None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        if fmt in ARROW_FORMATS and not PYARROW_AVAILABLE:
+            raise ValueError(f"format {fmt} needs pyarrow, which is not installed")
+        self.db = db
+        self.format = fmt
+        self.since = since
+        self.mimetype, self.extension = EXPORT_FORMATS[fmt]
+        self.watermark = None
+        self.stats = {'rows': None, 'csv_bytes': 0, 'bytes_sent': 0}
+        self._pipe = _Pipe()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = None
+        self._slot = False
+
+    def start(self, timeout: float = 60) -> Optional[datetime]:
+        """Begin the COPY and return the watermark once the snapshot is taken.
+
+        Raises ExportBusy when too many exports are running, or the query error.
+        """
+        if not _export_slots.acquire(blocking=False):
+            raise ExportBusy()
+        self._slot = True
+        self._thread = threading.Thread(target=self._run, name='job-export', daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout) or self._error is not None:
+            self.close()
+            raise self._error or TimeoutError('export did not start in time')
+        return self.watermark
+
+    def _run(self):
+        def on_watermark(watermark):
+            self.watermark = watermark
+            self._ready.set()
+
+        error = None
+        try:
+            self.db.copy_jobs_export(self._pipe, since=self.since, on_watermark=on_watermark)
+        except ExportCancelled:
+            logger.info("Job export cancelled by the client")
+        except Exception as e:
+            logger.error(f"Job export failed: {e}", exc_info=True)
+            error = e
+        finally:
+            if not self._ready.is_set():
+                self._error = error or RuntimeError('export ended before the snapshot was taken')
+                self._ready.set()
+            self._pipe.finish(error)
+
+    def stream(self) -> Iterator[bytes]:
+        """Response body; closing it early cancels the COPY.
+        
+        A generator that is never started never runs its finally, so the
+        caller must also arrange for close() (response.call_on_close).
+        """
+        try:
+            if self.format == 'csv':
+                body = self._pipe.chunks()
+            elif self.format == 'csv.gz':
+                body = self._gzip(self._pipe.chunks())
+            else:
+                body = self._arrow()
+            for chunk in body:
+                if chunk:
+                    self.stats['bytes_sent'] += len(chunk)
+                    yield chunk
+            self.stats['csv_bytes'] = self._pipe.bytes_in
+            logger.info(f"Job export complete: {self.format}, since={self.since}, stats={self.stats}")
+        finally:
+            self.close()
+
+    def _gzip(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.flush()
+
+    def _arrow(self) -> Iterator[bytes]:
+        column_types = _arrow_schema()
+        reader = pa_csv.open_csv(
+            self._pipe,
+            read_options=pa_csv.ReadOptions(block_size=4 * 1024 * 1024, use_threads=False),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                null_values=[''],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        schema = reader.schema.set(
+            reader.schema.get_field_index('skills'), pa.field('skills', pa.list_(pa.string()))
+        )
+        sink = _Sink()
+        if self.format == 'arrow':
+            writer = pa.ipc.new_stream(sink, schema)
+        else:
+            writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        rows = 0
+        try:
+            for batch in reader:
+                skills_index = batch.schema.get_field_index('skills')
+                batch = pa.RecordBatch.from_arrays(
+                    [pc.split_pattern(column, '|') if i == skills_index else column
+                     for i, column in enumerate(batch.columns)],
+                    schema=schema,
+                )
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                yield sink.drain()
+        finally:
+            writer.close()
+        self.stats['rows'] = rows
+        yield sink.drain()
+
+    def close(self):
+        """Stop the COPY (if still running) and give back the export slot"""
+        self._pipe.cancel()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+        if self._slot:
+            self._slot = False
+            _export_slots.release()
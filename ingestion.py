@@ -0,0 +1,305 @@
+"""Write-behind ingestion queue between the scrapers and Postgres.
+
+Scraper coroutines put scraped boards on a bounded asyncio queue and go straight
+back to fetching. A small pool of writer workers drains the queue in batches and
+writes each batch with one Database.archive_jobs_bulk call, so scraping
+concurrency (hundreds of coroutines) and DB concurrency (INGEST_WRITERS) are
+tuned independently.
+
+    queue = IngestionQueue(get_async_db())
+    await queue.start()
+    await queue.put(IngestItem(...))   # waits when the queue is full (backpressure)
+    await queue.close()                # flushes everything still queued
+
+SeedOutcomeBuffer does the same for seed accounting: test/success outcomes are
+counted in memory and flushed as one token-keyed UPDATE.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
+
+from database import Database, AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestItem:
+    """One scraped board waiting to be written"""
+    company_name: str
+    ats_type: str
+    board_url: str
+    jobs: List[Dict]
+    company_id: Optional[int] = None  # known for refreshes; upserted by the writer for discoveries
+    job_count: Optional[int] = None  # board-reported total, defaults to len(jobs)
+    partial: bool = False  # only part of the board was scraped: don't close missing jobs
+    # v7 discovery: upsert with this token, touching only job_count/last_scraped of existing rows
+    discovery_token: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class IngestionMetrics:
+    """Counters and per-batch latency for the writer workers"""
+    boards_enqueued: int = 0
+    boards_written: int = 0
+    boards_failed: int = 0
+    jobs_written: int = 0
+    new_jobs: int = 0
+    updated_jobs: int = 0
+    closed_jobs: int = 0
+    batches: int = 0
+    backpressure_waits: int = 0
+    batch_latencies: deque = field(default_factory=lambda: deque(maxlen=500))
+    queue_delays: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    @staticmethod
+    def _percentile(values, pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def to_dict(self) -> Dict:
+        return {
+            'boards_enqueued': self.boards_enqueued,
+            'boards_written': self.boards_written,
+            'boards_failed': self.boards_failed,
+            'jobs_written': self.jobs_written,
+            'new_jobs': self.new_jobs,
+            'updated_jobs': self.updated_jobs,
+            'closed_jobs': self.closed_jobs,
+            'batches': self.batches,
+            'backpressure_waits': self.backpressure_waits,
+            'batch_latency_ms': {
+                'avg': round(sum(self.batch_latencies) / len(self.batch_latencies) * 1000, 1) if self.batch_latencies else 0.0,
+                'p95': round(self._percentile(self.batch_latencies, 0.95) * 1000, 1),
+                'max': round(max(self.batch_latencies) * 1000, 1) if self.batch_latencies else 0.0,
+            },
+            'queue_delay_ms': {
+                'p95': round(self._percentile(self.queue_delays, 0.95) * 1000, 1),
+                'max': round(max(self.queue_delays) * 1000, 1) if self.queue_delays else 0.0,
+            },
+        }
+
+
+_SHUTDOWN = object()
+
+
+class IngestionQueue:
+    """Bounded write-behind queue drained by batching writer workers"""
+
+    def __init__(self, adb: AsyncDatabase, max_size: int = None, batch_size: int = None,
+                 writers: int = None, max_batch_wait: float = None):
+        self.adb = adb
+        self.max_size = max_size or int(os.getenv('INGEST_QUEUE_SIZE', 200))
+        self.batch_size = batch_size or int(os.getenv('INGEST_BATCH_SIZE', 25))
+        self.writers = writers or int(os.getenv('INGEST_WRITERS', 2))
+        self.max_batch_wait = max_batch_wait if max_batch_wait is not None else float(os.getenv('INGEST_BATCH_WAIT', 0.5))
+        self.metrics = IngestionMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._closed = False
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._writer(i), name=f'ingest-writer-{i}')
+            for i in range(self.writers)
+        ]
+        logger.info(f"📥 Ingestion queue started ({self.writers} writers, batch {self.batch_size}, capacity {self.max_size})")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def put(self, item: IngestItem):
+        """Enqueue a board; waits for space when the writers are behind"""
+        if self._closed:
+            raise RuntimeError("IngestionQueue is closed")
+        if self._queue.full():
+            self.metrics.backpressure_waits += 1
+        item.enqueued_at = time.perf_counter()
+        await self._queue.put(item)
+        self.metrics.boards_enqueued += 1
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def close(self):
+        """Stop accepting boards, flush everything queued, and stop the writers"""
+        if self._closed or self._queue is None:
+            return
+        self._closed = True
+        for _ in self._workers:
+            await self._queue.put(_SHUTDOWN)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        logger.info(f"📥 Ingestion queue flushed: {self.metrics.to_dict()}")
+
+    async def _next_batch(self) -> Tuple[List[IngestItem], bool]:
+        """Block for the first item, then gather more for up to max_batch_wait"""
+        first = await self._queue.get()
+        if first is _SHUTDOWN:
+            return [], True
+        batch = [first]
+        deadline = time.perf_counter() + self.max_batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(self._queue.get(), remaining)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item is _SHUTDOWN:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _writer(self, worker_id: int):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            for item in batch:
+                self.metrics.queue_delays.append(started - item.enqueued_at)
+            try:
+                written, jobs, failed, (new, updated, closed) = await self.adb.run(write_batch, self.adb.db, batch)
+            except Exception as e:
+                logger.error(f"Ingest writer {worker_id} failed on batch of {len(batch)} "
+                             f"({', '.join(item.company_name for item in batch[:5])}...): {e}")
+                written, jobs, failed, (new, updated, closed) = 0, 0, len(batch), (0, 0, 0)
+            elapsed = time.perf_counter() - started
+
+            self.metrics.batches += 1
+            self.metrics.batch_latencies.append(elapsed)
+            self.metrics.boards_written += written
+            self.metrics.boards_failed += failed
+            self.metrics.jobs_written += jobs
+            self.metrics.new_jobs += new
+            self.metrics.updated_jobs += updated
+            self.metrics.closed_jobs += closed
+            logger.info(f"📥 Ingest batch: {written} boards in {elapsed * 1000:.0f}ms (+{new} ~{updated} -{closed}), {self.qsize()} queued")
+
+
+def write_batch(db: Database, batch: List[IngestItem]) -> Tuple[int, int, int, Tuple[int, int, int]]:
+    """Write a batch of boards: resolve company rows, then one bulk archive for all jobs.
+
+    Runs on the AsyncDatabase executor. Returns (boards written, jobs written,
+    boards failed, (new, updated, closed)). Raises if the bulk archive fails:
+    its transaction is rolled back, so the whole batch counts as failed.
+    """
+    boards: Dict[int, List[Dict]] = {}
+    partial = set()
+    failed = 0
+    for item in batch:
+        job_count = item.job_count if item.job_count is not None else len(item.jobs)
+        if item.company_id is None and item.discovery_token:
+            company_id = db.upsert_discovered_company(
+                company_name=item.company_name,
+                token=item.discovery_token,
+                ats_type=item.ats_type,
+                board_url=item.board_url,
+                job_count=job_count
+            )
+        elif item.company_id is None:
+            company_id = db.add_company(
+                company_name=item.company_name,
+                ats_type=item.ats_type,
+                board_url=item.board_url,
+                job_count=job_count
+            )
+        else:
+            company_id = item.company_id
+            db.update_company_job_count(company_id, job_count)
+        if not company_id:
+            failed += 1
+            continue
+        # The same company can show up twice in one batch; the later scrape wins
+        boards[company_id] = item.jobs
+        if item.partial:
+            partial.add(company_id)
+        else:
+            partial.discard(company_id)
+
+    counts = db.archive_jobs_bulk(boards, partial) if boards else (0, 0, 0)
+    return len(boards), sum(len(jobs) for jobs in boards.values()), failed, counts
+
+
+class SeedOutcomeBuffer:
+    """In-memory seed test/success counters flushed via Database.record_seed_outcomes.
+    
+    Flushes every SEED_OUTCOME_FLUSH_SECONDS, as soon as SEED_OUTCOME_MAX_PENDING
+    distinct seeds are pending, and on close(). A failed flush puts its
+    outcomes back, merged with anything recorded meanwhile, for the next one.
+    """
+
+    def __init__(self, adb: AsyncDatabase, flush_interval: float = None, max_pending: int = None):
+        self.adb = adb
+        self.flush_interval = flush_interval or float(os.getenv('SEED_OUTCOME_FLUSH_SECONDS', 30))
+        self.max_pending = max_pending or int(os.getenv('SEED_OUTCOME_MAX_PENDING', 500))
+        self._pending: Dict[str, List[int]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        self.flushes = 0
+        self.seeds_flushed = 0
+
+    async def start(self):
+        self._flusher = asyncio.create_task(self._periodic_flush(), name='seed-outcome-flusher')
+
+    def record(self, token: str, tested: int = 0, successful: int = 0):
+        if not token:
+            return
+        counts = self._pending.setdefault(token, [0, 0])
+        counts[0] += tested
+        counts[1] += successful
+        if len(self._pending) >= self.max_pending:
+            task = asyncio.create_task(self.flush())
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        # Swap before awaiting so outcomes recorded during the write land in the next flush
+        pending, self._pending = self._pending, {}
+        try:
+            updated = await self.adb.record_seed_outcomes({token: tuple(counts) for token, counts in pending.items()})
+        except Exception as e:
+            for token, (tested, successful) in pending.items():
+                counts = self._pending.setdefault(token, [0, 0])
+                counts[0] += tested
+                counts[1] += successful
+            logger.warning(f"Seed outcome flush failed, keeping {len(pending)} seeds for the next one: {e}")
+            return 0
+        self.flushes += 1
+        self.seeds_flushed += len(pending)
+        logger.info(f"🌱 Flushed outcomes for {len(pending)} seeds ({updated} rows updated)")
+        return updated
+
+    async def _periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Seed outcome flush failed: {e}")
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.flush()
+        if self._pending:
+            logger.error(f"Dropping outcomes for {len(self._pending)} seeds after the final flush failed")
@@ -4,19 +4,26 @@ import os
 import logging
 import asyncio
 import threading
+import itertools
 from datetime import datetime, timezone, timedelta
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
 from waitress import serve
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.jobstores.base import JobLookupError
 
-from database import get_db, TRENDS_CUTOFF_DATE
+from database import get_db, TRENDS_CUTOFF_DATE, ACTIVE_JOB_COLUMNS
+from utils import encode_cursor, decode_cursor
 from collector import run_collection, run_refresh
 from market_intel import run_daily_maintenance
+from export import JobExport, ExportBusy
 from middleware.auth import AuthManager, require_api_key, require_admin_key, optional_auth
 from middleware.rate_limit import setup_rate_limiter
+from middleware.cache import setup_response_cache, cached_response
+from middleware.conditional import setup_conditional_requests, conditional_response
+from middleware.json_provider import setup_json_provider, json_encoder, encode_rows, encode_tuples
+from middleware.compression import setup_compression, no_compression
 
 # =============================================================================
 # UPGRADE MODULE IMPORTS (V7 Collector, Mega Expander, Self-Growth)
@@ -57,9 +64,22 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+setup_json_provider(app)
 
 auth_manager = AuthManager()
 limiter = setup_rate_limiter(app)
+response_cache = setup_response_cache(app)
+data_version = setup_conditional_requests(app, lambda: get_db().get_data_version())
+
+
+def publish_data_generation(reason: str):
+    """Bump the shared data generation once per finished write job (outside its transactions)"""
+    get_db().bump_data_generation()
+    data_version.reset()
+
+
+response_cache.add_invalidation_listener(publish_data_generation)
+compressor = setup_compression(app)
 
 RATE_LIMITS = {
     'default': '1000 per day',
@@ -68,6 +88,9 @@ RATE_LIMITS = {
     'admin': '200 per hour'
 }
 
+# Rows per chunk written by the streaming /api/jobs response
+JOBS_STREAM_CHUNK_ROWS = int(os.getenv('JOBS_STREAM_CHUNK_ROWS', 500))
+
 collection_state = {
     'is_running': False,
     'mode': None,
@@ -123,6 +146,7 @@ def scheduled_refresh():
         collection_state['last_run'] = datetime.now(timezone.utc).isoformat()
         logger.info(f"Scheduled refresh complete: {stats.total_jobs_collected} jobs")
     finally:
+        response_cache.invalidate('refresh')
         get_db().release_advisory_lock('scheduled_refresh')
 
 def scheduled_discovery():
@@ -144,6 +168,7 @@ def scheduled_discovery():
         collection_state['last_run'] = datetime.now(timezone.utc).isoformat()
         logger.info(f"Scheduled discovery complete: {stats.total_discovered} companies")
     finally:
+        response_cache.invalidate('discovery')
         get_db().release_advisory_lock('scheduled_discovery')
 
 def scheduled_tier1_expansion():
@@ -155,6 +180,7 @@ def scheduled_tier1_expansion():
         added = asyncio.run(run_tier1_expansion())
         logger.info(f"Tier 1 expansion complete: {added} seeds added")
     finally:
+        response_cache.invalidate('seed expansion')
         get_db().release_advisory_lock('tier1_expansion')
 
 def scheduled_tier2_expansion():
@@ -166,6 +192,7 @@ def scheduled_tier2_expansion():
         added = asyncio.run(run_tier2_expansion())
         logger.info(f"Tier 2 expansion complete: {added} seeds added")
     finally:
+        response_cache.invalidate('seed expansion')
         get_db().release_advisory_lock('tier2_expansion')
 
 # =============================================================================
@@ -199,6 +226,7 @@ def scheduled_v7_discovery():
         logger.error(f"❌ V7 discovery failed: {e}", exc_info=True)
     finally:
         v7_collection_state['is_running'] = False
+        response_cache.invalidate('v7 discovery')
         get_db().release_advisory_lock('v7_discovery')
 
 
@@ -220,6 +248,7 @@ def scheduled_mega_expansion():
     except Exception as e:
         logger.error(f"❌ Mega expansion failed: {e}", exc_info=True)
     finally:
+        response_cache.invalidate('seed expansion')
         get_db().release_advisory_lock('mega_expansion')
 
 
@@ -243,6 +272,7 @@ def scheduled_self_growth():
     except Exception as e:
         logger.error(f"❌ Self-growth failed: {e}", exc_info=True)
     finally:
+        response_cache.invalidate('self-growth')
         get_db().release_advisory_lock('self_growth')
 
 
@@ -256,19 +286,41 @@ def scheduled_snapshot_cleanup():
         deleted = db.cleanup_old_snapshots(90)  # Keep 90 days
         logger.info(f"Snapshot cleanup complete: deleted {deleted} old snapshots")
     finally:
+        response_cache.invalidate('snapshot cleanup')
         get_db().release_advisory_lock('snapshot_cleanup')
 
 
+def scheduled_analytics_rollup():
+    """Keep the precomputed analytics rollups fresh between collection runs"""
+    if not get_db().acquire_advisory_lock('analytics_rollup'):
+        return
+    try:
+        timings = get_db().refresh_analytics_rollups()
+        logger.info(f"Analytics rollup refresh complete: {timings}")
+    finally:
+        response_cache.invalidate('analytics rollup')
+        get_db().release_advisory_lock('analytics_rollup')
+
+
 # =============================================================================
 # SCHEDULER CONFIGURATION
 # =============================================================================
 
+ANALYTICS_ROLLUP_REFRESH_MINUTES = int(os.getenv('ANALYTICS_ROLLUP_REFRESH_MINUTES', 30))
+ANALYTICS_ROLLUP_MAX_AGE_MINUTES = int(os.getenv('ANALYTICS_ROLLUP_MAX_AGE_MINUTES', 90))
+
 # Legacy scheduled jobs
 scheduler.add_job(scheduled_refresh, CronTrigger(hour=6), id='refresh', replace_existing=True)
 scheduler.add_job(scheduled_discovery, CronTrigger(hour=7), id='discovery', replace_existing=True)
 scheduler.add_job(scheduled_tier1_expansion, CronTrigger(day_of_week='sun', hour=3), id='tier1_expansion', replace_existing=True)
 scheduler.add_job(scheduled_tier2_expansion, CronTrigger(day=1, hour=4), id='tier2_expansion', replace_existing=True)
 scheduler.add_job(scheduled_snapshot_cleanup, CronTrigger(day=1, hour=2), id='snapshot_cleanup', replace_existing=True)
+scheduler.add_job(
+    scheduled_analytics_rollup,
+    IntervalTrigger(minutes=ANALYTICS_ROLLUP_REFRESH_MINUTES),
+    id='analytics_rollup',
+    replace_existing=True
+)
 
 # Upgrade module scheduled jobs
 if COLLECTOR_V7_AVAILABLE:
@@ -304,6 +356,7 @@ logger.info("   - Discovery: Daily at 7:00 AM UTC")
 logger.info("   - Tier 1 Expansion: Weekly (Sunday 3:00 AM UTC)")
 logger.info("   - Tier 2 Expansion: Monthly (1st at 4:00 AM UTC)")
 logger.info("   - Snapshot Cleanup: Monthly (1st at 2:00 AM UTC)")
+logger.info(f"   - Analytics Rollups: Every {ANALYTICS_ROLLUP_REFRESH_MINUTES} minutes")
 if COLLECTOR_V7_AVAILABLE:
     logger.info("   - V7 Discovery: Every 6 hours at :30")
 if MEGA_EXPANDER_AVAILABLE:
@@ -382,6 +435,8 @@ def expand_advanced_seeds():
                 logger.info(f"✅ Advanced expansion complete: {added} seeds added")
             except Exception as e:
                 logger.error(f"❌ Advanced seed expansion failed: {e}", exc_info=True)
+            finally:
+                response_cache.invalidate('seed expansion')
         
         # Start in background
         thread = threading.Thread(target=run_expansion, daemon=True)
@@ -496,15 +551,33 @@ def debug_analytics():
         logger.error(f"Debug error: {e}", exc_info=True)
         return jsonify({'error': str(e), 'has_data': False}), 200
 
+def _advanced_analytics_with_freshness() -> dict:
+    """Advanced analytics rollup plus a 'rollup' key describing how stale it is"""
+    db = get_db()
+    rollup = db.get_analytics_rollup('advanced_analytics')
+    if rollup is None:
+        db.refresh_analytics_rollups()
+        rollup = db.get_analytics_rollup('advanced_analytics')
+    if rollup is None:
+        return {}
+    analytics = dict(rollup['payload'])
+    analytics['rollup'] = {
+        'refreshed_at': rollup['refreshed_at'].isoformat(),
+        'age_seconds': rollup['age_seconds'],
+        'stale': rollup['age_seconds'] > ANALYTICS_ROLLUP_MAX_AGE_MINUTES * 60,
+        'refresh_ms': rollup['refresh_ms'],
+    }
+    return analytics
+
 @app.route('/api/advanced-analytics')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_advanced_analytics_simple():
     """Get advanced analytics (simple endpoint)"""
     try:
-        db = get_db()
-        analytics = db.get_advanced_analytics()
-        return jsonify(analytics), 200
+        return jsonify(_advanced_analytics_with_freshness()), 200
     except Exception as e:
         logger.error(f"Error getting advanced analytics: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -512,12 +585,12 @@ def get_advanced_analytics_simple():
 @app.route('/api/analytics/advanced')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_advanced_analytics_api():
     """Get advanced analytics with optional cutoff date"""
     try:
-        db = get_db()
-        analytics = db.get_advanced_analytics()
-        return jsonify(analytics), 200
+        return jsonify(_advanced_analytics_with_freshness()), 200
     except Exception as e:
         logger.error(f"Error getting advanced analytics: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -528,6 +601,8 @@ def get_advanced_analytics_api():
 @app.route('/api/intelligence/location-expansions')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_location_expansions_api():
     """Get recent location expansion events with optional cutoff date"""
     try:
@@ -570,6 +645,8 @@ def get_location_expansions_api():
 @app.route('/api/intelligence/events')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_intelligence_events_api():
     """Get all intelligence events"""
     try:
@@ -629,6 +706,7 @@ def get_intelligence_events_api():
 
 @app.route('/api/stats')
 @limiter.limit("60 per minute")
+@conditional_response
 def get_stats():
     """Get platform statistics with optional cutoff date"""
     try:
@@ -672,6 +750,8 @@ def api_intel():
 @app.route('/api/trends')
 @limiter.limit(RATE_LIMITS['authenticated_read'])
 @require_api_key
+@conditional_response
+@cached_response()
 def api_trends():
     try:
         days = request.args.get('days', 7, type=int)
@@ -688,143 +768,27 @@ def api_trends():
 @app.route('/api/salary-insights', methods=['GET'])
 @limiter.limit("30 per minute")
 @require_api_key
+@conditional_response
+@cached_response()
 def get_salary_insights():
-    """Get comprehensive salary insights"""
+    """Get comprehensive salary insights
+    
+    Optional filters: currency (e.g. USD), work_type, department.
+    """
     try:
-        from psycopg2.extras import RealDictCursor
+        filters = {
+            'currency': request.args.get('currency', '').strip() or None,
+            'work_type': request.args.get('work_type', '').strip() or None,
+            'department': request.args.get('department', '').strip() or None,
+        }
+        
         db = get_db()
+        insights = db.get_salary_insights(**filters)
+        if insights is None:
+            return jsonify({'error': 'Failed to compute salary insights'}), 500
         
-        with db.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Overview metrics
-                cur.execute("""
-                    SELECT 
-                        COUNT(*) as jobs_with_salary,
-                        MIN(salary_min) as min_salary,
-                        MAX(salary_max) as max_salary,
-                        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as median_salary,
-                        (SELECT COUNT(*) FROM job_archive WHERE status = 'active') as total_jobs
-                    FROM job_archive
-                    WHERE status = 'active' AND salary_min IS NOT NULL AND salary_max IS NOT NULL
-                """)
-                overview_row = cur.fetchone()
-                overview = dict(overview_row) if overview_row else {
-                    'jobs_with_salary': 0,
-                    'min_salary': 0,
-                    'max_salary': 0,
-                    'median_salary': 0,
-                    'total_jobs': 0
-                }
-                
-                # By role
-                cur.execute("""
-                    SELECT 
-                        title as role,
-                        AVG((salary_min + salary_max) / 2) as avg_salary,
-                        COUNT(*) as count
-                    FROM job_archive
-                    WHERE status = 'active' AND salary_min IS NOT NULL
-                    GROUP BY title
-                    HAVING COUNT(*) >= 1
-                    ORDER BY avg_salary DESC
-                    LIMIT 20
-                """)
-                by_role = [dict(row) for row in cur.fetchall()]
-                
-                # By location
-                cur.execute("""
-                    SELECT 
-                        location,
-                        AVG((salary_min + salary_max) / 2) as avg_salary,
-                        COUNT(*) as count
-                    FROM job_archive
-                    WHERE status = 'active' AND salary_min IS NOT NULL AND location IS NOT NULL
-                    GROUP BY location
-                    HAVING COUNT(*) >= 1
-                    ORDER BY avg_salary DESC
-                    LIMIT 15
-                """)
-                by_location = [dict(row) for row in cur.fetchall()]
-                
-                # By company
-                cur.execute("""
-                    SELECT 
-                        c.company_name as company,
-                        AVG((j.salary_min + j.salary_max) / 2) as avg_salary,
-                        COUNT(*) as count
-                    FROM job_archive j
-                    JOIN companies c ON j.company_id = c.id
-                    WHERE j.status = 'active' AND j.salary_min IS NOT NULL
-                    GROUP BY c.company_name
-                    HAVING COUNT(*) >= 1
-                    ORDER BY avg_salary DESC
-                    LIMIT 15
-                """)
-                by_company = [dict(row) for row in cur.fetchall()]
-                
-                # Distribution
-                cur.execute("""
-                    SELECT 
-                        CASE 
-                            WHEN (salary_min + salary_max) / 2 < 75000 THEN '<$75k'
-                            WHEN (salary_min + salary_max) / 2 < 100000 THEN '$75k-$100k'
-                            WHEN (salary_min + salary_max) / 2 < 150000 THEN '$100k-$150k'
-                            WHEN (salary_min + salary_max) / 2 < 200000 THEN '$150k-$200k'
-                            WHEN (salary_min + salary_max) / 2 < 250000 THEN '$200k-$250k'
-                            ELSE '$250k+'
-                        END as range,
-                        COUNT(*) as count
-                    FROM job_archive
-                    WHERE status = 'active' AND salary_min IS NOT NULL
-                    GROUP BY range
-                    ORDER BY MIN((salary_min + salary_max) / 2)
-                """)
-                distribution = [dict(row) for row in cur.fetchall()]
-                
-                # Detailed breakdown
-                cur.execute("""
-                    SELECT 
-                        j.title as role,
-                        c.company_name as company,
-                        j.location,
-                        j.salary_min,
-                        j.salary_max,
-                        COALESCE(j.salary_currency, 'USD') as currency,
-                        COUNT(*) as count
-                    FROM job_archive j
-                    JOIN companies c ON j.company_id = c.id
-                    WHERE j.status = 'active' AND j.salary_min IS NOT NULL
-                    GROUP BY j.title, c.company_name, j.location, j.salary_min, j.salary_max, j.salary_currency
-                    ORDER BY j.salary_max DESC
-                    LIMIT 100
-                """)
-                detailed = [dict(row) for row in cur.fetchall()]
-                
-                # Percentiles
-                cur.execute("""
-                    SELECT 
-                        PERCENTILE_CONT(0.10) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p10,
-                        PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p25,
-                        PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p50,
-                        PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p75,
-                        PERCENTILE_CONT(0.90) WITHIN GROUP (ORDER BY (salary_min + salary_max) / 2) as p90
-                    FROM job_archive
-                    WHERE status = 'active' AND salary_min IS NOT NULL
-                """)
-                percentile_row = cur.fetchone()
-                percentiles = dict(percentile_row) if percentile_row else {
-                    'p10': 0, 'p25': 0, 'p50': 0, 'p75': 0, 'p90': 0
-                }
-                
-                return jsonify({
-                    'overview': overview,
-                    'by_role': by_role,
-                    'by_location': by_location,
-                    'by_company': by_company,
-                    'distribution': distribution,
-                    'detailed': detailed,
-                    'percentiles': percentiles
-                }), 200
+        insights['filters'] = filters
+        return jsonify(insights), 200
     except Exception as e:
         logger.error(f"Error in salary insights: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -837,50 +801,46 @@ def get_salary_insights():
 @require_api_key
 def api_companies():
     try:
-        page = request.args.get('page', 1, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = min(request.args.get('per_page', 50, type=int), 100)
         search = request.args.get('search', '').strip()
         ats_type = request.args.get('ats_type', '').strip()
         
         db = get_db()
-        query = """
-            SELECT 
-                c.id, c.company_name, c.ats_type, c.board_url,
-                c.job_count, c.last_scraped, c.created_at,
-                COALESCE(c.job_count, 0) as active_jobs
-            FROM companies c
-            WHERE 1=1
-        """
-        params = []
-        
+        total_is_estimate = False
         if search:
-            query += " AND c.company_name ILIKE %s"
-            params.append(f'%{search}%')
-        
-        if ats_type:
-            query += " AND c.ats_type = %s"
-            params.append(ats_type)
-        
-        query += " ORDER BY c.job_count DESC NULLS LAST, c.company_name LIMIT %s OFFSET %s"
-        params.extend([per_page, (page - 1) * per_page])
-        
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(query, params)
-                columns = [desc[0] for desc in cur.description]
-                companies = [dict(zip(columns, row)) for row in cur.fetchall()]
-                
-                count_query = "SELECT COUNT(*) FROM companies WHERE 1=1"
-                count_params = []
-                if search:
-                    count_query += " AND company_name ILIKE %s"
-                    count_params.append(f'%{search}%')
-                if ats_type:
-                    count_query += " AND ats_type = %s"
-                    count_params.append(ats_type)
-                
-                cur.execute(count_query, count_params)
-                total = cur.fetchone()[0]
+            companies, total, total_is_estimate = db.search_companies(
+                search, limit=per_page, offset=(page - 1) * per_page, ats_type=ats_type or None
+            )
+        else:
+            query = """
+                SELECT 
+                    c.id, c.company_name, c.ats_type, c.board_url,
+                    c.job_count, c.last_scraped, c.created_at,
+                    COALESCE(c.job_count, 0) as active_jobs
+                FROM companies c
+                WHERE 1=1
+            """
+            params = []
+            
+            if ats_type:
+                query += " AND c.ats_type = %s"
+                params.append(ats_type)
+            
+            query += " ORDER BY c.job_count DESC NULLS LAST, c.company_name LIMIT %s OFFSET %s"
+            params.extend([per_page, (page - 1) * per_page])
+            
+            with db.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    columns = [desc[0] for desc in cur.description]
+                    companies = [dict(zip(columns, row)) for row in cur.fetchall()]
+                    
+                    if ats_type:
+                        cur.execute("SELECT COUNT(*) FROM companies WHERE ats_type = %s", (ats_type,))
+                    else:
+                        cur.execute("SELECT COUNT(*) FROM companies")
+                    total = cur.fetchone()[0]
         
         return jsonify({
             'companies': companies,
@@ -888,6 +848,7 @@ def api_companies():
                 'page': page,
                 'per_page': per_page,
                 'total': total,
+                'total_is_estimate': total_is_estimate,
                 'pages': (total + per_page - 1) // per_page if total > 0 else 1
             }
         }), 200
@@ -895,43 +856,103 @@ def api_companies():
         logger.error(f"Error getting companies: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/companies/search')
+@limiter.limit("60 per minute")
+@optional_auth
+def api_search_companies():
+    """Ranked fuzzy company search (q, limit up to 50, offset)"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 50))
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        companies, total, total_is_estimate = get_db().search_companies(query, limit=limit, offset=offset)
+        return jsonify({
+            'companies': companies,
+            'total': total,
+            'total_is_estimate': total_is_estimate,
+            'query': query
+        }), 200
+    except Exception as e:
+        logger.error(f"Error searching companies: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/companies/autocomplete')
+@limiter.limit("120 per minute")
+@optional_auth
+def api_autocomplete_companies():
+    """Company name suggestions for a typed prefix (q, limit up to 25)"""
+    try:
+        prefix = request.args.get('q', '').strip()
+        limit = max(1, min(request.args.get('limit', 10, type=int), 25))
+        suggestions = get_db().autocomplete_companies(prefix, limit=limit) if prefix else []
+        return jsonify({'suggestions': suggestions, 'query': prefix}), 200
+    except Exception as e:
+        logger.error(f"Error autocompleting companies: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/companies/<int:company_id>')
 @limiter.limit("30 per minute")
 @optional_auth
 def api_company_detail(company_id):
+    """Company header: the company row plus job counts and filter values (jobs are under /jobs)"""
     try:
         db = get_db()
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM companies WHERE id = %s", (company_id,))
-                company = cur.fetchone()
-                if not company:
-                    return jsonify({'error': 'Company not found'}), 404
-                
-                columns = [desc[0] for desc in cur.description]
-                company_data = dict(zip(columns, company))
-                
-                # Get ALL jobs for this company (NO LIMIT)
-                cur.execute("""
-                    SELECT job_id, title, location, department, work_type, job_url, 
-                           posted_date, salary_min, salary_max, salary_currency, status, first_seen, last_seen
-                    FROM job_archive
-                    WHERE company_id = %s
-                    ORDER BY status DESC, first_seen DESC
-                """, (company_id,))
-                
-                jobs_columns = [desc[0] for desc in cur.description]
-                jobs = [dict(zip(jobs_columns, row)) for row in cur.fetchall()]
-                
-                company_data['jobs'] = jobs
-                
-                logger.info(f"Company {company_id} ({company_data.get('company_name')}): Returning {len(jobs)} jobs")
-                
-                return jsonify(company_data), 200
+        company_data = db.get_company_header(company_id)
+        if not company_data:
+            return jsonify({'error': 'Company not found'}), 404
+        company_data['jobs_url'] = f'/api/companies/{company_id}/jobs'
+        return jsonify(company_data), 200
     except Exception as e:
         logger.error(f"Error getting company detail: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/companies/<int:company_id>/jobs')
+@limiter.limit("60 per minute")
+@optional_auth
+def api_company_jobs(company_id):
+    """Keyset-paginated jobs for one company.
+    
+    Query params: status (active|closed), q (title search), department,
+    location, limit (default 50, max 500), cursor (next_cursor of the
+    previous page).
+    """
+    try:
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+        status = request.args.get('status') or None
+        if status not in (None, 'active', 'closed'):
+            return jsonify({'error': 'status must be active or closed'}), 400
+        
+        cursor = request.args.get('cursor')
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        db = get_db()
+        jobs, has_more = db.get_company_jobs(
+            company_id,
+            limit=limit,
+            after=after,
+            status=status,
+            search=request.args.get('q') or None,
+            department=request.args.get('department') or None,
+            location=request.args.get('location') or None,
+        )
+        
+        return jsonify({
+            'company_id': company_id,
+            'jobs': jobs,
+            'count': len(jobs),
+            'limit_applied': limit,
+            'next_cursor': encode_cursor(jobs[-1]['first_seen'], jobs[-1]['id']) if has_more else None
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting company jobs: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================================
 # TRENDS & ANALYTICS ENDPOINTS - NEW
 # ============================================================================
@@ -939,6 +960,8 @@ def api_company_detail(company_id):
 @app.route('/api/trends/company/<int:company_id>')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_company_trend(company_id):
     """Get historical job count trends for a company"""
     try:
@@ -963,6 +986,8 @@ def get_company_trend(company_id):
 @app.route('/api/trends/market')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_market_trend():
     """Get overall market hiring trends"""
     try:
@@ -1000,6 +1025,8 @@ def get_market_trend():
 @app.route('/api/trends/skills')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_skills_trend():
     """Get skills demand trends over time"""
     try:
@@ -1119,6 +1146,8 @@ def get_top_companies():
 @app.route('/api/trends/salary')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_salary_trend():
     """Get salary trends over time"""
     try:
@@ -1153,6 +1182,8 @@ def get_salary_trend():
 @app.route('/api/trends/departments')
 @limiter.limit("30 per minute")
 @optional_auth
+@conditional_response
+@cached_response()
 def get_department_trend():
     """Get hiring trends by department"""
     try:
@@ -1231,6 +1262,7 @@ def cleanup_snapshots():
         
         db = get_db()
         deleted = db.cleanup_old_snapshots(days_to_keep)
+        response_cache.invalidate('snapshot cleanup')
         
         return jsonify({
             'success': True,
@@ -1269,52 +1301,156 @@ def add_indexes():
 @limiter.limit("30 per minute")
 @optional_auth
 def get_jobs_api():
-    """Get all jobs with filters"""
+    """Stream active jobs, newest first, with keyset pagination.
+    
+    Query params: limit (default 50000, max 100000), cursor (next_cursor from a
+    previous page), company, location, work_type, department, and format:
+    
+    - json (default): the old shape plus next_cursor, streamed in chunks
+      instead of built in memory
+    - rows: {"columns": [...], "rows": [[...], ...], ...meta}, each job an
+      array in `columns` order; the cheapest shape to produce and to parse
+    - ndjson (or Accept: application/x-ndjson): one job per line with a
+      trailing {"_meta": ...} line
+    """
+    rows = None
     try:
-        db = get_db()
-        
-        # Support higher limits
         limit = int(request.args.get('limit', 50000))
-        limit = min(limit, 100000)  # Max 100k
+        limit = max(1, min(limit, 100000))  # Max 100k
         
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT 
-                        j.title,
-                        j.location,
-                        j.department,
-                        j.work_type,
-                        j.job_url,
-                        j.first_seen,
-                        j.last_seen,
-                        c.company_name,
-                        c.ats_type
-                    FROM job_archive j
-                    JOIN companies c ON j.company_id = c.id
-                    WHERE j.status = 'active'
-                    ORDER BY j.last_seen DESC
-                    LIMIT %s
-                """, (limit,))
-                
-                columns = [desc[0] for desc in cur.description]
-                jobs = [dict(zip(columns, row)) for row in cur.fetchall()]
-                
-                cur.execute("SELECT COUNT(DISTINCT company_id) FROM job_archive WHERE status = 'active'")
-                total_companies = cur.fetchone()[0]
-                
-                logger.info(f"Jobs API: Returning {len(jobs)} jobs (limit: {limit})")
-                
-                return jsonify({
-                    'jobs': jobs,
-                    'total_jobs': len(jobs),
-                    'total_companies': total_companies,
-                    'limit_applied': limit
-                }), 200
+        cursor = request.args.get('cursor')
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        output = request.args.get('format')
+        if output is None and 'application/x-ndjson' in request.headers.get('Accept', ''):
+            output = 'ndjson'
+        output = output or 'json'
+        if output not in ('json', 'rows', 'ndjson'):
+            return jsonify({'error': 'format must be json, rows or ndjson'}), 400
+        
+        db = get_db()
+        rows = db.iter_active_job_rows(
+            limit,
+            after=after,
+            company=request.args.get('company'),
+            location=request.args.get('location'),
+            work_type=request.args.get('work_type'),
+            department=request.args.get('department'),
+        )
+        # Pull the first row now so query errors still get a proper 500
+        first = next(rows, None)
+        total_companies = db.count_hiring_companies()
     except Exception as e:
         logger.error(f"Error getting jobs: {e}", exc_info=True)
+        if rows is not None:
+            rows.close()
         return jsonify({'error': str(e)}), 500
-        
+    
+    columns = tuple(ACTIVE_JOB_COLUMNS)
+    id_index, last_seen_index = columns.index('id'), columns.index('last_seen')
+    
+    def generate():
+        dumpb = json_encoder(app)
+        count = 0
+        last = None
+        try:
+            if output == 'json':
+                yield b'{"jobs":['
+            elif output == 'rows':
+                yield b'{"columns":' + dumpb(columns) + b',"rows":['
+            
+            chunk_rows = itertools.chain([first], rows) if first else iter(())
+            while True:
+                chunk = list(itertools.islice(chunk_rows, JOBS_STREAM_CHUNK_ROWS))
+                if not chunk:
+                    break
+                if output == 'ndjson':
+                    body = b''.join(dumpb(dict(zip(columns, row))) + b'\n' for row in chunk)
+                elif output == 'rows':
+                    body = (b',' if count else b'') + encode_tuples(dumpb, chunk)
+                else:
+                    body = (b',' if count else b'') + encode_rows(dumpb, columns, chunk)
+                count += len(chunk)
+                last = chunk[-1]
+                yield body
+            
+            meta = {
+                'total_jobs': count,
+                'total_companies': total_companies,
+                'limit_applied': limit,
+                'next_cursor': encode_cursor(last[last_seen_index], last[id_index]) if last and count == limit else None,
+            }
+            if output == 'ndjson':
+                yield dumpb({'_meta': meta}) + b'\n'
+            else:
+                yield b'],' + dumpb(meta)[1:]
+            logger.info(f"Jobs API: Streamed {count} jobs (limit: {limit}, format: {output})")
+        except Exception as e:
+            # Headers are already sent; a truncated body (or error line) is all we can do
+            logger.error(f"Error streaming jobs after {count} rows: {e}", exc_info=True)
+            if output == 'ndjson':
+                yield dumpb({'error': str(e)}) + b'\n'
+        finally:
+            rows.close()
+    
+    mimetype = 'application/x-ndjson' if output == 'ndjson' else 'application/json'
+    response = Response(generate(), mimetype=mimetype)
+    # next(rows) above already holds a pooled connection; generate()'s finally never runs if
+    # the body is never iterated (client gone before the first chunk), closing the response does
+    response.call_on_close(rows.close)
+    return response, 200
+        
+@app.route('/api/export/jobs')
+@limiter.limit("20 per hour")
+@require_api_key
+@no_compression
+def export_jobs_api():
+    """Bulk export of job_archive joined with company fields.
+    
+    Query params: format (csv.gz default, csv, arrow, parquet) and since (ISO
+    timestamp, UTC if no offset): only jobs seen or closed after it. The
+    X-Export-Watermark response header is the `since` for the next
+    incremental export; it trails the newest row a little (see
+    Database.copy_jobs_export), so consecutive exports overlap and clients
+    should upsert rows by id. Not compressed by the middleware: use csv.gz, or
+    parquet (zstd inside).
+    """
+    since = request.args.get('since')
+    try:
+        since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+    if since and since.tzinfo:
+        # Timestamps are stored as naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    try:
+        export = JobExport(get_db(), request.args.get('format', 'csv.gz'), since=since)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.method == 'HEAD':
+        # Nothing would read the body; don't take an export slot or open a snapshot for it
+        return Response(mimetype=export.mimetype), 200
+    try:
+        watermark = export.start()
+    except ExportBusy:
+        return jsonify({'error': 'Too many exports running, try again shortly'}), 503, {'Retry-After': '60'}
+    except Exception as e:
+        logger.error(f"Error starting job export: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+    
+    stamp = watermark.strftime('%Y%m%dT%H%M%S') if watermark else 'empty'
+    response = Response(export.stream(), mimetype=export.mimetype)
+    # The body generator's finally never runs if it is never started (client gone before the
+    # first chunk); closing the response always happens
+    response.call_on_close(export.close)
+    response.headers['Content-Disposition'] = f'attachment; filename=job_archive-{stamp}.{export.extension}'
+    response.headers['X-Export-Watermark'] = watermark.isoformat() if watermark else ''
+    return response, 200
+
 @app.route('/api/jobs/<int:job_id>')
 @limiter.limit(RATE_LIMITS['authenticated_read'])
 @require_api_key
@@ -1356,6 +1492,32 @@ def get_seed_stats():
         logger.error(f"Error getting seed stats: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/seeds/search')
+@limiter.limit("30 per minute")
+@require_admin_key
+def search_seeds_api():
+    """Ranked fuzzy seed search (q, limit up to 100, offset, include_blacklisted)"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        include_blacklisted = request.args.get('include_blacklisted', 'false').lower() == 'true'
+        
+        seeds, total, total_is_estimate = get_db().search_seeds(
+            query, limit=limit, offset=offset, include_blacklisted=include_blacklisted
+        )
+        return jsonify({
+            'seeds': seeds,
+            'total': total,
+            'total_is_estimate': total_is_estimate,
+            'query': query
+        }), 200
+    except Exception as e:
+        logger.error(f"Error searching seeds: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/seeds/add', methods=['POST'])
 @limiter.limit(RATE_LIMITS['write'])
 def add_seed():
@@ -1382,6 +1544,7 @@ def add_seed():
         success = db.add_manual_seed(company_name, website_url)
         
         if success:
+            response_cache.invalidate('seed change')
             return jsonify({
                 'success': True,
                 'message': f'{company_name} added successfully. It will be tested in the next discovery run.',
@@ -1422,6 +1585,7 @@ def api_manual_seed():
         
         if not added:
             return jsonify({'success': False, 'error': 'Company already exists'}), 409
+        response_cache.invalidate('seed change')
         
         if website_url and data.get('test_immediately', False):
             def test_seed():
@@ -1431,6 +1595,8 @@ def api_manual_seed():
                     asyncio.run(collector._test_company(company_name, ats_hint))
                 except Exception as e:
                     logger.error(f"Test seed failed: {e}", exc_info=True)
+                finally:
+                    response_cache.invalidate('seed test')
             
             threading.Thread(target=test_seed, daemon=True).start()
             return jsonify({
@@ -1467,6 +1633,7 @@ def reset_seeds():
                 """)
                 reset_count = cur.rowcount
                 conn.commit()
+                response_cache.invalidate('seed change')
                 logger.info(f"Reset {reset_count} seeds")
                 return jsonify({'success': True, 'reset_count': reset_count}), 200
     except Exception as e:
@@ -1492,6 +1659,7 @@ def unblacklist_premium():
                 """)
                 unblacklisted_count = cur.rowcount
                 conn.commit()
+                response_cache.invalidate('seed change')
                 logger.info(f"Unblacklisted {unblacklisted_count} premium seeds")
                 return jsonify({'success': True, 'unblacklisted_count': unblacklisted_count}), 200
     except Exception as e:
@@ -1505,6 +1673,7 @@ def clean_garbage_seeds():
     try:
         db = get_db()
         deleted_count = db.cleanup_garbage_seeds()
+        response_cache.invalidate('seed change')
         return jsonify({'success': True, 'deleted_count': deleted_count}), 200
     except Exception as e:
         logger.error(f"Error cleaning garbage seeds: {e}", exc_info=True)
@@ -1517,6 +1686,7 @@ def expand_tier1_seeds():
     try:
         from seed_expander import run_tier1_expansion
         added_count = asyncio.run(run_tier1_expansion())
+        response_cache.invalidate('seed expansion')
         return jsonify({'success': True, 'added_count': added_count}), 200
     except Exception as e:
         logger.error(f"Error expanding Tier 1: {e}", exc_info=True)
@@ -1529,6 +1699,7 @@ def expand_tier2_seeds():
     try:
         from seed_expander import run_tier2_expansion
         added_count = asyncio.run(run_tier2_expansion())
+        response_cache.invalidate('seed expansion')
         return jsonify({'success': True, 'added_count': added_count}), 200
     except Exception as e:
         logger.error(f"Error expanding Tier 2: {e}", exc_info=True)
@@ -1552,6 +1723,7 @@ def nuclear_reset_seeds():
                 """)
                 reset_count = cur.rowcount
                 conn.commit()
+                response_cache.invalidate('seed change')
                 logger.info(f"Nuclear reset: {reset_count} seeds")
                 return jsonify({'success': True, 'reset_count': reset_count}), 200
     except Exception as e:
@@ -1614,6 +1786,8 @@ def api_expand_seeds():
                     logger.info(f"✅ Full expansion complete: {added} seeds added")
             except Exception as e:
                 logger.error(f"❌ Seed expansion failed: {e}", exc_info=True)
+            finally:
+                response_cache.invalidate('seed expansion')
         
         # Start expansion in background thread
         thread = threading.Thread(target=run_expansion, daemon=True)
@@ -1674,6 +1848,7 @@ def api_collect_v7():
                 logger.error(f"❌ V7 collection failed: {e}", exc_info=True)
             finally:
                 v7_collection_state['is_running'] = False
+                response_cache.invalidate('v7 discovery')
         
         thread = threading.Thread(target=run_v7_thread, daemon=True)
         thread.start()
@@ -1777,6 +1952,8 @@ def api_expand_mega():
                 logger.info(f"✅ Mega expansion complete: {stats}")
             except Exception as e:
                 logger.error(f"❌ Mega expansion failed: {e}", exc_info=True)
+            finally:
+                response_cache.invalidate('seed expansion')
         
         thread = threading.Thread(target=run_mega, daemon=True)
         thread.start()
@@ -1816,6 +1993,8 @@ def api_self_growth_run():
                 logger.info(f"✅ Self-growth complete: {stats}")
             except Exception as e:
                 logger.error(f"❌ Self-growth failed: {e}", exc_info=True)
+            finally:
+                response_cache.invalidate('self-growth')
         
         thread = threading.Thread(target=run_growth, daemon=True)
         thread.start()
@@ -1847,6 +2026,7 @@ def api_self_growth_discoveries():
 @app.route('/api/stats/enhanced')
 @limiter.limit("30 per minute")
 @optional_auth
+@cached_response(ttl=60)
 def api_stats_enhanced():
     """Get enhanced stats with ATS breakdown and upgrade module status"""
     try:
@@ -1922,6 +2102,7 @@ def api_collect():
             collection_state['is_running'] = False
             collection_state['mode'] = None
             collection_state['current_progress'] = 0
+            response_cache.invalidate('discovery')
     
     thread = threading.Thread(target=run_collection_thread, daemon=True)
     thread.start()
@@ -1961,6 +2142,7 @@ def api_refresh():
             finally:
                 collection_state['is_running'] = False
                 collection_state['mode'] = None
+                response_cache.invalidate('refresh')
         
         thread = threading.Thread(target=run_refresh_thread, daemon=True)
         thread.start()
@@ -1992,6 +2174,49 @@ def backfill_worktypes():
         logger.error(f"Error in backfill: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/metrics')
+@limiter.exempt
+@require_admin_key
+def admin_metrics():
+    """Response cache, conditional request and compression counters"""
+    return jsonify({
+        'response_cache': response_cache.metrics(),
+        'compression': compressor.metrics() if compressor else None,
+        'conditional_requests': dict(data_version.stats, version=data_version.get()),
+        'asgi_fast_path': app.extensions['asgi_fast_path'].stats if 'asgi_fast_path' in app.extensions else None,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }), 200
+
+@app.route('/api/admin/cache/invalidate', methods=['POST'])
+@limiter.exempt
+@require_admin_key
+def admin_invalidate_cache():
+    """Drop all cached API responses"""
+    response_cache.invalidate('admin request')
+    return jsonify({'success': True, 'generation': response_cache.generation()}), 200
+
+@app.route('/api/admin/backfill-skills', methods=['POST'])
+@limiter.exempt
+@require_admin_key
+def backfill_skills():
+    """Tag skills on jobs archived before skills were extracted at ingest"""
+    try:
+        data = request.get_json(silent=True) or {}
+        batch_size = min(int(data.get('batch_size', 5000)), 50000)
+        max_rows = data.get('max_rows')
+        
+        db = get_db()
+        tagged = db.backfill_skill_tags(batch_size=batch_size, max_rows=int(max_rows) if max_rows else None)
+        response_cache.invalidate('skills backfill')
+        return jsonify({
+            'success': True,
+            'tagged_count': tagged,
+            'message': f'Backfilled skill tags for {tagged} jobs'
+        }), 200
+    except Exception as e:
+        logger.error(f"Error in skills backfill: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/admin/sql', methods=['POST'])
 @require_admin_key
 @limiter.exempt
@@ -2268,6 +2493,24 @@ if os.getenv('RUN_DB_INIT', 'false').lower() == 'true':
 # ============================================================================
 # APPLICATION STARTUP
 # ============================================================================
+def run_server(port: int, host: str = '0.0.0.0'):
+    """Serve the app in SERVER_MODE: 'waitress' (default) or 'asgi' (uvicorn, see asgi.py)"""
+    server_mode = os.getenv('SERVER_MODE', 'waitress').lower()
+    if server_mode == 'asgi':
+        import uvicorn
+        from asgi import create_asgi_app
+        logger.info("📦 Using uvicorn ASGI server (async fast path + WSGI bridge)")
+        uvicorn.run(
+            create_asgi_app(app, limiter), host=host, port=port,
+            access_log=False, timeout_keep_alive=int(os.getenv('ASGI_KEEP_ALIVE_SECONDS', 75))
+        )
+    else:
+        if server_mode != 'waitress':
+            logger.warning(f"⚠️ Unknown SERVER_MODE '{server_mode}', using waitress")
+        threads = int(os.getenv('WAITRESS_THREADS', 8))
+        logger.info(f"📦 Using Waitress WSGI server (production mode, {threads} threads)")
+        serve(app, host=host, port=port, threads=threads)
+
 if __name__ == '__main__':
     logger.info("=" * 80)
     logger.info("🚀 Job Intelligence Platform Starting...")
@@ -2299,6 +2542,4 @@ if __name__ == '__main__':
     
     port = int(os.getenv('PORT', 8080))
     logger.info(f"🌐 Starting server on port {port}...")
-    logger.info(f"📦 Using Waitress WSGI server (production mode)")
-    
-    serve(app, host='0.0.0.0', port=port, threads=8)
+    run_server(port)
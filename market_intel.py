@@ -2,6 +2,7 @@
 Market Intelligence Module
 Complete implementation of all intelligence features
 """
+import os
 import logging
 from datetime import datetime
 from database import get_db
@@ -92,16 +93,9 @@ def purge_old_job_details(days_to_keep: int = 90):
     try:
         db = get_db()
         
-        with db.get_cursor(dict_cursor=False) as cursor:
-            # Archive old closed jobs
-            cursor.execute("""
-                DELETE FROM job_archive
-                WHERE status = 'closed'
-                  AND last_seen < NOW() - INTERVAL %s
-            """, (f'{days_to_keep} days',))
-            
-            deleted_count = cursor.rowcount
-            
+        # Also refreshes company_stats for the companies that lost jobs
+        deleted_count = db.purge_closed_jobs(days_to_keep)
+        
         logger.info(f"🗑️ Purged {deleted_count} old job records (>{days_to_keep} days)")
         return deleted_count
         
@@ -209,6 +203,19 @@ def run_daily_maintenance():
     except Exception as e:
         logger.debug(f"Seed blacklisting not available: {e}")
     
+    # Seeds whose re-test window opened since they were last tested change bucket with time alone
+    db.refresh_seed_buckets()
+    
+    # Tag skills on a bounded slice of pre-existing jobs (new jobs are tagged at ingest)
+    db.backfill_skill_tags(max_rows=int(os.getenv('SKILL_BACKFILL_DAILY_ROWS', 50000)))
+    
+    # Drop long-closed jobs (company_stats is refreshed in the same transaction);
+    # callers invalidate the response cache once maintenance returns
+    purge_old_job_details(days_to_keep=int(os.getenv('CLOSED_JOB_RETENTION_DAYS', 90)))
+    
+    # Analytics endpoints read precomputed rollups; rebuild them on fresh data
+    db.refresh_analytics_rollups()
+    
     logger.info("=" * 60)
     logger.info("✅ Daily maintenance complete")
     logger.info("=" * 60)
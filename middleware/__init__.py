@@ -2,6 +2,10 @@
 
 from .auth import AuthManager, require_api_key, require_admin_key, optional_auth
 from .rate_limit import setup_rate_limiter, get_rate_limit_key
+from .cache import ResponseCache, cached_response, setup_response_cache
+from .conditional import conditional_response, setup_conditional_requests
+from .json_provider import OrjsonProvider, setup_json_provider
+from .compression import ResponseCompressor, no_compression, setup_compression
 
 __all__ = [
     'AuthManager',
@@ -9,5 +13,15 @@ __all__ = [
     'require_admin_key',
     'optional_auth',
     'setup_rate_limiter',
-    'get_rate_limit_key'
+    'get_rate_limit_key',
+    'ResponseCache',
+    'cached_response',
+    'setup_response_cache',
+    'conditional_response',
+    'setup_conditional_requests',
+    'OrjsonProvider',
+    'setup_json_provider',
+    'ResponseCompressor',
+    'no_compression',
+    'setup_compression'
 ]
@@ -45,19 +45,23 @@ class AuthManager:
     
     def get_api_key_from_request(self) -> Optional[str]:
         """Extract API key from request headers or query params"""
+        return self.extract_api_key(request.headers, request.args)
+    
+    def extract_api_key(self, headers, args) -> Optional[str]:
+        """Extract API key from any headers/query mappings (also used outside Flask, see asgi.py)"""
         # Priority 1: Header (recommended for production)
-        key = request.headers.get('X-API-Key')
+        key = headers.get('X-API-Key')
         if key:
             return key
         
         # Priority 2: Authorization Bearer token
-        auth_header = request.headers.get('Authorization', '')
+        auth_header = headers.get('Authorization', '')
         if auth_header.startswith('Bearer '):
             return auth_header[7:]
         
         # Priority 3: Query parameter (less secure, for testing only)
         if os.getenv('ALLOW_QUERY_API_KEY', 'false').lower() == 'true':
-            return request.args.get('api_key')
+            return args.get('api_key')
         
         return None
     
@@ -103,6 +107,7 @@ def require_api_key(f: Callable) -> Callable:
         logger.debug(f"✅ Authenticated request: {request.path} (role: {role})")
         return f(*args, **kwargs)
     
+    decorated_function.auth_level = 'api_key'
     return decorated_function
 
 def require_admin_key(f: Callable) -> Callable:
@@ -135,6 +140,7 @@ def require_admin_key(f: Callable) -> Callable:
         logger.info(f"✅ Admin access granted: {request.path}")
         return f(*args, **kwargs)
     
+    decorated_function.auth_level = 'admin'
     return decorated_function
 
 def optional_auth(f: Callable) -> Callable:
@@ -160,6 +166,7 @@ def optional_auth(f: Callable) -> Callable:
         
         return f(*args, **kwargs)
     
+    decorated_function.auth_level = 'optional'
     return decorated_function
 
 def generate_api_key() -> str:
@@ -0,0 +1,295 @@
+"""Response caching for read-heavy API endpoints.
+
+Responses are cached by endpoint + normalized query string, with a TTL per
+endpoint and explicit invalidation: every write job (ingest, snapshots, seed
+expansion, rollups) calls invalidate(), which bumps a generation number that
+is part of every key, so all older entries stop matching at once.
+
+Storage is an in-process LRU by default. With RESPONSE_CACHE_REDIS=true and
+REDIS_URL set (the same Redis the rate limiter uses) entries and the
+generation live in Redis, so every worker shares them.
+
+Stampedes: entries outlive their TTL by RESPONSE_CACHE_STALE_SECONDS. When a
+hot key goes stale one request takes the key's lock and recomputes while
+the others keep getting the stale copy; on a cold miss the others wait for
+the lock holder instead of all hitting the database.
+"""
+
+import os
+import time
+import pickle
+import logging
+import threading
+from functools import wraps
+from typing import Optional, Callable, Iterable, Tuple
+from urllib.parse import urlencode
+
+from cachetools import LRUCache
+from flask import request, current_app, make_response
+
+logger = logging.getLogger(__name__)
+
+# (fresh_until, body, status, mimetype)
+CachedResponse = Tuple[float, bytes, int, str]
+
+
+class ResponseCache:
+    """LRU (or Redis) response store with generation-based invalidation"""
+
+    def __init__(self, redis_url: str = None, default_ttl: int = None, max_entries: int = None,
+                 stale_seconds: int = None, lock_timeout: float = None):
+        self.default_ttl = default_ttl or int(os.getenv('RESPONSE_CACHE_TTL', 300))
+        self.stale_seconds = stale_seconds if stale_seconds is not None else int(os.getenv('RESPONSE_CACHE_STALE_SECONDS', 60))
+        self.lock_timeout = lock_timeout or float(os.getenv('RESPONSE_CACHE_LOCK_TIMEOUT', 30))
+        self.prefix = 'respcache:'
+
+        self.redis = None
+        if redis_url:
+            try:
+                import redis
+                self.redis = redis.from_url(redis_url, socket_connect_timeout=5, socket_timeout=5)
+                self.redis.ping()
+            except Exception as e:
+                logger.warning(f"⚠️ Response cache falling back to in-process LRU (Redis unavailable: {e})")
+                self.redis = None
+
+        self._lru = LRUCache(maxsize=max_entries or int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512)))
+        self._lru_guard = threading.Lock()
+        # Striped per-key locks: bounded memory no matter how many keys come and go
+        self._locks = [threading.Lock() for _ in range(64)]
+        self._generation = 0
+
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'waits': 0, 'stores': 0,
+                      'invalidations': 0, 'errors': 0}
+        self.last_invalidation = None
+        self._invalidation_listeners = []
+
+    @property
+    def backend(self) -> str:
+        return 'redis' if self.redis else 'memory'
+
+    # ------------------------------------------------------------------
+    # Generation / invalidation
+    # ------------------------------------------------------------------
+
+    def generation(self) -> int:
+        if self.redis:
+            try:
+                return int(self.redis.get(self.prefix + 'generation') or 0)
+            except Exception:
+                self.stats['errors'] += 1
+        return self._generation
+
+    def invalidate(self, reason: str = ''):
+        """Drop every cached response (called when a write job finishes)"""
+        self._generation += 1
+        with self._lru_guard:
+            self._lru.clear()
+        if self.redis:
+            try:
+                self.redis.incr(self.prefix + 'generation')
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Response cache invalidation in Redis failed: {e}")
+        self.stats['invalidations'] += 1
+        self.last_invalidation = {'reason': reason, 'at': time.time()}
+        logger.info(f"🧹 Response cache invalidated ({reason or 'manual'})")
+        for listener in self._invalidation_listeners:
+            try:
+                listener(reason)
+            except Exception as e:
+                logger.warning(f"Response cache invalidation listener failed: {e}")
+
+    def add_invalidation_listener(self, listener: Callable[[str], None]):
+        """Call listener(reason) after every invalidate()"""
+        self._invalidation_listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        if self.redis:
+            try:
+                raw = self.redis.get(self.prefix + key)
+                return pickle.loads(raw) if raw else None
+            except Exception:
+                self.stats['errors'] += 1
+                return None
+        with self._lru_guard:
+            entry = self._lru.get(key)
+        if entry and entry[0] + self.stale_seconds < time.time():
+            return None
+        return entry
+
+    def _set(self, key: str, entry: CachedResponse, ttl: int):
+        self.stats['stores'] += 1
+        if self.redis:
+            try:
+                self.redis.set(self.prefix + key, pickle.dumps(entry), ex=ttl + self.stale_seconds)
+            except Exception:
+                self.stats['errors'] += 1
+            return
+        with self._lru_guard:
+            self._lru[key] = entry
+
+    # ------------------------------------------------------------------
+    # Per-key locks
+    # ------------------------------------------------------------------
+
+    def _acquire(self, key: str, blocking: bool) -> bool:
+        if self.redis:
+            lock_key = self.prefix + 'lock:' + key
+            deadline = time.time() + self.lock_timeout
+            while True:
+                try:
+                    if self.redis.set(lock_key, 1, nx=True, ex=int(self.lock_timeout)):
+                        return True
+                except Exception:
+                    self.stats['errors'] += 1
+                    return True
+                if not blocking or time.time() >= deadline:
+                    return False
+                time.sleep(0.05)
+                if self._get(key):
+                    return False
+        lock = self._locks[hash(key) % len(self._locks)]
+        return lock.acquire(blocking, self.lock_timeout if blocking else -1)
+
+    def _release(self, key: str):
+        if self.redis:
+            try:
+                self.redis.delete(self.prefix + 'lock:' + key)
+            except Exception:
+                self.stats['errors'] += 1
+            return
+        self._locks[hash(key) % len(self._locks)].release()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        """A fresh entry for key (counted as a hit), or None; never computes or waits"""
+        entry = self._get(f"{self.generation()}:{key}")
+        if entry and entry[0] >= time.time():
+            self.stats['hits'] += 1
+            return entry
+        return None
+
+    def get_or_compute(self, key: str, ttl: int, compute: Callable[[], Optional[CachedResponse]]) -> Tuple[Optional[CachedResponse], str]:
+        """Return (entry, cache status). compute() returns None for uncacheable responses."""
+        key = f"{self.generation()}:{key}"
+        entry = self._get(key)
+        now = time.time()
+        if entry and entry[0] >= now:
+            self.stats['hits'] += 1
+            return entry, 'HIT'
+
+        if entry:
+            # Stale: one request refreshes, everyone else keeps the stale copy
+            locked = self._acquire(key, blocking=False)
+            if not locked:
+                self.stats['stale_hits'] += 1
+                return entry, 'STALE'
+        else:
+            # Cold: wait for whoever is already computing this key
+            locked = self._acquire(key, blocking=True)
+            entry = self._get(key)
+            if entry and entry[0] >= time.time():
+                if locked:
+                    self._release(key)
+                self.stats['waits'] += 1
+                self.stats['hits'] += 1
+                return entry, 'HIT'
+
+        self.stats['misses'] += 1
+        try:
+            fresh = compute()
+            if fresh is not None:
+                self._set(key, fresh, ttl)
+            return fresh, 'MISS'
+        finally:
+            if locked:
+                self._release(key)
+
+    def metrics(self) -> dict:
+        lookups = self.stats['hits'] + self.stats['stale_hits'] + self.stats['misses']
+        data = dict(self.stats)
+        data.update({
+            'backend': self.backend,
+            'generation': self.generation(),
+            'entries': len(self._lru) if not self.redis else None,
+            'hit_rate': round((self.stats['hits'] + self.stats['stale_hits']) / lookups * 100, 1) if lookups else 0.0,
+            'default_ttl': self.default_ttl,
+            'stale_seconds': self.stale_seconds,
+            'last_invalidation': self.last_invalidation,
+        })
+        return data
+
+
+def request_cache_key(endpoint: str, view_args: dict, args: Iterable[Tuple[str, str]],
+                      version: Optional[dict] = None) -> str:
+    """endpoint + view args + sorted query args (auth parameters excluded).
+
+    When conditional requests are set up the data version's generation is part
+    of the key too, so write jobs finished by other processes also retire old
+    entries. Only the generation: it moves once per write job, while
+    last_seen moves with every ingest batch and would miss the cache for the
+    whole of a collection run.
+    """
+    args = sorted((k, v) for k, v in args if k != 'api_key')
+    key = f"{endpoint}:{urlencode(sorted((view_args or {}).items()))}?{urlencode(args)}"
+    if version:
+        key += f"@{version['generation']}"
+    return key
+
+
+def _request_key() -> str:
+    data_version = current_app.extensions.get('data_version')
+    return request_cache_key(request.endpoint, request.view_args, request.args.items(multi=True),
+                             data_version.get() if data_version else None)
+
+
+def cached_response(ttl: int = None):
+    """Cache a view's 200 responses in the app's ResponseCache (see setup_response_cache)"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None or request.method != 'GET':
+                return f(*args, **kwargs)
+
+            produced = {}
+
+            def compute():
+                response = make_response(f(*args, **kwargs))
+                produced['response'] = response
+                if response.status_code != 200 or response.is_streamed:
+                    return None
+                return (time.time() + (ttl or cache.default_ttl), response.get_data(),
+                        response.status_code, response.mimetype)
+
+            entry, status = cache.get_or_compute(_request_key(), ttl or cache.default_ttl, compute)
+            if 'response' in produced:
+                response = produced['response']
+            else:
+                _, body, code, mimetype = entry
+                response = current_app.response_class(body, status=code, mimetype=mimetype)
+            response.headers['X-Cache'] = status
+            return response
+        wrapper.cache_ttl = ttl
+        wrapper.response_cached = True
+        return wrapper
+    return decorator
+
+
+def setup_response_cache(app) -> ResponseCache:
+    """Create the app's response cache (Redis-backed when RESPONSE_CACHE_REDIS=true)"""
+    redis_url = os.getenv('REDIS_URL') if os.getenv('RESPONSE_CACHE_REDIS', 'false').lower() == 'true' else None
+    cache = ResponseCache(redis_url=redis_url)
+    app.extensions['response_cache'] = cache
+
+    logger.info("✅ Response cache initialized")
+    logger.info(f"   Backend: {'Redis' if cache.redis else 'In-Memory LRU'}, default TTL {cache.default_ttl}s")
+    return cache
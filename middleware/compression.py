@@ -0,0 +1,238 @@
+"""Negotiated gzip / brotli compression for API responses.
+
+An after_request hook compresses text-like responses (JSON, NDJSON, HTML,
+CSV, ...) for clients that send a matching Accept-Encoding:
+
+- buffered bodies smaller than COMPRESSION_MIN_BYTES are sent as-is; the
+  framing overhead and CPU aren't worth it for tiny payloads
+- streamed bodies (/api/jobs) are compressed chunk by chunk with
+  a sync flush after each chunk, so clients still see rows as they are
+  produced and nothing is buffered
+- brotli (br) is preferred when the optional `brotli` package is installed
+  and the client accepts it, then gzip
+
+Views opt out with @no_compression (for bodies that are already compressed or
+must reach the client byte-for-byte). COMPRESSION_ENABLED=false turns the
+whole thing off.
+
+Bodies served from the response cache can be compressed under a memo key
+(the cache entry), so repeated hits reuse one compressed copy per encoding
+(COMPRESSION_MEMO_ENTRIES of them) instead of compressing every time.
+
+Per-encoding counters (bytes in/out, bytes saved, CPU time) are reported by
+metrics() for tuning COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_LEVEL.
+"""
+
+import os
+import time
+import zlib
+import logging
+import threading
+from typing import Hashable, Iterable, Iterator, Optional
+
+from cachetools import LRUCache
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml',
+    'image/svg+xml',
+}
+
+
+def no_compression(f):
+    """Send this view's responses uncompressed"""
+    f.compress = False
+    return f
+
+
+def compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+class ResponseCompressor:
+    """Picks an encoding per request, compresses bodies and streams, keeps counters"""
+
+    def __init__(self, min_bytes: int = None, gzip_level: int = None, brotli_level: int = None):
+        self.min_bytes = min_bytes if min_bytes is not None else int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+        self.gzip_level = gzip_level if gzip_level is not None else int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+        # Quality 4 is a good trade for dynamic responses; 11 is for static assets
+        self.brotli_level = brotli_level if brotli_level is not None else int(os.getenv('COMPRESSION_BROTLI_LEVEL', 4))
+        self.encodings = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+        self.stats = {
+            encoding: {'responses': 0, 'streamed': 0, 'memo_hits': 0, 'bytes_in': 0, 'bytes_out': 0,
+                       'cpu_seconds': 0.0}
+            for encoding in self.encodings
+        }
+        self.skipped = {'small': 0, 'not_accepted': 0, 'opted_out': 0}
+        # Request threads and the ASGI loop all update the counters and the memo
+        self._lock = threading.Lock()
+        # (memo key, encoding) -> compressed body
+        self._memo = LRUCache(maxsize=int(os.getenv('COMPRESSION_MEMO_ENTRIES', 256)))
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Best encoding the client accepts (q > 0), or None"""
+        if not accept_encoding:
+            return None
+        accepted = parse_accept_header(accept_encoding)
+        best = max(self.encodings, key=lambda encoding: accepted.quality(encoding))
+        return best if accepted.quality(best) > 0 else None
+
+    def _compressor(self, encoding: str):
+        if encoding == 'br':
+            return brotli.Compressor(quality=self.brotli_level)
+        return zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+
+    def _record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_start: float, counter: str = None):
+        cpu_seconds = time.thread_time() - cpu_start
+        with self._lock:
+            stats = self.stats[encoding]
+            if counter:
+                stats[counter] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['cpu_seconds'] += cpu_seconds
+
+    def _skip(self, reason: str):
+        with self._lock:
+            self.skipped[reason] += 1
+
+    def memoized(self, memo_key: Hashable, encoding: str) -> Optional[bytes]:
+        """The body compressed earlier under memo_key, if still held"""
+        with self._lock:
+            out = self._memo.get((memo_key, encoding))
+            if out is not None:
+                self.stats[encoding]['memo_hits'] += 1
+            return out
+
+    def compress(self, body: bytes, encoding: str, memo_key: Hashable = None) -> bytes:
+        """Compress a whole body (kept for memoized() under memo_key, when given)"""
+        cpu_start = time.thread_time()
+        if encoding == 'br':
+            out = brotli.compress(body, quality=self.brotli_level)
+        else:
+            compressor = self._compressor(encoding)
+            out = compressor.compress(body) + compressor.flush()
+        self._record(encoding, len(body), len(out), cpu_start, 'responses')
+        if memo_key is not None:
+            with self._lock:
+                self._memo[(memo_key, encoding)] = out
+        return out
+
+    def compress_stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        """Compress an iterable of chunks, flushing after each so the client sees it"""
+        compressor = self._compressor(encoding)
+        self._record(encoding, 0, 0, time.thread_time(), 'streamed')
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                cpu_start = time.thread_time()
+                if encoding == 'br':
+                    out = compressor.process(chunk) + compressor.flush()
+                else:
+                    out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                self._record(encoding, len(chunk), len(out), cpu_start)
+                yield out
+            cpu_start = time.thread_time()
+            out = compressor.finish() if encoding == 'br' else compressor.flush()
+            self._record(encoding, 0, len(out), cpu_start)
+            yield out
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+
+    def after_request(self, response, view=None):
+        """Compress a Flask response in place when the client and the body allow it"""
+        if (response.direct_passthrough or 'Content-Encoding' in response.headers
+                or 'Content-Range' in response.headers or not 200 <= response.status_code < 300
+                or response.status_code == 204 or request.method == 'HEAD'
+                or not compressible(response.mimetype)):
+            return response
+        if not getattr(view, 'compress', True):
+            self._skip('opted_out')
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            self._skip('not_accepted')
+            return response
+
+        if response.is_streamed:
+            source = response.response
+            chunks = response.iter_encoded()
+
+            def body():
+                try:
+                    yield from chunks
+                finally:
+                    if hasattr(source, 'close'):
+                        source.close()
+
+            response.response = self.compress_stream(body(), encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_bytes:
+                self._skip('small')
+                return response
+            response.set_data(self.compress(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # A strong validator must differ between representations
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = {encoding: dict(stats) for encoding, stats in self.stats.items()}
+            skipped = dict(self.skipped)
+            memo_entries = len(self._memo)
+        encodings = {}
+        for encoding, stats in snapshot.items():
+            megabytes = stats['bytes_in'] / 1e6
+            encodings[encoding] = dict(
+                stats,
+                cpu_seconds=round(stats['cpu_seconds'], 3),
+                bytes_saved=stats['bytes_in'] - stats['bytes_out'],
+                ratio=round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None,
+                cpu_ms_per_mb=round(stats['cpu_seconds'] * 1000 / megabytes, 2) if megabytes else None,
+            )
+        return {
+            'levels': {'gzip': self.gzip_level, 'br': self.brotli_level if BROTLI_AVAILABLE else None},
+            'min_bytes': self.min_bytes,
+            'encodings': encodings,
+            'skipped': skipped,
+            'memo_entries': memo_entries,
+        }
+
+
+def setup_compression(app) -> Optional[ResponseCompressor]:
+    """Compress API responses (COMPRESSION_ENABLED=false to disable)"""
+    if os.getenv('COMPRESSION_ENABLED', 'true').lower() != 'true':
+        logger.info("Response compression disabled")
+        return None
+
+    compressor = ResponseCompressor()
+    app.extensions['response_compressor'] = compressor
+
+    @app.after_request
+    def compress_response(response):
+        return compressor.after_request(response, app.view_functions.get(request.endpoint))
+
+    logger.info(f"✅ Response compression: {', '.join(compressor.encodings)} "
+                f"(gzip level {compressor.gzip_level}, min {compressor.min_bytes} bytes)")
+    return compressor
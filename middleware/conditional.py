@@ -0,0 +1,120 @@
+"""HTTP conditional requests (ETag / Last-Modified) for polled API endpoints.
+
+The validators come from a cheap data version (see Database.get_data_version)
+rather than from the response body, so If-None-Match / If-Modified-Since can
+be answered with 304 before the view runs any expensive query.
+
+The ETag also covers the request path + query and the current UTC date:
+endpoints aggregate over NOW()-relative windows, so their output moves day to
+day even when no new data arrived.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import request, current_app, make_response
+from werkzeug.datastructures import ETags
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersion:
+    """Memoizes the version provider for a couple of seconds to absorb polling bursts"""
+
+    def __init__(self, provider: Callable[[], Optional[dict]], max_age: float = None):
+        self.provider = provider
+        self.max_age = max_age if max_age is not None else float(os.getenv('DATA_VERSION_CACHE_SECONDS', 2))
+        self._value = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'not_modified': 0, 'full_responses': 0}
+
+    def get(self) -> Optional[dict]:
+        with self._lock:
+            if self._value is None or time.monotonic() - self._fetched_at > self.max_age:
+                self._value = self.provider()
+                self._fetched_at = time.monotonic()
+            return self._value
+
+    def peek(self) -> Optional[dict]:
+        """The memoized version if still fresh, without ever calling the provider"""
+        if self._value is not None and time.monotonic() - self._fetched_at <= self.max_age:
+            return self._value
+        return None
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+
+
+def _validators(version: dict, full_path: str):
+    """(etag, last_modified) for a request path + query under a data version"""
+    today = datetime.now(timezone.utc).date()
+    parts = [
+        str(version['generation']),
+        version['last_seen'].isoformat() if version['last_seen'] else '-',
+        version['snapshot_time'].isoformat() if version['snapshot_time'] else '-',
+        today.isoformat(),
+        full_path,
+    ]
+    etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:20]
+
+    # Timestamps are stored as naive UTC
+    start_of_day = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+    last_modified = version['last_modified']
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return etag, max(filter(None, (last_modified, start_of_day)))
+
+
+def evaluate_conditional(version: dict, full_path: str, if_none_match: ETags, if_modified_since: Optional[datetime]):
+    """(not_modified, etag, last_modified) for a request's validators under a data version"""
+    etag, last_modified = _validators(version, full_path)
+    if if_none_match:
+        return if_none_match.contains_weak(etag), etag, last_modified
+    return if_modified_since is not None and last_modified <= if_modified_since, etag, last_modified
+
+
+def conditional_response(f):
+    """Answer If-None-Match / If-Modified-Since with 304 from the data version alone"""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        data_version = current_app.extensions.get('data_version')
+        version = data_version.get() if data_version and request.method == 'GET' else None
+        if version is None:
+            return f(*args, **kwargs)
+
+        not_modified, etag, last_modified = evaluate_conditional(
+            version, request.full_path, request.if_none_match, request.if_modified_since
+        )
+
+        if not_modified:
+            data_version.stats['not_modified'] += 1
+            response = current_app.response_class(status=304)
+        else:
+            data_version.stats['full_responses'] += 1
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        # Let browsers keep the body but revalidate on every poll
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    wrapper.conditional = True
+    return wrapper
+
+
+def setup_conditional_requests(app, version_provider: Callable[[], Optional[dict]]) -> DataVersion:
+    """Register the data version source used by @conditional_response"""
+    data_version = DataVersion(version_provider)
+    app.extensions['data_version'] = data_version
+    logger.info(f"✅ Conditional requests enabled (data version cached {data_version.max_age:g}s)")
+    return data_version
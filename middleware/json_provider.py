@@ -0,0 +1,123 @@
+"""Fast JSON serialization for API responses.
+
+With orjson installed (and JSON_PROVIDER not set to 'stdlib') the app's
+json provider is replaced by OrjsonProvider, so jsonify(), app.json.dumps()
+and every handler returning a dict go through orjson.
+
+Wire format differences from Flask's default provider:
+- datetime / date are ISO 8601 instead of RFC 822 ('2024-01-31T09:00:00+00:00'
+  rather than 'Wed, 31 Jan 2024 09:00:00 GMT'). Timestamps are stored as naive
+  UTC, so naive datetimes get an explicit +00:00 and still parse to the same
+  instant in browsers.
+- keys are not sorted.
+Decimal stays a string, as before. JSON_PROVIDER=stdlib restores the old
+provider exactly.
+
+Payloads stored as JSON and served later as-is (the analytics rollups) are
+written with stored_dumps(), which encodes like the provider the app
+installs, so their dates match the live responses.
+"""
+
+import os
+import json
+import logging
+from decimal import Decimal
+from typing import Callable, Iterable, Sequence
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _default(o):
+    """Types orjson doesn't serialize itself, encoded the way Flask's provider does"""
+    if isinstance(o, Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    option = (orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if ORJSON_AVAILABLE else 0
+
+    def dumpb(self, obj, **kwargs) -> bytes:
+        if kwargs:
+            # Caller asked for stdlib options (indent, sort_keys, ...)
+            return super().dumps(obj, **kwargs).encode()
+        return orjson.dumps(obj, default=_default, option=self.option)
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.dumpb(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=option), mimetype=self.mimetype)
+
+
+def json_encoder(app) -> Callable[[object], bytes]:
+    """obj -> bytes with the app's provider, for handlers that write bodies themselves"""
+    dumpb = getattr(app.json, 'dumpb', None)
+    if dumpb is not None:
+        return dumpb
+    dumps = app.json.dumps
+    return lambda obj: dumps(obj).encode()
+
+
+def encode_rows(dumpb: Callable[[object], bytes], columns: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """Comma-separated JSON objects for rows, without the surrounding brackets.
+
+    One encoder call per chunk instead of one per row. The short-lived dicts
+    measured faster under orjson than splicing per-value encodings into
+    precomputed key templates; format=rows (encode_tuples) skips them entirely.
+    """
+    body = dumpb([dict(zip(columns, row)) for row in rows])
+    return body[1:-1]
+
+
+def encode_tuples(dumpb: Callable[[object], bytes], rows: Sequence[Sequence]) -> bytes:
+    """Comma-separated JSON arrays straight from row tuples, without the surrounding brackets"""
+    return dumpb(rows)[1:-1]
+
+
+def provider_name() -> str:
+    """'orjson' or 'stdlib': the provider setup_json_provider installs"""
+    wanted = os.getenv('JSON_PROVIDER', 'orjson').lower()
+    return 'orjson' if wanted == 'orjson' and ORJSON_AVAILABLE else 'stdlib'
+
+
+def stored_dumps(obj) -> str:
+    """obj -> JSON text encoded like the app's provider, without needing the app"""
+    if provider_name() == 'orjson':
+        return orjson.dumps(obj, default=_default, option=OrjsonProvider.option).decode()
+    return json.dumps(obj, default=DefaultJSONProvider.default)
+
+
+def setup_json_provider(app) -> str:
+    """Install the fastest available JSON provider (JSON_PROVIDER=orjson|stdlib)"""
+    wanted = provider_name()
+    if wanted == 'stdlib' and os.getenv('JSON_PROVIDER', 'orjson').lower() == 'orjson':
+        logger.warning("⚠️ orjson not installed - using the stdlib JSON provider")
+    if wanted == 'orjson':
+        app.json = OrjsonProvider(app)
+    logger.info(f"✅ JSON provider: {wanted}")
+    return wanted
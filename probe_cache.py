@@ -0,0 +1,154 @@
+"""Cache of ATS token probe outcomes, so discovery doesn't re-probe known answers.
+
+Every discovery run generates the same token variations for a seed and probes
+each (ats_type, token) pair over HTTP. ProbeCache remembers what each probe
+found, keyed by (ats_type, token):
+
+  hit    a board with jobs          kept CACHE_TTL_SECONDS (the refresh cycle
+                                    keeps known boards up to date meanwhile)
+  miss   no board / an empty one,   kept CACHE_MISS_TTL_SECONDS (days)
+         a 404, or a host that
+         doesn't resolve/connect
+  error  a 429/5xx/timeout,         kept CACHE_ERROR_TTL_SECONDS (minutes)
+         so we don't know
+
+Entries live in Postgres (ats_probe_cache) when the collector has a database,
+otherwise only for the run. A run preloads the entries for all of its tokens in
+one query and writes new outcomes back in batches. ATSScraper.probe() checks
+the cache before check_token() sends anything; each entry remembers how many
+requests the probe took, which is what a cache hit saves.
+
+    cache = ProbeCache(adb)
+    await cache.preload(tokens)
+    board = await scraper.probe(token)   # via scraper.probe_cache = cache
+    await cache.close()                  # flush new outcomes
+    cache.report()                       # lookups, hits, requests avoided
+
+CACHE_ATS_RESULTS=false disables it (run_discovery then doesn't create one).
+"""
+
+import os
+import time
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from config import config
+except ImportError:
+    config = None
+
+logger = logging.getLogger(__name__)
+
+HIT, MISS, ERROR = 'hit', 'miss', 'error'
+
+DEFAULT_TTLS = {
+    HIT: config.CACHE_TTL_SECONDS if config else 3600,
+    MISS: config.CACHE_MISS_TTL_SECONDS if config else 3 * 24 * 3600,
+    ERROR: config.CACHE_ERROR_TTL_SECONDS if config else 900,
+}
+
+
+@dataclass
+class ProbeEntry:
+    """What probing one token on one ATS found"""
+    outcome: str
+    requests: int  # HTTP calls the probe made, i.e. what reusing it saves
+    expires_at: float  # time.monotonic()
+    company_name: Optional[str] = None
+    board_url: Optional[str] = None
+    job_count: int = 0
+
+
+@dataclass
+class ProbeTrace:
+    """Requests made while one probe runs (set by ATSScraper.request)"""
+    requests: int = 0
+    failed: bool = False
+
+
+# The probe running in the current task, if any
+current_probe: ContextVar[Optional[ProbeTrace]] = ContextVar('current_probe', default=None)
+
+PROBE_CACHE_ENABLED = config.CACHE_ATS_RESULTS if config else True
+
+
+class ProbeCache:
+    """(ats_type, token) -> ProbeEntry, backed by ats_probe_cache when given an AsyncDatabase"""
+
+    def __init__(self, adb=None, ttls: Dict[str, int] = None, max_pending: int = None):
+        self.adb = adb
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_pending = max_pending or int(os.getenv('PROBE_CACHE_MAX_PENDING', 500))
+        self._entries: Dict[Tuple[str, str], ProbeEntry] = {}
+        self._pending: List[Tuple] = []
+        self._inflight: set = set()
+        self.stats = {'lookups': 0, 'hits': 0, 'stored': 0, 'requests_avoided': 0, 'preloaded': 0}
+        self.hits_by_outcome = {HIT: 0, MISS: 0, ERROR: 0}
+
+    async def preload(self, tokens: Iterable[str]):
+        """Load unexpired entries for these tokens in one query"""
+        if self.adb is None:
+            return
+        rows = await self.adb.load_probe_cache(sorted(set(tokens)))
+        now = time.monotonic()
+        for row in rows:
+            self._entries[(row['ats_type'], row['token'])] = ProbeEntry(
+                outcome=row['outcome'],
+                requests=row['requests'],
+                expires_at=now + row['ttl_seconds'],
+                company_name=row['company_name'],
+                board_url=row['board_url'],
+                job_count=row['job_count'],
+            )
+        self.stats['preloaded'] += len(rows)
+        logger.info(f"🗂️ Probe cache: {len(rows)} unexpired outcomes loaded")
+
+    def get(self, ats_type: str, token: str) -> Optional[ProbeEntry]:
+        self.stats['lookups'] += 1
+        entry = self._entries.get((ats_type, token))
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[(ats_type, token)]
+            return None
+        self.stats['hits'] += 1
+        self.stats['requests_avoided'] += entry.requests
+        self.hits_by_outcome[entry.outcome] += 1
+        return entry
+
+    def put(self, ats_type: str, token: str, outcome: str, requests: int, company_name: str = None,
+            board_url: str = None, job_count: int = 0):
+        ttl = self.ttls[outcome]
+        self._entries[(ats_type, token)] = ProbeEntry(
+            outcome, requests, time.monotonic() + ttl, company_name, board_url, job_count
+        )
+        self.stats['stored'] += 1
+        if self.adb is None:
+            return
+        self._pending.append((ats_type, token, outcome, requests, company_name, board_url, job_count, ttl))
+        if len(self._pending) >= self.max_pending:
+            task = asyncio.create_task(self.flush())
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        # Swap before awaiting so outcomes stored during the write land in the next flush
+        pending, self._pending = self._pending, []
+        return await self.adb.save_probe_cache(pending)
+
+    async def close(self):
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.flush()
+
+    def report(self) -> Dict:
+        return dict(
+            self.stats,
+            hits_by_outcome=dict(self.hits_by_outcome),
+            hit_rate=round(self.stats['hits'] / self.stats['lookups'], 3) if self.stats['lookups'] else None,
+        )
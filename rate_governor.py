@@ -0,0 +1,270 @@
+"""Per-host rate limiting and concurrency for the ATS scrapers.
+
+Every request an ATSScraper makes goes through one shared HostGovernor. Hosts
+are keyed by registrable domain (last two labels), so API hosts like
+boards-api.greenhouse.io and boards.greenhouse.io share one budget, which is
+how those providers throttle us. Subdomain-per-tenant ATSs (Workday's
+*.myworkdayjobs.com, iCIMS, Recruitee, Breezy; ATS_TENANT_SUBDOMAIN_DOMAINS)
+serve each company from its own host, so they are keyed by full hostname:
+one slow tenant doesn't throttle every other company on the provider.
+
+Each host gets a token bucket plus a cap on in-flight requests:
+
+- the bucket starts at the ATS's configured rate (config.RATE_LIMIT_<ATS>,
+  then ATS_CONFIGS[ats]['rate_limit'], then RATE_LIMIT_DEFAULT, in requests
+  per second)
+- AIMD: every ATS_RATE_INCREASE_EVERY answered requests the rate grows by
+  ATS_RATE_INCREASE_STEP x the configured rate (up to ATS_RATE_CEILING_FACTOR
+  x configured). It is halved (ATS_RATE_DECREASE_FACTOR, at most once per
+  ATS_RATE_DECREASE_COOLDOWN seconds so one burst of failing in-flight
+  requests counts once, never below ATS_RATE_FLOOR_FACTOR x configured) by
+  an explicit throttle - a 429, or a 503 with Retry-After - or by a
+  sustained failure ratio: ATS_FAILURE_RATIO of the last ATS_FAILURE_WINDOW
+  answers being 5xx or timeouts
+- Retry-After on a 429/503 pauses the host for that long
+
+404s and other 4xx are normal answers for token probes and count as
+successes; DNS and connection errors (nonexistent subdomains) are neutral,
+and so are timeouts on tenant subdomains (a slow tenant, not our rate).
+
+    governor = HostGovernor()
+    async with governor.slot(url, 'greenhouse') as slot:
+        async with session.get(url) as resp:
+            slot.status = resp.status
+    governor.report()   # per-host rate, throughput, throttling counters
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    from config import config, ATS_CONFIGS as CONFIGURED_ATS
+except ImportError:
+    config = None
+    CONFIGURED_ATS = {}
+
+logger = logging.getLogger(__name__)
+
+ATS_RATE_CEILING_FACTOR = float(os.getenv('ATS_RATE_CEILING_FACTOR', 5.0))
+ATS_RATE_FLOOR_FACTOR = float(os.getenv('ATS_RATE_FLOOR_FACTOR', 0.1))
+ATS_RATE_INCREASE_EVERY = int(os.getenv('ATS_RATE_INCREASE_EVERY', 20))
+ATS_RATE_INCREASE_STEP = float(os.getenv('ATS_RATE_INCREASE_STEP', 0.25))
+ATS_RATE_DECREASE_FACTOR = float(os.getenv('ATS_RATE_DECREASE_FACTOR', 0.5))
+ATS_RATE_DECREASE_COOLDOWN = float(os.getenv('ATS_RATE_DECREASE_COOLDOWN', 2.0))
+ATS_HOST_CONCURRENCY = int(os.getenv('ATS_HOST_CONCURRENCY', 10))
+# Never sleep longer than this for one Retry-After
+ATS_MAX_RETRY_AFTER = float(os.getenv('ATS_MAX_RETRY_AFTER', 60))
+# Share of the last ATS_FAILURE_WINDOW answers that must be 5xx/timeouts to cut the rate
+ATS_FAILURE_WINDOW = int(os.getenv('ATS_FAILURE_WINDOW', 20))
+ATS_FAILURE_RATIO = float(os.getenv('ATS_FAILURE_RATIO', 0.5))
+# Registrable domains that host one tenant per subdomain (budgeted per hostname)
+TENANT_SUBDOMAIN_DOMAINS = frozenset(
+    domain.strip() for domain in
+    os.getenv('ATS_TENANT_SUBDOMAIN_DOMAINS', 'myworkdayjobs.com,icims.com,recruitee.com,breezy.hr').split(',')
+    if domain.strip()
+)
+
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+SERVER_ERROR_STATUSES = {500, 502, 503, 504}
+
+
+def configured_rate(ats_type: str) -> float:
+    """Starting requests/second for an ATS (workday_wd5 -> workday)"""
+    ats = ats_type.split('_')[0]
+    default = config.RATE_LIMIT_DEFAULT if config else 1.5
+    override = getattr(config, f'RATE_LIMIT_{ats.upper()}', None) if config else None
+    if override:
+        return float(override)
+    return float(CONFIGURED_ATS.get(ats, {}).get('rate_limit', default))
+
+
+def host_key(url: str) -> str:
+    """Registrable domain of a URL: boards-api.greenhouse.io -> greenhouse.io
+
+    Tenant subdomains keep their full hostname: acme.recruitee.com stays as is.
+    """
+    hostname = urlparse(url).hostname or url
+    domain = '.'.join(hostname.split('.')[-2:])
+    return hostname if domain in TENANT_SUBDOMAIN_DOMAINS else domain
+
+
+def is_tenant_host(host: str) -> bool:
+    return '.'.join(host.split('.')[-2:]) in TENANT_SUBDOMAIN_DOMAINS and host.count('.') > 1
+
+
+@dataclass
+class Slot:
+    """One governed request; the caller fills in how it went"""
+    host: str
+    started: float = field(default_factory=time.monotonic)
+    status: Optional[int] = None
+    retry_after: Optional[str] = None
+    timed_out: bool = False
+    cancelled: bool = False
+
+
+class HostBucket:
+    """Token bucket + in-flight cap with AIMD rate adjustment for one host"""
+
+    def __init__(self, host: str, rate: float, concurrency: int = ATS_HOST_CONCURRENCY):
+        self.host = host
+        self.base_rate = rate
+        self.rate = rate
+        self.max_rate = rate * ATS_RATE_CEILING_FACTOR
+        self.min_rate = rate * ATS_RATE_FLOOR_FACTOR
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.streak = 0
+        self.tenant = is_tenant_host(host)
+        # True for each recent 5xx/timeout, False for each success
+        self._recent = deque(maxlen=ATS_FAILURE_WINDOW)
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(concurrency)
+
+        self.first_request = None
+        self.last_request = None
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'server_errors': 0, 'timeouts': 0,
+                      'errors': 0, 'cancelled': 0, 'rate_increases': 0, 'rate_decreases': 0,
+                      'wait_seconds': 0.0, 'latency_seconds': 0.0}
+        self.peak_rate = rate
+
+    def _refill(self, now: float):
+        # Up to one second of burst
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        waited_from = time.monotonic()
+        await self._in_flight.acquire()
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        break
+                    await asyncio.sleep((1.0 - self.tokens) / self.rate)
+        except BaseException:
+            self._in_flight.release()
+            raise
+        now = time.monotonic()
+        self.stats['wait_seconds'] += now - waited_from
+        self.stats['requests'] += 1
+        self.first_request = self.first_request or now
+        self.last_request = now
+
+    def release(self, slot: Slot):
+        self._in_flight.release()
+        now = time.monotonic()
+        if slot.cancelled:
+            self.stats['cancelled'] += 1
+            return
+        self.stats['latency_seconds'] += now - slot.started
+
+        if slot.status == 429 or (slot.status == 503 and slot.retry_after):
+            # The host told us to slow down
+            self.stats['throttled'] += 1
+            self._decrease(now, slot.retry_after)
+        elif slot.timed_out or slot.status in SERVER_ERROR_STATUSES:
+            if slot.timed_out:
+                self.stats['timeouts'] += 1
+            else:
+                self.stats['server_errors'] += 1
+            self.streak = 0
+            if slot.timed_out and self.tenant:
+                return  # a slow tenant, not our rate
+            # One failure is noise; only a sustained ratio means we're overloading the host
+            self._recent.append(True)
+            if self._recent.count(True) >= ATS_FAILURE_RATIO * ATS_FAILURE_WINDOW:
+                self._recent.clear()
+                self._decrease(now, None)
+        elif slot.status is None:
+            # Connection/DNS error: says nothing about our rate
+            self.stats['errors'] += 1
+        else:
+            self.stats['ok'] += 1
+            self._recent.append(False)
+            self.streak += 1
+            if self.streak >= ATS_RATE_INCREASE_EVERY and self.rate < self.max_rate:
+                self.streak = 0
+                self.rate = min(self.max_rate, self.rate + self.base_rate * ATS_RATE_INCREASE_STEP)
+                self.peak_rate = max(self.peak_rate, self.rate)
+                self.stats['rate_increases'] += 1
+
+    def _decrease(self, now: float, retry_after: Optional[str]):
+        self.streak = 0
+        if retry_after:
+            try:
+                delay = min(float(retry_after), ATS_MAX_RETRY_AFTER)
+                self.paused_until = max(self.paused_until, now + delay)
+            except ValueError:
+                pass  # HTTP-date form; the rate cut below still applies
+        if now - self.last_decrease < ATS_RATE_DECREASE_COOLDOWN:
+            return
+        self.last_decrease = now
+        self.rate = max(self.min_rate, self.rate * ATS_RATE_DECREASE_FACTOR)
+        self.tokens = min(self.tokens, 0.0)
+        self.stats['rate_decreases'] += 1
+        logger.info(f"⏬ {self.host}: throttled, rate now {self.rate:.2f}/s")
+
+    def report(self) -> Dict:
+        active = (self.last_request - self.first_request) if self.first_request else 0.0
+        answered = self.stats['requests'] - self.stats['errors'] - self.stats['cancelled']
+        return dict(
+            self.stats,
+            wait_seconds=round(self.stats['wait_seconds'], 2),
+            latency_seconds=round(self.stats['latency_seconds'], 2),
+            avg_latency_ms=round(self.stats['latency_seconds'] / answered * 1000, 1) if answered > 0 else None,
+            configured_rate=self.base_rate,
+            current_rate=round(self.rate, 2),
+            peak_rate=round(self.peak_rate, 2),
+            throughput_per_second=round(self.stats['requests'] / active, 2) if active > 0 else None,
+        )
+
+
+class HostGovernor:
+    """Shared by every ATSScraper of a collector: one HostBucket per host"""
+
+    def __init__(self, concurrency: int = ATS_HOST_CONCURRENCY):
+        self.concurrency = concurrency
+        self.buckets: Dict[str, HostBucket] = {}
+
+    def bucket(self, url: str, ats_type: str) -> HostBucket:
+        host = host_key(url)
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = HostBucket(host, configured_rate(ats_type), self.concurrency)
+        return bucket
+
+    @asynccontextmanager
+    async def slot(self, url: str, ats_type: str):
+        """Wait for the host's budget; record the outcome the caller sets on the slot"""
+        bucket = self.bucket(url, ats_type)
+        await bucket.acquire()
+        slot = Slot(host=bucket.host)
+        try:
+            yield slot
+        except asyncio.TimeoutError:
+            slot.timed_out = True
+            raise
+        except asyncio.CancelledError:
+            slot.cancelled = True
+            raise
+        finally:
+            bucket.release(slot)
+
+    def report(self) -> Dict[str, Dict]:
+        return {host: bucket.report() for host, bucket in sorted(self.buckets.items())}
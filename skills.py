@@ -0,0 +1,138 @@
+"""Skills matching engine shared by the analytics and trends queries.
+
+All skill patterns are compiled once into a single alternation. Each pattern
+sits in its own named group inside a lookahead, so one finditer pass reports
+every skill that matches at any position (overlapping matches such as
+"Node.js" → Node.js + JavaScript are kept, exactly like searching each
+pattern separately). Tagging is cached per distinct title, so a batch of 100k
+titles with heavy duplication only runs the regex once per unique title.
+
+    from skills import count_skills
+    counts = count_skills([(title, n_jobs), ...])   # {'Python': 1234, ...}
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Comprehensive skill patterns (matched case-insensitively)
+SKILL_PATTERNS: Dict[str, str] = {
+    # Programming Languages
+    'Python': r'\bPython\b',
+    'JavaScript': r'\bJavaScript\b|\bJS\b',
+    'TypeScript': r'\bTypeScript\b|\bTS\b',
+    'Java': r'\bJava\b(?!Script)',
+    'Go': r'\bGo\b|\bGolang\b',
+    'Rust': r'\bRust\b',
+    'C++': r'\bC\+\+\b',
+    'C#': r'\bC#\b',
+    'Ruby': r'\bRuby\b',
+    'PHP': r'\bPHP\b',
+    'Swift': r'\bSwift\b',
+    'Kotlin': r'\bKotlin\b',
+
+    # Frontend
+    'React': r'\bReact\b|\bReactJS\b',
+    'Vue': r'\bVue\.js\b|\bVue\b',
+    'Angular': r'\bAngular\b',
+    'Next.js': r'\bNext\.js\b',
+    'Svelte': r'\bSvelte\b',
+    'HTML': r'\bHTML\b',
+    'CSS': r'\bCSS\b',
+    'Tailwind': r'\bTailwind\b',
+    'GraphQL': r'\bGraphQL\b',
+
+    # Backend
+    'Node.js': r'\bNode\.?js\b',
+    'Django': r'\bDjango\b',
+    'Flask': r'\bFlask\b',
+    'FastAPI': r'\bFastAPI\b',
+    'Spring': r'\bSpring\b',
+    'Express': r'\bExpress\b',
+    'Kafka': r'\bKafka\b',
+
+    # Cloud
+    'AWS': r'\bAWS\b',
+    'Azure': r'\bAzure\b',
+    'GCP': r'\bGCP\b|\bGoogle Cloud\b',
+    'Docker': r'\bDocker\b',
+    'Kubernetes': r'\bKubernetes\b|\bK8s\b',
+    'Terraform': r'\bTerraform\b',
+
+    # Databases
+    'SQL': r'\bSQL\b',
+    'PostgreSQL': r'\bPostgreSQL\b|\bPostgres\b',
+    'MySQL': r'\bMySQL\b',
+    'MongoDB': r'\bMongoDB\b',
+    'Redis': r'\bRedis\b',
+    'Elasticsearch': r'\bElasticsearch\b',
+
+    # Data & AI
+    'Machine Learning': r'\bMachine Learning\b|\bML\b',
+    'AI': r'\bAI\b|\bArtificial Intelligence\b',
+    'Data Science': r'\bData Science\b',
+    'TensorFlow': r'\bTensorFlow\b',
+    'PyTorch': r'\bPyTorch\b',
+    'Spark': r'\bSpark\b',
+
+    # DevOps
+    'CI/CD': r'\bCI/CD\b',
+    'Jenkins': r'\bJenkins\b',
+    'Git': r'\bGit\b(?!Hub|Lab)',
+    'Linux': r'\bLinux\b',
+
+    # Roles (for categorization)
+    'Full Stack': r'\bFull[- ]?Stack\b',
+    'Frontend': r'\bFront[- ]?end\b',
+    'Backend': r'\bBack[- ]?end\b',
+    'DevOps': r'\bDevOps\b',
+    'Data Engineer': r'\bData Engineer\b',
+    'Mobile': r'\bMobile\b|\biOS\b|\bAndroid\b',
+}
+
+# Keys reported by get_skills_trends -> engine skill
+TREND_SKILLS: Dict[str, str] = {
+    'python': 'Python', 'javascript': 'JavaScript', 'react': 'React', 'java': 'Java',
+    'typescript': 'TypeScript', 'node': 'Node.js', 'aws': 'AWS', 'kubernetes': 'Kubernetes',
+    'docker': 'Docker', 'sql': 'SQL', 'go': 'Go', 'rust': 'Rust', 'vue': 'Vue',
+    'angular': 'Angular', 'graphql': 'GraphQL', 'mongodb': 'MongoDB', 'postgresql': 'PostgreSQL',
+    'redis': 'Redis', 'kafka': 'Kafka', 'spark': 'Spark', 'machine learning': 'Machine Learning',
+    'ai': 'AI', 'data science': 'Data Science', 'devops': 'DevOps', 'tensorflow': 'TensorFlow',
+    'pytorch': 'PyTorch', 'backend': 'Backend', 'frontend': 'Frontend', 'fullstack': 'Full Stack',
+}
+
+TITLE_CACHE_SIZE = 131072
+
+# Every pattern starts at a word boundary, so the scan only tries the
+# alternation at word starts instead of at every character.
+_GROUP_TO_SKILL = {f's{i}': skill for i, skill in enumerate(SKILL_PATTERNS)}
+_SKILLS_RE = re.compile(
+    r'\b(?=' + '|'.join(f'(?P<s{i}>{pattern})' for i, pattern in enumerate(SKILL_PATTERNS.values())) + ')',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def tag_title(title: str) -> FrozenSet[str]:
+    """Skills mentioned in one title (cached per distinct title)"""
+    if not title:
+        return frozenset()
+    return frozenset(_GROUP_TO_SKILL[m.lastgroup] for m in _SKILLS_RE.finditer(title))
+
+
+def tag_titles(titles: Iterable[str]) -> List[FrozenSet[str]]:
+    """Tag a batch of titles, running the matcher once per distinct title"""
+    return [tag_title(title) for title in titles]
+
+
+def count_skills(rows: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    """Sum job counts per skill over (title, job_count) rows"""
+    counts: Dict[str, int] = {}
+    for title, job_count in rows:
+        for skill in tag_title(title):
+            counts[skill] = counts.get(skill, 0) + job_count
+    return counts
+
+
+def cache_info():
+    return tag_title.cache_info()
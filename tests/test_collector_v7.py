@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import collector_v7
+from collector_v7 import CompanyJobBoard, ConfidencePolicy, JobIntelCollectorV7
+
+
+def board(name='Scale AI', token='scaleai', ats_type='greenhouse', job_count=10):
+    return CompanyJobBoard(company_name=name, token=token, ats_type=ats_type, job_count=job_count)
+
+
+class TestConfidencePolicy:
+    def test_name_match_ignores_case_and_punctuation(self):
+        policy = ConfidencePolicy(enabled=True, min_jobs=1, require_name_match=True)
+        assert policy.is_confident(board(name='Scale AI, Inc', token='scale-ai'), 'scale-ai')
+        assert policy.is_confident(board(name='Scale', token='scaleai'), 'Scale AI')
+        assert not policy.is_confident(board(name='Scaleway', token='scaleway'), 'Scale AI')
+
+    def test_needs_min_jobs(self):
+        policy = ConfidencePolicy(enabled=True, min_jobs=5, require_name_match=True)
+        assert not policy.is_confident(board(job_count=4), 'Scale AI')
+        assert policy.is_confident(board(job_count=5), 'Scale AI')
+
+    def test_without_name_match_any_big_enough_board(self):
+        policy = ConfidencePolicy(enabled=True, min_jobs=1, require_name_match=False)
+        assert policy.is_confident(board(name='Someone Else', token='else'), 'Scale AI')
+
+    def test_disabled(self):
+        policy = ConfidencePolicy(enabled=False, min_jobs=0, require_name_match=False)
+        assert not policy.is_confident(board(), 'Scale AI')
+
+
+ATS_CONFIGS = {
+    'greenhouse': {'priority': 1},
+    'lever': {'priority': 1},
+    'workday': {'priority': 2},
+    'workable': {'priority': 3},
+}
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    """A collector whose probes answer from `answers` ((ats_type, token) -> board) after `delays`"""
+    monkeypatch.setattr(collector_v7, 'ATS_CONFIGS', ATS_CONFIGS)
+    collector = JobIntelCollectorV7()
+    collector.scrapers = {ats_type: ats_type for ats_type in ATS_CONFIGS}
+    collector.confidence = ConfidencePolicy(enabled=True, min_jobs=1, require_name_match=True)
+    collector.answers = {}
+    collector.delays = {}
+    collector.probed = []
+    collector.cancelled = []
+    monkeypatch.setattr(collector, '_probe_tokens', lambda company_name: ['scaleai'])
+
+    async def test_single(scraper, token, ats_type):
+        collector.probed.append(ats_type)
+        try:
+            await asyncio.sleep(collector.delays.get(ats_type, 0))
+        except asyncio.CancelledError:
+            collector.cancelled.append(ats_type)
+            raise
+        return collector.answers.get((ats_type, token))
+
+    monkeypatch.setattr(collector, '_test_single', test_single)
+    return collector
+
+
+def test_confident_board_cancels_its_group_and_skips_the_rest(collector):
+    collector.answers[('greenhouse', 'scaleai')] = board()
+    collector.delays['lever'] = 5
+    results = asyncio.run(collector.test_company_parallel('Scale AI'))
+    assert [r.ats_type for r in results] == ['greenhouse']
+    assert collector.cancelled == ['lever']
+    assert sorted(collector.probed) == ['greenhouse', 'lever']
+    assert collector.early_exit['seeds'] == 1
+
+
+def test_unconfident_priority_one_board_still_ends_the_search(collector):
+    collector.answers[('lever', 'scaleai')] = board(name='Scaleway', ats_type='lever')
+    results = asyncio.run(collector.test_company_parallel('Scale AI'))
+    assert [r.ats_type for r in results] == ['lever']
+    assert sorted(collector.probed) == ['greenhouse', 'lever']
+    assert collector.early_exit['seeds'] == 0
+
+
+def test_unconfident_lower_priority_board_keeps_searching(collector):
+    collector.answers[('workday', 'scaleai')] = board(job_count=0, ats_type='workday')
+    collector.answers[('workable', 'scaleai')] = board(ats_type='workable')
+    results = asyncio.run(collector.test_company_parallel('Scale AI'))
+    assert [r.ats_type for r in results] == ['workday', 'workable']
+    assert sorted(collector.probed) == ['greenhouse', 'lever', 'workable', 'workday']
+
+
+def test_confident_lower_priority_board_skips_the_remaining_groups(collector):
+    collector.answers[('workday', 'scaleai')] = board(ats_type='workday')
+    results = asyncio.run(collector.test_company_parallel('Scale AI'))
+    assert [r.ats_type for r in results] == ['workday']
+    assert 'workable' not in collector.probed
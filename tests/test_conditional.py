@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.datastructures import ETags
+
+from middleware.conditional import evaluate_conditional
+
+
+def make_version(**overrides):
+    version = {
+        'generation': 3,
+        'last_seen': datetime(2024, 3, 1, 10, 0),
+        'snapshot_time': datetime(2024, 3, 1, 6, 0),
+        'last_modified': datetime(2024, 3, 1, 10, 0),
+    }
+    version.update(overrides)
+    return version
+
+
+def test_matching_etag_is_not_modified():
+    _, etag, _ = evaluate_conditional(make_version(), '/api/stats?', ETags(), None)
+    not_modified, same_etag, _ = evaluate_conditional(make_version(), '/api/stats?', ETags(weak_etags=[etag]), None)
+    assert not_modified
+    assert same_etag == etag
+
+
+def test_etag_changes_with_generation_and_path():
+    _, etag, _ = evaluate_conditional(make_version(), '/api/stats?', ETags(), None)
+    assert not evaluate_conditional(make_version(generation=4), '/api/stats?', ETags(weak_etags=[etag]), None)[0]
+    assert not evaluate_conditional(make_version(), '/api/jobs?', ETags(weak_etags=[etag]), None)[0]
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert not evaluate_conditional(make_version(), '/api/stats?', ETags(weak_etags=['stale']), future)[0]
+
+
+def test_if_modified_since():
+    _, _, last_modified = evaluate_conditional(make_version(), '/api/stats?', ETags(), None)
+    assert evaluate_conditional(make_version(), '/api/stats?', ETags(), last_modified)[0]
+    assert not evaluate_conditional(make_version(), '/api/stats?', ETags(), last_modified - timedelta(seconds=1))[0]
+    assert not evaluate_conditional(make_version(), '/api/stats?', ETags(), None)[0]
+
+
+def test_last_modified_is_never_before_start_of_day():
+    _, _, last_modified = evaluate_conditional(make_version(last_modified=None), '/api/stats?', ETags(), None)
+    today = datetime.now(timezone.utc).date()
+    assert last_modified == datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
@@ -0,0 +1,44 @@
+import time
+
+from middleware.cache import ResponseCache
+
+
+def entry(body: bytes, ttl: float = 60):
+    return (time.time() + ttl, body, 200, 'application/json')
+
+
+def test_invalidate_retires_cached_entries():
+    cache = ResponseCache(default_ttl=60, stale_seconds=0)
+    stored, status = cache.get_or_compute('stats', 60, lambda: entry(b'old'))
+    assert (stored[1], status) == (b'old', 'MISS')
+    cached, status = cache.get_or_compute('stats', 60, lambda: entry(b'unused'))
+    assert (cached[1], status) == (b'old', 'HIT')
+
+    generation = cache.generation()
+    cache.invalidate('test')
+    assert cache.generation() == generation + 1
+    assert cache.lookup('stats') is None
+
+    fresh, status = cache.get_or_compute('stats', 60, lambda: entry(b'new'))
+    assert (fresh[1], status) == (b'new', 'MISS')
+    assert cache.stats['invalidations'] == 1
+
+
+def test_invalidation_listeners_get_the_reason():
+    cache = ResponseCache()
+    reasons = []
+
+    def broken(reason):
+        raise RuntimeError('listener failure')
+
+    cache.add_invalidation_listener(broken)
+    cache.add_invalidation_listener(reasons.append)
+    cache.invalidate('seed change')
+    assert reasons == ['seed change']
+    assert cache.last_invalidation['reason'] == 'seed change'
+
+
+def test_uncacheable_responses_are_not_stored():
+    cache = ResponseCache()
+    assert cache.get_or_compute('jobs', 60, lambda: None) == (None, 'MISS')
+    assert cache.lookup('jobs') is None
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+import pytest
+
+from utils import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    sort_value = datetime(2024, 3, 1, 12, 30, 5, 123456)
+    token = encode_cursor(sort_value, 42)
+    assert '=' not in token
+    assert decode_cursor(token) == (sort_value, 42)
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-cursor', 'W10', encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_decode_cursor_rejects_malformed_tokens(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
@@ -4,10 +4,13 @@ Utilities Module
 Helper functions for normalization, hashing, and proxy management.
 """
 
+import base64
 import hashlib
+import json
 import random
 import re
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Tuple
 
 # Common department mappings
 DEPT_MAPPINGS = {
@@ -56,6 +59,20 @@ def calculate_job_hash(company_id: str, title: str, location: str) -> str:
     raw = f"{company_id}|{title.strip().lower()}|{location.strip().lower()}"
     return hashlib.md5(raw.encode()).hexdigest()
 
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Opaque pagination token for a (timestamp, id) keyset position."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError for malformed tokens."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
 class ProxyRotator:
     """Simple round-robin proxy rotator (Placeholder logic for now)."""
     